@@ -0,0 +1,259 @@
+"""Performance benchmarks for SpeederBikesEnv.
+
+Measures steps/sec, reset latency and peak memory for every observation mode, render_mode None vs 'rgb_array'
+and a sweep of lvl_n_lanes/ lvl_speed, times the hot functions of a step and the import time,
+and checks that headless workers never import pygame.
+
+    python benchmarks/benchmark.py --out results.json
+    python benchmarks/benchmark.py --check benchmarks/baseline.json
+
+In check mode the run fails (exit code 1) if a metric is worse than the stored baseline by more than the tolerance.
+Baselines are machine dependent, record one per machine with --out.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+def _policy(t:int) -> int:
+    # deterministic action sequence, changes direction every few steps
+    return (t // 7) % 3
+
+def bench_steps(env_kwargs:dict, min_time:float, render:bool=False) -> float:
+    """Steps per second, including resets after collisions."""
+    env = SpeederBikesEnv(**env_kwargs)
+    env.reset(seed=0)
+    # warm up caches
+    for t in range(50):
+        _, _, terminated, _, _ = env.step(_policy(t))
+        if terminated:
+            env.reset()
+
+    n_steps = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            _, _, terminated, _, _ = env.step(_policy(n_steps))
+            if render:
+                env.render()
+            if terminated:
+                env.reset()
+            n_steps += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+    env.close()
+    return n_steps / elapsed
+
+def bench_reset(env_kwargs:dict, min_time:float) -> float:
+    """Mean reset latency in seconds."""
+    env = SpeederBikesEnv(**env_kwargs)
+    env.reset(seed=0)
+    n_resets = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        env.reset()
+        n_resets += 1
+    elapsed = time.perf_counter() - start
+    env.close()
+    return elapsed / n_resets
+
+def bench_memory(env_kwargs:dict, n_steps:int=300) -> int:
+    """Peak traced memory in bytes of creating, resetting and stepping an env."""
+    # one untraced run first, so that module level caches don't count
+    env = SpeederBikesEnv(**env_kwargs)
+    env.reset(seed=0)
+    env.step(1)
+    env.close()
+
+    tracemalloc.start()
+    env = SpeederBikesEnv(**env_kwargs)
+    env.reset(seed=0)
+    for t in range(n_steps):
+        _, _, terminated, _, _ = env.step(_policy(t))
+        if terminated:
+            env.reset()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    env.close()
+    return peak
+
+_IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import speederbikes_sim.envs
+print(time.perf_counter() - start)
+"""
+
+_HEADLESS_SNIPPET = """
+import sys
+from speederbikes_sim.envs import SpeederBikesEnv, SpeederBikesVecEnv
+env = SpeederBikesEnv(backend="numpy", renderer="numpy", observation_mode="rgb_array")
+env.reset(seed=0)
+for _ in range(100):
+    env.step(1)
+envs = SpeederBikesVecEnv(num_envs=4)
+envs.reset(seed=0)
+envs.step([1, 1, 1, 1])
+print(int("pygame" in sys.modules))
+"""
+
+def _run_snippet(snippet:str) -> str:
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
+    return subprocess.run([sys.executable, "-c", snippet], env=env, capture_output=True, text=True, check=True).stdout
+
+def bench_import(repeats:int=5) -> float:
+    """Time of importing speederbikes_sim.envs in a fresh interpreter in seconds (best of repeats)."""
+    return min(float(_run_snippet(_IMPORT_SNIPPET).split()[-1]) for _ in range(repeats))
+
+def headless_loads_pygame() -> int:
+    """1 if a headless worker (numpy backend and renderer, vector env) ends up importing pygame, else 0."""
+    return int(_run_snippet(_HEADLESS_SNIPPET).split()[-1])
+
+def bench_call(function, min_time:float) -> float:
+    """Mean time per call in seconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    repeats = max(int(min_time / max(timer.timeit(number), 1e-9)), 1)
+    return min(timer.repeat(repeat=min(repeats, 5), number=number)) / number
+
+def bench_hot_functions(min_time:float) -> dict:
+    results = {}
+    env = SpeederBikesEnv(observation_mode="flatten", lvl_n_lanes=5)
+    env.reset(seed=0)
+    for t in range(60):
+        env.step(1)
+
+    results["_get_obs[flatten]"] = bench_call(env._get_obs, min_time)
+    results["_make_array_observation"] = bench_call(env._make_array_observation, min_time)
+    results["Agent.collided"] = bench_call(env.agent.collided, min_time)
+    results["_render_frame[rgb_array]"] = bench_call(lambda: env._render_frame("rgb_array"), min_time)
+
+    dict_env = SpeederBikesEnv(observation_mode="dict", lvl_n_lanes=5)
+    dict_env.reset(seed=0)
+    results["_get_obs[dict]"] = bench_call(dict_env._get_obs, min_time)
+
+    # adding obstacles grows the level, time a fixed number of them on a fresh level each time
+    def add_obstacles(n:int=100) -> None:
+        level = env.level
+        for _ in range(n):
+            level._addObstacle()
+        for obstacle in level.obstacles[1:]:
+            level._deleteObstacle(obstacle)
+        del level.obstacles[1:]
+    results["Level._addObstacle"] = bench_call(add_obstacles, min_time) / 100
+
+    env.close()
+    dict_env.close()
+    return results
+
+def run(quick:bool=False) -> dict:
+    """Run all benchmarks.
+    Returns:
+        dict: metric name -> {"value", "unit", "higher_is_better"}
+    """
+    min_time = 0.2 if quick else 1.0
+    metrics = {}
+    def add(name:str, value:float, unit:str, higher_is_better:bool, slack:float=0.) -> None:
+        # slack: absolute difference that is never reported as a regression, for small noisy numbers
+        metrics[name] = {"value": float(value), "unit": unit, "higher_is_better": higher_is_better, "slack": slack}
+        print(f"{name:<60} {value:>14.6g} {unit}", flush=True)
+
+    # ====== startup
+    add("import_time/speederbikes_sim.envs", bench_import(3 if quick else 10), "s", False, slack=0.01)
+    add("headless/pygame_imported", headless_loads_pygame(), "bool", False)
+
+    # ====== every observation mode
+    for mode in SpeederBikesEnv.metadata["observation_modes"]:
+        kwargs = dict(observation_mode=mode)
+        add(f"steps_per_sec/observation_mode={mode}", bench_steps(kwargs, min_time), "steps/s", True)
+        add(f"reset_latency/observation_mode={mode}", bench_reset(kwargs, min_time / 2), "s", False)
+        add(f"peak_memory/observation_mode={mode}", bench_memory(kwargs), "bytes", False, slack=64 * 1024)
+
+    # ====== render_mode None vs 'rgb_array'
+    for render_mode in [None, "rgb_array"]:
+        kwargs = dict(observation_mode="flatten", render_mode=render_mode)
+        add(f"steps_per_sec/render_mode={render_mode}", bench_steps(kwargs, min_time, render=render_mode is not None),
+            "steps/s", True)
+
+    # ====== level sweep
+    for n_lanes in [2, 3, 5, 8]:
+        for speed in [200, 600]:
+            kwargs = dict(observation_mode="flatten", lvl_n_lanes=n_lanes, lvl_speed=speed)
+            add(f"steps_per_sec/lvl_n_lanes={n_lanes},lvl_speed={speed}", bench_steps(kwargs, min_time / 2), "steps/s", True)
+
+    # ====== hot functions
+    for name, seconds in bench_hot_functions(min_time / 2).items():
+        add(f"hot/{name}", seconds, "s", False)
+
+    return metrics
+
+def check(metrics:dict, baseline:dict, tolerance:float) -> list:
+    """Compare against a baseline.
+    Returns:
+        list: descriptions of all metrics that regressed by more than tolerance
+    """
+    failures = []
+    for name, reference in baseline["metrics"].items():
+        if name not in metrics:
+            continue
+        value, ref, slack = metrics[name]["value"], reference["value"], reference.get("slack", 0.)
+        if reference["higher_is_better"]:
+            regressed = value < ref * (1 - tolerance) - slack
+        else:
+            regressed = value > ref * (1 + tolerance) + slack
+        if regressed:
+            failures.append(f"{name}: {value:.6g} vs baseline {ref:.6g} {reference['unit']}")
+    return failures
+
+def main(argv:list|None=None) -> int:
+    parser = argparse.ArgumentParser(description="SpeederBikesEnv performance benchmarks")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--check", metavar="BASELINE", help="fail if results are worse than this baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression in check mode")
+    parser.add_argument("--quick", action="store_true", help="shorter measurements")
+    args = parser.parse_args(argv)
+
+    import pygame
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+        },
+        "metrics": run(quick=args.quick),
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+        failures = check(results["metrics"], baseline, args.tolerance)
+        if failures:
+            print(f"\n{len(failures)} regression(s) beyond {args.tolerance:.0%}:")
+            for failure in failures:
+                print("  " + failure)
+            return 1
+        print(f"\nno regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
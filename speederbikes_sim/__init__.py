@@ -1,3 +1,7 @@
+import os
+# pygame is only imported once something is rendered, keep it from printing its banner then
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
 # from gym.envs.registration import register
 from gymnasium.envs.registration import register
 
@@ -7,6 +11,23 @@ register(
     # max_episode_steps=300, # automatically generate done signal after 300 steps. will be flagged in info["TimeLimit.truncated"]
 )
 
+# natively batched version, gym.make('speederbikes/SpeederBikes-vec-v0', num_envs=64)
+# the single env wrappers (checker, order enforcing) do not apply to vector envs
+register(
+    id="speederbikes/SpeederBikes-vec-v0",
+    entry_point="speederbikes_sim.envs:SpeederBikesVecEnv",
+    disable_env_checker=True,
+    order_enforce=False,
+)
+
+# the same worlds split across worker processes, gym.make('speederbikes/SpeederBikes-sharded-v0', num_envs=4096, num_workers=16)
+register(
+    id="speederbikes/SpeederBikes-sharded-v0",
+    entry_point="speederbikes_sim.envs:SpeederBikesShardedVecEnv",
+    disable_env_checker=True,
+    order_enforce=False,
+)
+
 # more keyword arguments:
 # reward_threshold float
 # nondeterministic bool=False (true if this env is non-deterministic even after seeding)
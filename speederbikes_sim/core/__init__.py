@@ -0,0 +1,12 @@
+# pure NumPy simulation core. Nothing in here may import pygame.
+from speederbikes_sim.core.maps import MapSampler
+from speederbikes_sim.core.simulation import Simulation
+from speederbikes_sim.core.collision import collision_mask, first_collision, find_collision
+from speederbikes_sim.core.batch import BatchSimulation
+from speederbikes_sim.core.raster import Rasterizer
+from speederbikes_sim.core.profiler import StepProfiler
+from speederbikes_sim.core.state import STATE_DTYPE
+from speederbikes_sim.core.tape import LevelTape, generate_tape
+from speederbikes_sim.core.lidar import Lidar
+from speederbikes_sim.core.occupancy import OccupancyGrid
+from speederbikes_sim.core.npc import NpcTraffic
@@ -0,0 +1,216 @@
+import numpy as np
+
+from speederbikes_sim.core.maps import MapSampler, maps_to_codes
+from speederbikes_sim.core.state import MAX_OBSTACLES, empty_state, as_state, pack_rng
+from speederbikes_sim.core.collision import collision_mask, first_collision
+
+class BatchSimulation():
+    def __init__(self, num_envs:int, window_size:int, n_lanes:int=5, speed:float=200., road_width:int=350,
+                 agt_speed:float=200., agt_size:int=15, rng:np.random.Generator|None=None) -> None:
+        """Headless game logic for a batch of levels that share the same settings.
+        Same rules as Simulation, but every update is one array operation over the whole batch.
+        The obstacles of each level live in a ring buffer, the oldest one at obstacle_head.
+        Args:
+            num_envs (int): number of levels
+            window_size (int): size of the (square) window in pixels
+            n_lanes (int, optional): number of lanes. Defaults to 5.
+            speed (float, optional): obstacle speed. Defaults to 200..
+            road_width (int, optional): width of the road incl. border lines. Defaults to 350.
+            agt_speed (float, optional): agent speed. Defaults to 200..
+            agt_size (int, optional): radius of the agent. Defaults to 15.
+            rng (np.random.Generator | None, optional): random number generator for obstacle maps. Defaults to None.
+        """
+        self.num_envs = num_envs
+        self.n_lanes = n_lanes
+        self.speed = speed
+        self.width:int = road_width
+        self.height = window_size
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        # ======= road
+        self.line_width = 3
+        self.lane_width = self.width - self.line_width * 2
+        self.left_border = (window_size - self.width) / 2 + self.line_width
+        self.right_border = window_size - (window_size - self.width) / 2 - self.line_width
+
+        # ======= obstacles
+        self.inter_obstacle_distance = 220
+        self.obstacle_entry_y = 0
+        self.obstacle_exit_y = self.height
+        self.obstacle_height = 5
+
+        part_width = int(round(self.lane_width / self.n_lanes))
+        self.part_limits = np.array([[part_width * i, part_width * (i+1) - 1] for i in range(self.n_lanes)])
+        self.part_limits[-1][1] = self.lane_width
+
+        capacity = int(np.ceil(self.height / self.inter_obstacle_distance)) + 2
+        self.obstacle_y = np.zeros((num_envs, capacity), dtype=float)
+        self.obstacle_map = np.zeros((num_envs, capacity, self.n_lanes), dtype=bool)
+        self.obstacle_head = np.zeros(num_envs, dtype=int)
+        self.n_obstacles = np.zeros(num_envs, dtype=int)
+        # number of obstacles created per level since its reset
+        self.n_spawned = np.zeros(num_envs, dtype=int)
+        self.map_sampler = MapSampler(self.n_lanes)
+        # code of the newest obstacle's map per level, -1 if there is none
+        self.last_code = np.full(num_envs, -1, dtype=np.int64)
+        self._env_idx = np.arange(num_envs)
+
+        # ======= agents
+        self.agt_speed = agt_speed
+        self.agt_size = agt_size
+        self.agent_start_x = float(int(round(window_size / 2)))
+        self.agent_x = np.full(num_envs, self.agent_start_x)
+        self.agent_y = int(window_size * 0.8)
+
+        self.reset()
+
+    @property
+    def capacity(self) -> int:
+        return self.obstacle_y.shape[1]
+
+    def reset(self, mask:np.ndarray|None=None) -> None:
+        """Restart the selected levels with one fresh obstacle and a centered agent.
+        Args:
+            mask (np.ndarray | None, optional): (num_envs,) boolean selection. Defaults to None (all).
+        """
+        idx = self._env_idx if mask is None else np.flatnonzero(mask)
+        if idx.shape[0] == 0:
+            return
+        self.agent_x[idx] = self.agent_start_x
+        self.obstacle_head[idx] = 0
+        self.n_obstacles[idx] = 0
+        self.n_spawned[idx] = 0
+        self.last_code[idx] = -1
+        self._addObstacles(idx)
+
+    def ordered_slots(self) -> tuple[np.ndarray, np.ndarray]:
+        """Ring buffer slots of every level's obstacles, oldest first.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (num_envs, capacity) slot indices and a mask of the slots in use
+        """
+        k = np.arange(self.capacity)
+        slots = (self.obstacle_head[:, None] + k) % self.capacity
+        return slots, k < self.n_obstacles[:, None]
+
+    def _grow(self) -> None:
+        # unroll the ring buffers into twice the capacity
+        slots, _ = self.ordered_slots()
+        rows = self._env_idx[:, None]
+        obstacle_y = np.zeros((self.num_envs, self.capacity * 2), dtype=float)
+        obstacle_map = np.zeros((self.num_envs, self.capacity * 2, self.n_lanes), dtype=bool)
+        obstacle_y[:, :self.capacity] = self.obstacle_y[rows, slots]
+        obstacle_map[:, :self.capacity] = self.obstacle_map[rows, slots]
+        self.obstacle_y, self.obstacle_map = obstacle_y, obstacle_map
+        self.obstacle_head[:] = 0
+
+    def _addObstacles(self, idx:np.ndarray) -> None:
+        if (self.n_obstacles[idx] >= self.capacity).any():
+            self._grow()
+        self.last_code[idx] = self.map_sampler.sample_batch(self.last_code[idx], self.rng)
+        maps = self.map_sampler.to_map(self.last_code[idx])
+
+        new = (self.obstacle_head[idx] + self.n_obstacles[idx]) % self.capacity
+        self.obstacle_y[idx, new] = self.obstacle_entry_y
+        self.obstacle_map[idx, new] = maps
+        self.n_obstacles[idx] += 1
+        self.n_spawned[idx] += 1
+
+    def update_agents(self, actions:np.ndarray, dt:float) -> None:
+        """Args:
+            actions (np.ndarray): (num_envs,) directions in [-1, 0, 1]
+            dt (float): time step
+        """
+        self.agent_x += actions * self.agt_speed * dt
+        np.clip(self.agent_x, self.left_border + self.agt_size, self.right_border - self.agt_size, out=self.agent_x)
+
+    def update_levels(self, dt:float) -> None:
+        # create new obstacles where the newest one is far enough down
+        newest = (self.obstacle_head + self.n_obstacles - 1) % self.capacity
+        spawn = self.obstacle_y[self._env_idx, newest] >= self.inter_obstacle_distance
+        if spawn.any():
+            self._addObstacles(np.flatnonzero(spawn))
+
+        # delete the oldest obstacle where it left the window
+        delete = self.obstacle_y[self._env_idx, self.obstacle_head] >= self.obstacle_exit_y
+        self.obstacle_head[delete] = (self.obstacle_head[delete] + 1) % self.capacity
+        self.n_obstacles[delete] -= 1
+
+        # update all obstacle positions, unused slots are overwritten on spawn
+        self.obstacle_y += self.speed * dt
+
+    def update(self, actions:np.ndarray, dt:float) -> None:
+        self.update_agents(actions, dt)
+        self.update_levels(dt)
+
+    def collisions(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Collision check for all levels at once, see core.collision.
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: (num_envs,) collided, index of the hit obstacle (oldest first)
+                and lane, -1 where nothing was hit
+        """
+        # order does not matter for the check, only which slots are in use
+        order = (np.arange(self.capacity) - self.obstacle_head[:, None]) % self.capacity
+        in_use = order < self.n_obstacles[:, None]
+        mask = collision_mask(self.agent_x - self.left_border, self.agent_y, self.agt_size,
+                              self.obstacle_y, self.obstacle_map, self.part_limits, self.obstacle_height, in_use)
+        collided, slot, lane = first_collision(mask)
+        obstacle = np.where(collided, order[self._env_idx, slot], -1)
+        return collided, obstacle, lane
+
+    def collided(self) -> np.ndarray:
+        """Returns:
+            np.ndarray: (num_envs,) whether there was a collision or not.
+        """
+        return self.collisions()[0]
+
+    def get_state(self, index:int, out:np.ndarray|None=None) -> np.ndarray:
+        """Snapshot of one level, see Simulation.get_state. All levels share the RNG, its state is stored as well.
+        Returns:
+            np.ndarray: 0-d record of STATE_DTYPE
+        """
+        n = int(self.n_obstacles[index])
+        if n > MAX_OBSTACLES:
+            raise ValueError(f"more than {MAX_OBSTACLES} obstacles can't be stored")
+        slots, _ = self.ordered_slots()
+        slots = slots[index, :n]
+        state = empty_state() if out is None else out
+        state["n_lanes"] = self.n_lanes
+        state["speed"] = self.speed
+        state["road_width"] = self.width
+        state["agt_speed"] = self.agt_speed
+        state["agent_x"] = self.agent_x[index]
+        state["n_obstacles"] = n
+        state["n_spawned"] = self.n_spawned[index]
+        state["last_code"] = self.last_code[index]
+        state["obstacle_y"][:n] = self.obstacle_y[index, slots]
+        state["obstacle_y"][n:] = 0
+        state["obstacle_code"][:n] = maps_to_codes(self.obstacle_map[index, slots])
+        state["obstacle_code"][n:] = 0
+        pack_rng(self.rng, state["rng"])
+        # batches always sample
+        state["tape_offset"] = 0
+        return state
+
+    def set_state(self, state:np.ndarray|bytes, mask:np.ndarray|None=None) -> None:
+        """Restore one snapshot into all (or the selected) levels at once. Geometry and speeds must be the same.
+        The shared RNG is not restored, so that levels restored from the same snapshot continue differently.
+        Args:
+            state (np.ndarray | bytes): snapshot, see Simulation.get_state
+            mask (np.ndarray | None, optional): (num_envs,) boolean selection. Defaults to None (all).
+        """
+        state = as_state(state)
+        if (int(state["n_lanes"]), int(state["road_width"]), float(state["speed"]), float(state["agt_speed"])) != \
+                (self.n_lanes, self.width, self.speed, self.agt_speed):
+            raise ValueError("state of a level with other parameters")
+        idx = self._env_idx if mask is None else np.flatnonzero(mask)
+        n = int(state["n_obstacles"])
+        while n > self.capacity:
+            self._grow()
+
+        self.agent_x[idx] = state["agent_x"]
+        self.obstacle_head[idx] = 0
+        self.obstacle_y[idx, :n] = state["obstacle_y"][:n]
+        self.obstacle_map[idx, :n] = self.map_sampler.to_map(state["obstacle_code"][:n])
+        self.n_obstacles[idx] = n
+        self.n_spawned[idx] = state["n_spawned"]
+        self.last_code[idx] = state["last_code"]
@@ -0,0 +1,79 @@
+import numpy as np
+
+# Collision logic: the agent's square bounding box against all obstacle parts at once.
+# Works for a single level (obstacles (n,), maps (n, n_lanes)) and for a batch of levels
+# (agents (N,), obstacles (N, n), maps (N, n, n_lanes)) through broadcasting.
+
+def band_mask(agent_y:float, agent_size:float, obstacle_y:np.ndarray, obstacle_height:float) -> np.ndarray:
+    """Which obstacles overlap with the agent in the y dimension, i.e. are in the agent's band.
+    Only those can be hit.
+    """
+    return (agent_y - agent_size <= obstacle_y + obstacle_height) & (agent_y + agent_size >= obstacle_y)
+
+def collision_mask(agent_x, agent_y:float, agent_size:float,
+                   obstacle_y:np.ndarray, obstacle_map:np.ndarray, part_limits:np.ndarray,
+                   obstacle_height:float, in_use:np.ndarray|None=None) -> np.ndarray:
+    """Which obstacle parts the agent overlaps with. Same rules as the original per obstacle check:
+    an obstacle part is hit if the agent's box overlaps with it in y and in x dimension, borders included.
+    Args:
+        agent_x (float | np.ndarray): agent center x relative to the road's left border, scalar or (N,)
+        agent_y (float): agent center y
+        agent_size (float): agent radius
+        obstacle_y (np.ndarray): top y of the obstacles, (n,) or (N, n)
+        obstacle_map (np.ndarray): boolean lane maps, (n, n_lanes) or (N, n, n_lanes)
+        part_limits (np.ndarray): (n_lanes, 2) left and right limits of the parts, relative to the road's left border
+        obstacle_height (float): height of the obstacles
+        in_use (np.ndarray | None, optional): mask of valid obstacles, same shape as obstacle_y. Defaults to None.
+    Returns:
+        np.ndarray: boolean mask of hit parts, same shape as obstacle_map
+    """
+    agent_x = np.asarray(agent_x, dtype=float)[..., None]
+    a_l = agent_x - agent_size # left
+    a_r = agent_x + agent_size # right
+    a_t = agent_y - agent_size # top
+    a_b = agent_y + agent_size # bottom
+
+    # overlap in the y dimension per obstacle
+    y_overlap = (a_t <= obstacle_y + obstacle_height) & (a_b >= obstacle_y)
+    if in_use is not None:
+        y_overlap &= in_use
+    # overlap in the x dimension per lane
+    x_overlap = (a_r >= part_limits[:, 0]) & (a_l <= part_limits[:, 1])
+
+    return obstacle_map & y_overlap[..., None] & x_overlap[..., None, :]
+
+def first_collision(mask:np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Reduce a collision mask to the first hit obstacle and lane.
+    Args:
+        mask (np.ndarray): (..., n, n_lanes) result of collision_mask
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: collided, obstacle index and lane index, -1 where nothing was hit
+    """
+    n_lanes = mask.shape[-1]
+    flat = mask.reshape(mask.shape[:-2] + (-1,))
+    collided = flat.any(axis=-1)
+    first = np.where(collided, flat.argmax(axis=-1), -1)
+    obstacle = np.where(collided, first // n_lanes, -1)
+    lane = np.where(collided, first % n_lanes, -1)
+    return collided, obstacle, lane
+
+def find_collision(agent_x:float, agent_y:float, agent_size:float,
+                   obstacle_y:np.ndarray, obstacle_map:np.ndarray, part_limits:np.ndarray,
+                   obstacle_height:float) -> tuple[int, int] | None:
+    """Collision check for a single level. Only obstacles overlapping in the y dimension are looked at further,
+    which usually are none.
+    Args:
+        see collision_mask
+    Returns:
+        tuple[int, int] | None: index of the hit obstacle and lane, None if there was no collision
+    """
+    candidates = np.flatnonzero(band_mask(agent_y, agent_size, obstacle_y, obstacle_height))
+    if candidates.shape[0] == 0:
+        return None
+
+    mask = collision_mask(agent_x, agent_y, agent_size, obstacle_y[candidates], obstacle_map[candidates],
+                          part_limits, obstacle_height)
+    collided, obstacle, lane = first_collision(mask)
+    if not collided:
+        return None
+    return int(candidates[obstacle]), int(lane)
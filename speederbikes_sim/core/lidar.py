@@ -0,0 +1,62 @@
+import numpy as np
+
+# Ray-cast observations: rays fan out upward from the agent's center and measure the distance to the first obstacle
+# part or road border they hit. Coordinates are relative to the road's left border, like part limits (see
+# core.collision), so the road borders are at x = 0 and x = lane_width. Obstacle parts are boxes, every ray is
+# tested against all of them at once with the slab method.
+
+class Lidar():
+    def __init__(self, n_rays:int=16, fov:float=np.pi, max_range:float=512.) -> None:
+        """Args:
+            n_rays (int, optional): number of rays. Defaults to 16.
+            fov (float, optional): angle between the outermost rays, centered on straight up. Defaults to pi,
+                the outermost rays then point left and right.
+            max_range (float, optional): distance reported for rays that hit nothing. Defaults to 512.
+        """
+        assert n_rays >= 1
+        self.n_rays = n_rays
+        self.fov = fov
+        self.max_range = max_range
+
+        angles = np.linspace(-fov / 2, fov / 2, n_rays) if n_rays > 1 else np.zeros(1)
+        # unit directions, y points down
+        self.dx = np.sin(angles)
+        self.dy = -np.cos(angles)
+        # axis-parallel rays never cross the other axis' slabs
+        self.dx[np.abs(self.dx) < 1e-12] = 1e-12
+        self.dy[np.abs(self.dy) < 1e-12] = 1e-12
+
+    def cast(self, agent_x:float, agent_y:float, lane_width:float, obstacle_y:np.ndarray, obstacle_map:np.ndarray,
+             part_limits:np.ndarray, obstacle_height:float, out:np.ndarray|None=None) -> np.ndarray:
+        """Args:
+            agent_x (float): agent center x relative to the road's left border
+            agent_y (float): agent center y
+            lane_width (float): distance between the road borders
+            obstacle_y (np.ndarray): (n,) top y of the obstacles
+            obstacle_map (np.ndarray): (n, n_lanes) boolean lane maps
+            part_limits (np.ndarray): (n_lanes, 2) left and right limits of the parts
+            obstacle_height (float): height of the obstacles
+            out (np.ndarray | None, optional): (n_rays,) float array to write into. Defaults to None (float32).
+        Returns:
+            np.ndarray: (n_rays,) distances, at most max_range
+        """
+        # road borders, the ray hits the one it points to
+        distance = np.where(self.dx > 0, lane_width - agent_x, -agent_x) / self.dx
+
+        obstacle, lane = np.nonzero(obstacle_map)
+        if obstacle.shape[0] > 0:
+            # (n_rays, n_parts) entry and exit of the x and y slabs of every blocked part
+            top = obstacle_y[obstacle]
+            tx1 = (part_limits[lane, 0] - agent_x) / self.dx[:, None]
+            tx2 = (part_limits[lane, 1] - agent_x) / self.dx[:, None]
+            ty1 = (top - agent_y) / self.dy[:, None]
+            ty2 = (top + obstacle_height - agent_y) / self.dy[:, None]
+            t_near = np.maximum(np.minimum(tx1, tx2), np.minimum(ty1, ty2))
+            t_far = np.minimum(np.maximum(tx1, tx2), np.maximum(ty1, ty2))
+            hit = (t_near <= t_far) & (t_far >= 0)
+            parts = np.where(hit, np.maximum(t_near, 0), np.inf).min(axis=1)
+            distance = np.minimum(distance, parts)
+
+        out = np.empty(self.n_rays, dtype=np.float32) if out is None else out
+        np.minimum(distance, self.max_range, out=out, casting="same_kind")
+        return out
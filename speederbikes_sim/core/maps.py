@@ -0,0 +1,153 @@
+import numpy as np
+from functools import lru_cache
+
+# Rules for generating obstacle lane maps. A map has one entry per lane, 1 means the lane is blocked.
+# Maps are handled as integer codes, bit i set means lane i is blocked.
+# The rules used to be applied by sampling uniformly random maps until one was accepted. That procedure picks
+# a map with probability proportional to its acceptance probability, which is what MapSampler draws from directly.
+
+def acceptance(codes:np.ndarray, last_codes:np.ndarray|int|None, n_lanes:int) -> np.ndarray:
+    """Probability with which the rules let each map through, given the map of the previous obstacle.
+    Args:
+        codes (np.ndarray): candidate map codes
+        last_codes (np.ndarray | int | None): codes of the previous obstacles' maps (broadcast against codes),
+            negative or None where there is none
+        n_lanes (int): number of lanes
+    Returns:
+        np.ndarray: acceptance probabilities
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    last_codes = np.asarray(-1 if last_codes is None else last_codes, dtype=np.int64)
+    full = (1 << n_lanes) - 1
+    p = np.ones(np.broadcast_shapes(codes.shape, last_codes.shape))
+
+    # holes at the same spot as in the previous map
+    n_twice_empty_slots = popcount(~codes & ~last_codes & full)
+    has_last = last_codes >= 0
+
+    # if there are holes at the same spot in at least 20 % of the slots (1 slot in 3 or 5 lane case),
+    # let it go through in 20 % of cases
+    p[has_last & (n_twice_empty_slots >= int(round(0.2 * n_lanes, 0)))] = 0.2
+    # if there are holes at the same spot in at least 40 % of the slots or (2 slots in 5 lane case) in at least 2 slots,
+    # let it go through in 5 % of cases
+    p[has_last & (n_twice_empty_slots >= max( int(round(0.4 * n_lanes, 0)), 2))] = 0.05
+
+    # We generally don't want to have a free lane.
+    # only generally though.
+    p[(codes == 0) & np.ones_like(has_last)] = 0.15
+    # never block all lanes
+    p[(codes == full) & np.ones_like(has_last)] = 0.
+    return p
+
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(codes:np.ndarray) -> np.ndarray:
+    """Number of set bits of each non-negative int64 code."""
+    codes = np.ascontiguousarray(codes, dtype=np.int64)
+    return _BYTE_POPCOUNT[codes.view(np.uint8)].reshape(codes.shape + (8,)).sum(axis=-1, dtype=int)
+
+def codes_to_maps(codes:np.ndarray, n_lanes:int) -> np.ndarray:
+    """Args:
+        codes (np.ndarray): map codes
+        n_lanes (int): number of lanes
+    Returns:
+        np.ndarray: (..., n_lanes) boolean maps
+    """
+    codes = np.asarray(codes, dtype=np.uint64)
+    return (codes[..., None] >> np.arange(n_lanes, dtype=np.uint64)) & np.uint64(1) == 1
+
+def maps_to_codes(maps:np.ndarray) -> np.ndarray:
+    """Args:
+        maps (np.ndarray): (..., n_lanes) maps
+    Returns:
+        np.ndarray: map codes
+    """
+    maps = np.asarray(maps, dtype=bool)
+    return (maps.astype(np.uint64) << np.arange(maps.shape[-1], dtype=np.uint64)).sum(axis=-1, dtype=np.uint64)
+
+def _alias_table(p:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Vose's alias method for a discrete distribution proportional to p
+    n = p.shape[0]
+    scaled = p / p.sum() * n
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.]
+    large = [i for i in range(n) if scaled[i] >= 1.]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] = scaled[l] + scaled[s] - 1.
+        (small if scaled[l] < 1. else large).append(l)
+    return prob, alias
+
+@lru_cache(maxsize=None)
+def _alias_tables(n_lanes:int) -> tuple[np.ndarray, np.ndarray]:
+    # one row per previous map code, the last row for 'no previous map'. Shared by all samplers with this n_lanes.
+    n_maps = 1 << n_lanes
+    codes = np.arange(n_maps)
+    prob = np.empty((n_maps + 1, n_maps))
+    alias = np.empty((n_maps + 1, n_maps), dtype=np.int64)
+    for last_code in range(n_maps + 1):
+        p = acceptance(codes, last_code if last_code < n_maps else None, n_lanes)
+        prob[last_code], alias[last_code] = _alias_table(p)
+    return prob, alias
+
+class MapSampler():
+    def __init__(self, n_lanes:int, max_table_lanes:int=8) -> None:
+        """Draws obstacle maps from the exact distribution the rules imply, given the previous map.
+        Up to max_table_lanes lanes, every draw is an O(1) lookup in precomputed alias tables and takes one random
+        number. Above that the tables get too large and maps are drawn as bitmasks until the rules accept one.
+        Args:
+            n_lanes (int): number of lanes, at most 62
+            max_table_lanes (int, optional): largest number of lanes to precompute tables for. Defaults to 8.
+        """
+        assert 0 < n_lanes < 63
+        self.n_lanes = n_lanes
+        self.n_maps = 1 << n_lanes
+        self.use_tables = n_lanes <= max_table_lanes
+        if self.use_tables:
+            self.prob, self.alias = _alias_tables(n_lanes)
+            self.maps = codes_to_maps(np.arange(self.n_maps), n_lanes)
+
+    def to_map(self, code:int) -> np.ndarray:
+        return self.maps[code] if self.use_tables else codes_to_maps(code, self.n_lanes)
+
+    def sample(self, last_code:int|None, rng:np.random.Generator) -> int:
+        """Args:
+            last_code (int | None): code of the previous obstacle's map, None if there is none
+            rng (np.random.Generator): random number generator
+        Returns:
+            int: code of the new map
+        """
+        if not self.use_tables:
+            return int(self._sample_bitmasks(np.array([-1 if last_code is None else last_code]), rng)[0])
+        row = self.n_maps if last_code is None else last_code
+        u = rng.random() * self.n_maps
+        i = int(u)
+        return i if u - i < self.prob[row, i] else int(self.alias[row, i])
+
+    def sample_batch(self, last_codes:np.ndarray, rng:np.random.Generator) -> np.ndarray:
+        """Vectorized sample for a batch of levels.
+        Args:
+            last_codes (np.ndarray): (k,) codes of the previous obstacles' maps, -1 where there is none
+            rng (np.random.Generator): random number generator
+        Returns:
+            np.ndarray: (k,) codes of the new maps
+        """
+        if not self.use_tables:
+            return self._sample_bitmasks(last_codes, rng)
+        rows = np.where(last_codes < 0, self.n_maps, last_codes)
+        u = rng.random(rows.shape[0]) * self.n_maps
+        i = u.astype(np.int64)
+        return np.where(u - i < self.prob[rows, i], i, self.alias[rows, i])
+
+    def _sample_bitmasks(self, last_codes:np.ndarray, rng:np.random.Generator) -> np.ndarray:
+        # fallback for many lanes: draw uniform bitmasks and accept them with the rules' probability
+        codes = np.zeros(last_codes.shape[0], dtype=np.int64)
+        todo = np.arange(last_codes.shape[0])
+        while todo.shape[0] > 0:
+            candidates = rng.integers(0, self.n_maps, size=todo.shape[0], dtype=np.int64)
+            accepted = rng.random(todo.shape[0]) < acceptance(candidates, last_codes[todo], self.n_lanes)
+            codes[todo[accepted]] = candidates[accepted]
+            todo = todo[~accepted]
+        return codes
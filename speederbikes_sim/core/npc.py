@@ -0,0 +1,182 @@
+import numpy as np
+from functools import lru_cache
+
+from speederbikes_sim.core.raster import circle_mask
+
+# NPC bikes ride on the same road as the agent, slower than the level scrolls, so in window coordinates they drift
+# down towards and past the agent. They live on a strip of span pixels above the window and wrap around to its top
+# once they left the window at the bottom or crashed into an obstacle.
+# x is the center relative to the road's left border (like part limits, see core.collision), y the center in window
+# coordinates. Collisions are only checked for the NPCs in the window, through a grid of lane x row buckets.
+
+# NPCs are drawn like the agent, a circle on a square, in their own colors
+NPC_COLOR = (220, 90, 40)
+NPC_BG_COLOR = (22, 22, 22)
+
+@lru_cache(maxsize=8)
+def npc_sprite(size:int, color:tuple=NPC_COLOR, background_color:tuple=NPC_BG_COLOR) -> np.ndarray:
+    """Returns:
+        np.ndarray: (2 * size, 2 * size, 3) read-only uint8 image of an NPC, same as pygame draws it (see objects.npc)
+    """
+    sprite = np.empty((2 * size, 2 * size, 3), dtype=np.uint8)
+    sprite[:] = background_color
+    sprite[circle_mask(size)] = color
+    sprite.flags.writeable = False
+    return sprite
+
+class NpcTraffic():
+    def __init__(self, n_npcs:int, window_size:int, lane_width:float, part_limits:np.ndarray,
+                 rng:np.random.Generator|None=None, size:int=10, lat_speed:float=200., drift:tuple=(0.2, 0.8),
+                 spacing:float=60., lookahead:float=200., row_height:float=64.) -> None:
+        """Args:
+            n_npcs (int): number of NPCs
+            window_size (int): size of the (square) window in pixels
+            lane_width (float): distance between the road borders
+            part_limits (np.ndarray): (n_lanes, 2) left and right limits of the lanes
+            rng (np.random.Generator | None, optional): random number generator for spawning. Defaults to None.
+            size (int, optional): radius of an NPC. Defaults to 10.
+            lat_speed (float, optional): sideways speed. Defaults to 200..
+            drift (tuple, optional): range of the speeds at which NPCs drift down the window, as fractions of the
+                level speed. Defaults to (0.2, 0.8).
+            spacing (float, optional): mean vertical distance between NPCs, sets the length of the strip.
+                Defaults to 60..
+            lookahead (float, optional): distance at which NPCs start to steer around an obstacle. Defaults to 200..
+            row_height (float, optional): height of the buckets of the spatial index. Defaults to 64..
+        """
+        self.n_npcs = n_npcs
+        self.window_size = window_size
+        self.lane_width = lane_width
+        self.part_limits = np.asarray(part_limits)
+        self.n_lanes = self.part_limits.shape[0]
+        self.lane_center = self.part_limits.mean(axis=1)
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.size = size
+        self.lat_speed = lat_speed
+        self.drift = drift
+        self.lookahead = lookahead
+        self.row_height = row_height
+        self.n_rows = int(np.ceil(window_size / row_height))
+
+        self.span = max(float(window_size), n_npcs * spacing)
+        self.x = np.zeros(n_npcs)
+        self.y = np.zeros(n_npcs)
+        self.vy = np.zeros(n_npcs)
+        self.target = np.zeros(n_npcs, dtype=int)
+
+        # spatial index of the NPCs in the window, rebuilt by update()
+        self._ids = np.zeros(0, dtype=int)
+        self._starts = np.zeros(self.n_rows * self.n_lanes + 1, dtype=int)
+
+    def reset(self, speed:float, rng:np.random.Generator|None=None) -> None:
+        """Spread all NPCs over the strip above the window.
+        Args:
+            speed (float): level speed
+            rng (np.random.Generator | None, optional): new random number generator. Defaults to None (keep it).
+        """
+        self.rng = self.rng if rng is None else rng
+        self._spawn(np.arange(self.n_npcs), speed, -self.span + self.rng.uniform(0, self.span, self.n_npcs))
+        self._build_index()
+
+    def _spawn(self, idx:np.ndarray, speed:float, y:np.ndarray) -> None:
+        self.target[idx] = self.rng.integers(0, self.n_lanes, idx.shape[0])
+        self.x[idx] = self.lane_center[self.target[idx]]
+        self.y[idx] = y
+        self.vy[idx] = speed * self.rng.uniform(*self.drift, idx.shape[0])
+
+    def _lane_of(self, x:np.ndarray) -> np.ndarray:
+        return np.clip(np.searchsorted(self.part_limits[:, 0], x, side="right") - 1, 0, self.n_lanes - 1)
+
+    def _build_index(self) -> None:
+        # bucket the NPCs in the window by the row and lane of their center, NPCs of a bucket are contiguous in _ids
+        ids = np.flatnonzero((self.y + self.size >= 0) & (self.y - self.size < self.window_size))
+        rows = np.clip((self.y[ids] // self.row_height).astype(int), 0, self.n_rows - 1)
+        cells = rows * self.n_lanes + self._lane_of(self.x[ids])
+        order = np.argsort(cells, kind="stable")
+        self._ids = ids[order]
+        self._starts = np.searchsorted(cells[order], np.arange(self.n_rows * self.n_lanes + 1))
+
+    def query(self, top:float, bottom:float, left:float, right:float) -> np.ndarray:
+        """NPCs in the window whose bucket may overlap a box, a superset of those that actually do.
+        Returns:
+            np.ndarray: indices of the NPCs
+        """
+        r0 = max(int((top - self.size) // self.row_height), 0)
+        r1 = min(int((bottom + self.size) // self.row_height), self.n_rows - 1)
+        if r0 > r1:
+            return self._ids[:0]
+        l0, l1 = self._lane_of(np.array([left - self.size, right + self.size]))
+        cells = (np.arange(r0, r1 + 1)[:, None] * self.n_lanes + np.arange(l0, l1 + 1)).reshape(-1)
+        return np.concatenate([self._ids[self._starts[c]:self._starts[c + 1]] for c in cells])
+
+    def update(self, dt:float, speed:float, obstacle_y:np.ndarray, obstacle_map:np.ndarray,
+               obstacle_height:float) -> None:
+        """Steer around the obstacles ahead, move, and respawn NPCs that crashed or left the window.
+        Args:
+            dt (float): duration of the frame
+            speed (float): level speed
+            obstacle_y (np.ndarray): (n,) top y of the obstacles
+            obstacle_map (np.ndarray): (n, n_lanes) boolean lane maps
+            obstacle_height (float): height of the obstacles
+        """
+        # ====== the closest obstacle ahead within lookahead decides the lane, NPCs keep their lane if it's free
+        if obstacle_y.shape[0] > 0:
+            gap = (self.y[:, None] - self.size) - (obstacle_y + obstacle_height)
+            gap = np.where((gap >= 0) & (gap < self.lookahead), gap, np.inf)
+            ahead = gap.argmin(axis=1)
+            steer = np.flatnonzero(np.isfinite(gap[np.arange(self.n_npcs), ahead]))
+            maps = obstacle_map[ahead[steer]]
+            blocked = maps[np.arange(steer.shape[0]), self.target[steer]]
+            steer, maps = steer[blocked], maps[blocked]
+            distance = np.where(maps, np.inf, np.abs(self.lane_center - self.x[steer, None]))
+            self.target[steer] = distance.argmin(axis=1)
+
+        step = self.lat_speed * dt
+        self.x += np.clip(self.lane_center[self.target] - self.x, -step, step)
+        np.clip(self.x, self.size, self.lane_width - self.size, out=self.x)
+        self.y += self.vy * dt
+
+        # ====== NPCs that left the window wrap around to the top of the strip
+        gone = np.flatnonzero(self.y - self.size > self.window_size)
+        if gone.shape[0] > 0:
+            self._spawn(gone, speed, self.y[gone] - self.span - self.window_size - self.size)
+
+        self._build_index()
+
+        # ====== crashes into obstacles
+        crashed = []
+        for y, map in zip(obstacle_y, obstacle_map):
+            candidates = self.query(y, y + obstacle_height, 0, self.lane_width)
+            if candidates.shape[0] == 0:
+                continue
+            x, ny = self.x[candidates, None], self.y[candidates, None]
+            hit = ((ny - self.size <= y + obstacle_height) & (ny + self.size >= y)
+                   & (x + self.size >= self.part_limits[:, 0]) & (x - self.size <= self.part_limits[:, 1]) & map)
+            crashed.append(candidates[hit.any(axis=1)])
+        crashed = np.concatenate(crashed) if crashed else self._ids[:0]
+        if crashed.shape[0] > 0:
+            self._spawn(crashed, speed, np.full(crashed.shape[0], -self.span))
+            self._build_index()
+
+    def collision(self, agent_x:float, agent_y:float, agent_size:float) -> int | None:
+        """Checks if the agent's box overlaps with an NPC's.
+        Args:
+            agent_x (float): agent center x relative to the road's left border
+            agent_y (float): agent center y
+            agent_size (float): agent radius
+        Returns:
+            int | None: index of the hit NPC, None if there was no collision
+        """
+        candidates = self.query(agent_y - agent_size, agent_y + agent_size, agent_x - agent_size, agent_x + agent_size)
+        reach = self.size + agent_size
+        hit = candidates[(np.abs(self.x[candidates] - agent_x) <= reach) & (np.abs(self.y[candidates] - agent_y) <= reach)]
+        return int(hit[0]) if hit.shape[0] > 0 else None
+
+    def nearest(self, agent_x:float, agent_y:float, k:int) -> np.ndarray:
+        """Indices of the k NPCs in the window closest to the agent, closest first. Fewer if there are less in the window.
+        """
+        ids = self._ids
+        if ids.shape[0] > k:
+            distance = np.hypot(self.x[ids] - agent_x, self.y[ids] - agent_y)
+            ids = ids[np.argpartition(distance, k)[:k]]
+        distance = np.hypot(self.x[ids] - agent_x, self.y[ids] - agent_y)
+        return ids[np.argsort(distance, kind="stable")]
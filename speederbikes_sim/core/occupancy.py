@@ -0,0 +1,66 @@
+import numpy as np
+
+# Lane occupancy grid observations: the window is cut into n_rows horizontal bands, a cell (row, lane) is set if a
+# blocked part of that lane overlaps the band. One more row marks the lanes the agent's box overlaps.
+# The (n_rows + 1, n_lanes) grid is packed into bits, row by row, lane by lane (see np.packbits).
+# Works for a single level and for a batch of levels through broadcasting, like core.collision.
+
+class OccupancyGrid():
+    def __init__(self, window_size:int, n_rows:int=32) -> None:
+        """Args:
+            window_size (int): size of the (square) window in pixels
+            n_rows (int, optional): number of bands the window is cut into. Defaults to 32.
+        """
+        assert n_rows >= 1
+        self.window_size = window_size
+        self.n_rows = n_rows
+        # top and bottom y of every band
+        edges = np.arange(n_rows + 1) * (window_size / n_rows)
+        self.row_top = edges[:-1]
+        self.row_bottom = edges[1:]
+
+    def n_bytes(self, n_lanes:int) -> int:
+        """Returns:
+            int: size of a packed grid
+        """
+        return -(-(self.n_rows + 1) * n_lanes // 8)
+
+    def grid(self, agent_x, agent_size:float, obstacle_y:np.ndarray, obstacle_map:np.ndarray, part_limits:np.ndarray,
+             obstacle_height:float, in_use:np.ndarray|None=None) -> np.ndarray:
+        """Args:
+            agent_x (float | np.ndarray): agent center x relative to the road's left border, scalar or (N,)
+            agent_size (float): agent radius
+            obstacle_y (np.ndarray): top y of the obstacles, (n,) or (N, n)
+            obstacle_map (np.ndarray): boolean lane maps, (n, n_lanes) or (N, n, n_lanes)
+            part_limits (np.ndarray): (n_lanes, 2) left and right limits of the parts
+            obstacle_height (float): height of the obstacles
+            in_use (np.ndarray | None, optional): mask of valid obstacles, same shape as obstacle_y. Defaults to None.
+        Returns:
+            np.ndarray: boolean grid, (n_rows + 1, n_lanes) or (N, n_rows + 1, n_lanes), the agent in the last row
+        """
+        obstacle_y = np.asarray(obstacle_y, dtype=float)
+        # (..., n, n_rows) which bands every obstacle overlaps
+        overlap = (obstacle_y[..., None] < self.row_bottom) & (obstacle_y[..., None] + obstacle_height >= self.row_top)
+        if in_use is not None:
+            overlap &= in_use[..., None]
+        rows = (overlap[..., :, :, None] & obstacle_map[..., :, None, :]).any(axis=-3)
+
+        agent_x = np.asarray(agent_x, dtype=float)[..., None]
+        agent = (agent_x + agent_size >= part_limits[:, 0]) & (agent_x - agent_size <= part_limits[:, 1])
+        return np.concatenate([rows, agent[..., None, :]], axis=-2)
+
+    def encode(self, *args, **kwargs) -> np.ndarray:
+        """Packed grid, same arguments as grid.
+        Returns:
+            np.ndarray: (n_bytes,) or (N, n_bytes) uint8
+        """
+        grid = self.grid(*args, **kwargs)
+        return np.packbits(grid.reshape(grid.shape[:-2] + (-1,)), axis=-1)
+
+    def unpack(self, packed:np.ndarray, n_lanes:int) -> np.ndarray:
+        """Returns:
+            np.ndarray: boolean grid of a packed one, (..., n_rows + 1, n_lanes)
+        """
+        n = (self.n_rows + 1) * n_lanes
+        bits = np.unpackbits(packed, axis=-1, count=n).astype(bool)
+        return bits.reshape(packed.shape[:-1] + (self.n_rows + 1, n_lanes))
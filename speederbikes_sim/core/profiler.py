@@ -0,0 +1,93 @@
+import time
+import numpy as np
+
+class StepProfiler():
+    def __init__(self, window:int=1024) -> None:
+        """Collects per-phase timings of env steps. Phases are timed by the caller with lap() (or measured with
+        time.perf_counter_ns and passed to add()) and added up per step. The last window steps are kept per phase for percentiles, totals cover all steps.
+        Args:
+            window (int, optional): number of steps in the rolling window. Defaults to 1024.
+        """
+        assert window > 0
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        self.n_steps = 0
+        # phase -> (window,) durations in ns, ring buffer indexed by step
+        self._samples:dict = {}
+        self._totals:dict = {}
+        self._current:dict = {}
+        self._step_start:int = None
+        self._last:int = None
+
+    def start(self) -> None:
+        """Start timing a step, its total time is recorded as phase 'step' by end_step."""
+        self._step_start = self._last = time.perf_counter_ns()
+
+    def lap(self, phase:str) -> None:
+        """Add the time since the last lap (or start) to a phase of the current step."""
+        now = time.perf_counter_ns()
+        self._current[phase] = self._current.get(phase, 0) + now - self._last
+        self._last = now
+
+    def add(self, phase:str, ns:int) -> None:
+        """Add time to a phase of the current step."""
+        self._current[phase] = self._current.get(phase, 0) + ns
+
+    def end_step(self) -> dict:
+        """Close the current step.
+        Returns:
+            dict: phase -> seconds spent in this step
+        """
+        if self._step_start is not None:
+            self.add("step", time.perf_counter_ns() - self._step_start)
+            self._step_start = None
+        slot = self.n_steps % self.window
+        for phase, ns in self._current.items():
+            if phase not in self._samples:
+                self._samples[phase] = np.zeros(self.window, dtype=np.int64)
+                self._totals[phase] = 0
+            self._totals[phase] += ns
+        # phases missing in this step took no time
+        for phase, samples in self._samples.items():
+            samples[slot] = self._current.get(phase, 0)
+        self.n_steps += 1
+
+        breakdown = {phase: ns * 1e-9 for phase, ns in self._current.items()}
+        self._current = {}
+        return breakdown
+
+    def stats(self) -> dict:
+        """Aggregate report.
+        Returns:
+            dict: "n_steps" and per phase: total seconds and share of all steps, plus mean, percentiles and max
+                in microseconds over the rolling window
+        """
+        n = min(self.n_steps, self.window)
+        total_step = self._totals.get("step", sum(self._totals.values()))
+        phases = {}
+        for phase, samples in self._samples.items():
+            recent = samples[:n] * 1e-3
+            p50, p90, p99 = np.percentile(recent, [50, 90, 99]) if n > 0 else (0., 0., 0.)
+            phases[phase] = {
+                "total_s": self._totals[phase] * 1e-9,
+                "share": self._totals[phase] / total_step if total_step > 0 else 0.,
+                "mean_us": float(recent.mean()) if n > 0 else 0.,
+                "p50_us": float(p50),
+                "p90_us": float(p90),
+                "p99_us": float(p99),
+                "max_us": float(recent.max()) if n > 0 else 0.,
+            }
+        return {"n_steps": self.n_steps, "window": n, "phases": phases}
+
+class NullProfiler():
+    """Stands in for StepProfiler when profiling is disabled, the timing hooks do nothing."""
+    def start(self) -> None:
+        pass
+
+    def lap(self, phase:str) -> None:
+        pass
+
+    def end_step(self) -> None:
+        return None
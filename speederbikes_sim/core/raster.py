@@ -0,0 +1,227 @@
+import numpy as np
+
+# Pure NumPy replacement for the pygame drawing of a frame. The scene is only a background, the road with its
+# border lines, obstacle parts and the agent, so each of them is painted straight into a (H, W, 3) uint8 array.
+# Every helper below reproduces what the corresponding pygame call puts on screen, pixel by pixel.
+
+def pg_round(value) -> np.ndarray:
+    """Round like pygame does when a float is assigned to a Rect attribute (halves away from zero).
+    Args:
+        value (float | np.ndarray): coordinates
+    Returns:
+        np.ndarray: integer coordinates
+    """
+    value = np.asarray(value, dtype=float)
+    whole = np.trunc(value)
+    return (whole + np.sign(value) * (np.abs(value - whole) >= 0.5)).astype(int)
+
+def thick_line_span(center:int, width:int) -> tuple[int, int]:
+    """First and last pixel across a horizontal or vertical pygame.draw.line of the given width.
+    Args:
+        center (int): coordinate of the line
+        width (int): line width
+    Returns:
+        tuple[int, int]: inclusive range
+    """
+    if width <= 1:
+        return center, center
+    return center - width // 2 + (1 - width % 2), center + width // 2
+
+def circle_mask(radius:int) -> np.ndarray:
+    """Pixels set by pygame.draw.circle(surface, color, (radius, radius), radius) on a (2r, 2r) surface.
+    Same midpoint algorithm as pygame's filled circle.
+    Args:
+        radius (int): radius of the circle
+    Returns:
+        np.ndarray: (2 * radius, 2 * radius) boolean mask, indexed [y, x]
+    """
+    size = 2 * radius
+    mask = np.zeros((size, size), dtype=bool)
+    def _hline(x1:int, y:int, x2:int) -> None:
+        if 0 <= y < size:
+            mask[y, max(x1, 0):min(x2, size - 1) + 1] = True
+
+    f = 1 - radius
+    ddF_x = 0
+    ddF_y = -2 * radius
+    x = 0
+    y = radius
+    while x < y:
+        if f >= 0:
+            y -= 1
+            ddF_y += 2
+            f += ddF_y
+        x += 1
+        ddF_x += 2
+        f += ddF_x + 1
+        if f >= 0:
+            _hline(radius - x, radius + y - 1, radius + x - 1)
+            _hline(radius - x, radius - y, radius + x - 1)
+        _hline(radius - y, radius + x - 1, radius + y - 1)
+        _hline(radius - y, radius - x, radius + y - 1)
+    return mask
+
+class Rasterizer():
+    def __init__(self, window_size:int, road_width:int, n_lanes:int, agt_size:int=15, agent_y:int|None=None,
+                 bg_color:tuple=(155, 155, 155), road_color:tuple=(22, 22, 22), line_color:tuple=(222, 222, 222),
+                 obstacle_color:tuple=(222, 222, 222), agent_color:tuple=(50, 55, 220),
+                 agent_bg_color:tuple=(0, 155, 155)) -> None:
+        """Paints frames of the given level geometry into uint8 arrays, identical to SpeederBikesEnv's pygame frames.
+        The default colors are the ones of Road, Obstacle, Agent and SpeederBikesEnv.
+        Args:
+            window_size (int): size of the (square) window in pixels
+            road_width (int): width of the road incl. border lines
+            n_lanes (int): number of lanes
+            agt_size (int, optional): radius of the agent. Defaults to 15.
+            agent_y (int | None, optional): agent center y. Defaults to None (80 % of the window).
+        """
+        self.window_size = window_size
+        self.road_width = road_width
+        self.n_lanes = n_lanes
+        self.agt_size = agt_size
+        self.agent_y = int(window_size * 0.8) if agent_y is None else agent_y
+
+        self.line_width = 3
+        self.lane_width = road_width - self.line_width * 2
+        self.obstacle_height = 5
+        # the level surface is centered on the window, the obstacles start after the left border line
+        self.level_x = int(pg_round((window_size - road_width) / 2))
+        self.obstacle_x = self.level_x + self.line_width
+
+        self.obstacle_color = np.array(obstacle_color, dtype=np.uint8)
+        self.road_color = np.array(road_color, dtype=np.uint8)
+
+        # ====== static background: window background, road and border lines
+        self.background = np.empty((window_size, window_size, 3), dtype=np.uint8)
+        self.background[:] = bg_color
+        road = np.empty((window_size, road_width, 3), dtype=np.uint8)
+        road[:] = road_color
+        for center in [1, road_width - self.line_width + 1]:
+            first, last = thick_line_span(center, self.line_width)
+            road[:, max(first, 0):min(last, road_width - 1) + 1] = line_color
+        x0, x1 = max(self.level_x, 0), min(self.level_x + road_width, window_size)
+        self.background[:, x0:x1] = road[:, x0 - self.level_x:x1 - self.level_x]
+
+        # ====== obstacles: every obstacle surface is lane_width x obstacle_height, filled with the road color.
+        # Its parts are drawn as a line of width obstacle_height at the obstacle's entry y (0), which leaves
+        # only the upper rows painted.
+        part_width = int(round(self.lane_width / self.n_lanes))
+        part_limits = [[part_width * i, part_width * (i+1) - 1] for i in range(self.n_lanes)]
+        part_limits[-1][1] = self.lane_width
+        self._column_lane = np.full(self.lane_width, -1)
+        for i, (left, right) in enumerate(part_limits):
+            self._column_lane[max(left, 0):min(right, self.lane_width - 1) + 1] = i
+        first, last = thick_line_span(0, self.obstacle_height)
+        self._part_rows = np.zeros(self.obstacle_height, dtype=bool)
+        self._part_rows[max(first, 0):last + 1] = True
+
+        # ====== agent sprite: square surface with a circle in it
+        self.agent_sprite = np.empty((2 * agt_size, 2 * agt_size, 3), dtype=np.uint8)
+        self.agent_sprite[:] = agent_bg_color
+        self.agent_sprite[circle_mask(agt_size)] = agent_color
+
+    def obstacle_rows(self, maps:np.ndarray) -> np.ndarray:
+        """Pixels of the painted rows of obstacles.
+        Args:
+            maps (np.ndarray): (k, n_lanes) boolean lane maps
+        Returns:
+            np.ndarray: (k, lane_width, 3) uint8
+        """
+        painted = maps[:, np.maximum(self._column_lane, 0)] & (self._column_lane >= 0)
+        return np.where(painted[..., None], self.obstacle_color, self.road_color)
+
+    def render_batch(self, agent_x:np.ndarray, obstacle_y:np.ndarray, obstacle_map:np.ndarray,
+                     in_use:np.ndarray|None=None, out:np.ndarray|None=None) -> np.ndarray:
+        """Paint one frame per level.
+        Args:
+            agent_x (np.ndarray): (N,) agent center x in window coordinates
+            obstacle_y (np.ndarray): (N, n) obstacle top y
+            obstacle_map (np.ndarray): (N, n, n_lanes) boolean lane maps
+            in_use (np.ndarray | None, optional): (N, n) mask of the obstacles to draw. Defaults to None (all).
+            out (np.ndarray | None, optional): (N, H, W, 3) uint8 array to paint into. Defaults to None.
+        Returns:
+            np.ndarray: (N, H, W, 3) uint8 frames
+        """
+        n_envs = agent_x.shape[0]
+        if out is None:
+            out = np.empty((n_envs, self.window_size, self.window_size, 3), dtype=np.uint8)
+        out[:] = self.background
+
+        # ====== obstacles, clipped to the window rows
+        env, slot = np.nonzero(in_use) if in_use is not None else np.nonzero(np.ones(obstacle_y.shape, dtype=bool))
+        if env.shape[0] > 0:
+            top = pg_round(obstacle_y[env, slot])
+            rows = top[:, None] + np.arange(self.obstacle_height)
+            k, r = np.nonzero((rows >= 0) & (rows < self.window_size))
+            painted = self.obstacle_rows(obstacle_map[env, slot])
+            pixels = np.where(self._part_rows[r][:, None, None], painted[k], self.road_color)
+            out[env[k], rows[k, r], self.obstacle_x:self.obstacle_x + self.lane_width] = pixels
+
+        # ====== agent. It is kept on the road, so it never leaves the window.
+        size = 2 * self.agt_size
+        left = pg_round(agent_x - self.agt_size)
+        rows = self.agent_y - self.agt_size + np.arange(size)
+        out[np.arange(n_envs)[:, None, None], rows[None, :, None], left[:, None, None] + np.arange(size)] = self.agent_sprite
+
+        return out
+
+    def paint_sprites(self, out:np.ndarray, sprite:np.ndarray, left:np.ndarray, top:np.ndarray) -> np.ndarray:
+        """Paint copies of a sprite onto a frame, clipped to the window like pygame's blit.
+        Args:
+            out (np.ndarray): (H, W, 3) uint8 frame
+            sprite (np.ndarray): (h, w, 3) uint8 sprite
+            left (np.ndarray): (k,) integer x of the sprites' left edges
+            top (np.ndarray): (k,) integer y of the sprites' top edges
+        Returns:
+            np.ndarray: out
+        """
+        h, w = sprite.shape[:2]
+        for x, y in zip(left.tolist(), top.tolist()):
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + w, self.window_size), min(y + h, self.window_size)
+            if x0 < x1 and y0 < y1:
+                out[y0:y1, x0:x1] = sprite[y0 - y:y1 - y, x0 - x:x1 - x]
+        return out
+
+    def render(self, agent_x:float, obstacle_y:np.ndarray, obstacle_map:np.ndarray, out:np.ndarray|None=None) -> np.ndarray:
+        """Paint a single frame.
+        Args:
+            agent_x (float): agent center x in window coordinates
+            obstacle_y (np.ndarray): (n,) obstacle top y
+            obstacle_map (np.ndarray): (n, n_lanes) boolean lane maps
+            out (np.ndarray | None, optional): (H, W, 3) uint8 array to paint into. Defaults to None.
+        Returns:
+            np.ndarray: (H, W, 3) uint8 frame
+        """
+        if out is None:
+            out = np.empty((self.window_size, self.window_size, 3), dtype=np.uint8)
+        self.render_batch(np.array([agent_x], dtype=float), obstacle_y[None], np.asarray(obstacle_map, dtype=bool)[None],
+                          out=out[None])
+        return out
+
+class SceneRasterizer():
+    def __init__(self, window_size:int, bg_color:tuple=(155, 155, 155)) -> None:
+        """Paints scenes, the few arrays SpeederBikesEnv hands to its viewer and recorder, for any road geometry.
+        A scene is (road_width, n_lanes, agent_x, obstacle_y, obstacle_map, npcs), npcs is None or
+        (size, left, top) of the visible NPC sprites.
+        Args:
+            window_size (int): size of the (square) window in pixels
+            bg_color (tuple, optional): background color. Defaults to (155, 155, 155).
+        """
+        self.window_size = window_size
+        self.bg_color = bg_color
+        self._rasterizer:Rasterizer = None
+
+    def render(self, scene:tuple, out:np.ndarray|None=None) -> np.ndarray:
+        """Returns:
+            np.ndarray: (H, W, 3) uint8 frame of the scene
+        """
+        road_width, n_lanes, agent_x, obstacle_y, obstacle_map, npcs = scene
+        if self._rasterizer is None or (self._rasterizer.road_width, self._rasterizer.n_lanes) != (road_width, n_lanes):
+            self._rasterizer = Rasterizer(self.window_size, road_width, n_lanes, bg_color=self.bg_color)
+        out = self._rasterizer.render(agent_x, obstacle_y, obstacle_map, out=out)
+        if npcs is not None:
+            from speederbikes_sim.core.npc import npc_sprite
+            size, left, top = npcs
+            self._rasterizer.paint_sprites(out, npc_sprite(size), left, top)
+        return out
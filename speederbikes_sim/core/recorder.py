@@ -0,0 +1,165 @@
+import os
+import queue
+import threading
+import collections
+import numpy as np
+
+from speederbikes_sim.core.raster import SceneRasterizer
+
+# Video recording off the stepping thread. The env hands over scenes, the few arrays a frame is painted from (see
+# core.raster.SceneRasterizer), instead of frames. A writer thread paints every frame as it arrives and appends it
+# to the clip's (n_frames, H, W, 3) uint8 .npy file, the format TrajectoryReplay.export uses as well. The header
+# reserves room for any frame count and is rewritten with the actual one when the clip ends.
+# 'episode' mode records whole episodes. Scenes go through a bounded queue, stepping blocks once the writer falls
+# behind by max_queue scenes instead of piling them up in memory, the writer itself only holds one frame.
+# 'crash' mode keeps the last ring_size scenes of the episode in a ring and only queues them when it ends in a
+# collision. Episodes without a crash cost one tuple per step.
+
+# size of the .npy header of a clip, large enough for any frame count
+_HEADER_SIZE = 128
+
+def _npy_header(shape:tuple) -> bytes:
+    # version 1.0 header of a uint8 array, padded with spaces to _HEADER_SIZE bytes
+    header = repr({"descr": "|u1", "fortran_order": False, "shape": shape})
+    header = header.ljust(_HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + (_HEADER_SIZE - 10).to_bytes(2, "little") + header.encode("latin1")
+
+class _ClipWriter():
+    def __init__(self, path:str, frame_shape:tuple) -> None:
+        """Appends frames to a .npy file of unknown length."""
+        self.path = path
+        self.frame_shape = frame_shape
+        self.n_frames = 0
+        self._file = open(path, "wb")
+        self._file.write(_npy_header((0,) + frame_shape))
+
+    def write(self, frame:np.ndarray) -> None:
+        self._file.write(frame.tobytes())
+        self.n_frames += 1
+
+    def close(self) -> None:
+        self._file.seek(0)
+        self._file.write(_npy_header((self.n_frames,) + self.frame_shape))
+        self._file.close()
+
+class VideoRecorder():
+    def __init__(self, directory:str, window_size:int, mode:str="episode", ring_size:int=120, max_queue:int=256,
+                 bg_color:tuple=(155, 155, 155)) -> None:
+        """Starts the writer thread.
+        Args:
+            directory (str): folder for the clips, created if needed. Clips are named episode_<k>.npy or crash_<k>.npy
+                after the episode number k.
+            window_size (int): size of the (square) window in pixels
+            mode (str, optional): 'episode' or 'crash'. Defaults to "episode".
+            ring_size (int, optional): number of frames of a crash clip. Defaults to 120, two seconds.
+            max_queue (int, optional): scenes the writer may fall behind before add() blocks. Defaults to 256.
+            bg_color (tuple, optional): background color. Defaults to (155, 155, 155).
+        """
+        assert mode in ["episode", "crash"]
+        assert ring_size >= 1 and max_queue >= 1
+        self.directory = directory
+        self.window_size = window_size
+        self.mode = mode
+        self.ring_size = ring_size
+        os.makedirs(directory, exist_ok=True)
+
+        self._rasterizer = SceneRasterizer(window_size, bg_color)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._ring = collections.deque(maxlen=ring_size)
+        self._episode = -1
+        self._error:BaseException = None
+
+        # paths of the written clips, in order
+        self.clips:list = []
+        # number of times add() had to wait for the writer
+        self.n_blocked = 0
+
+        self._thread = threading.Thread(target=self._run, name="speederbikes-recorder", daemon=True)
+        self._thread.start()
+
+    def _put(self, item:tuple) -> None:
+        if not self._thread.is_alive():
+            raise RuntimeError("recorder is closed")
+        if self._error is not None:
+            raise RuntimeError("video writer failed") from self._error
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.n_blocked += 1
+            self._queue.put(item)
+
+    def begin_episode(self) -> None:
+        """Start a new clip. An unfinished episode clip is written first."""
+        self.end_episode(crashed=False)
+        self._episode += 1
+        if self.mode == "episode":
+            self._put(("begin", os.path.join(self.directory, f"episode_{self._episode:06d}.npy")))
+
+    def add(self, scene:tuple) -> None:
+        """Record the frame of a scene. The arrays must not be modified afterwards."""
+        if self.mode == "crash":
+            self._ring.append(scene)
+        else:
+            self._put(("frame", scene))
+
+    def end_episode(self, crashed:bool) -> None:
+        """Finish the current clip. In 'crash' mode it is only written if crashed, else dropped."""
+        if self.mode == "crash":
+            if crashed and self._ring:
+                self._put(("begin", os.path.join(self.directory, f"crash_{self._episode:06d}.npy")))
+                for scene in self._ring:
+                    self._put(("frame", scene))
+                self._put(("end", None))
+            self._ring.clear()
+        elif self._episode >= 0:
+            self._put(("end", None))
+
+    def _finish(self, writer:_ClipWriter) -> None:
+        writer.close()
+        if writer.n_frames > 0:
+            self.clips.append(writer.path)
+        else:
+            os.remove(writer.path)
+
+    def _run(self) -> None:
+        frame = np.zeros((self.window_size, self.window_size, 3), dtype=np.uint8)
+        writer:_ClipWriter = None
+        while True:
+            command, data = self._queue.get()
+            try:
+                if command == "begin":
+                    if writer is not None:
+                        self._finish(writer)
+                    writer = _ClipWriter(data, frame.shape)
+                elif command == "frame" and writer is not None:
+                    writer.write(self._rasterizer.render(data, out=frame))
+                elif command == "end" and writer is not None:
+                    self._finish(writer)
+                    writer = None
+                elif command == "close":
+                    if writer is not None:
+                        self._finish(writer)
+                    return
+            except BaseException as error:
+                self._error = error
+                writer = None
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until everything queued so far is written."""
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("video writer failed") from self._error
+
+    def close(self) -> None:
+        """Write the open clip and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self.end_episode(crashed=False)
+        finally:
+            self._queue.put(("close", None))
+            self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("video writer failed") from self._error
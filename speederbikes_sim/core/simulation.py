@@ -0,0 +1,314 @@
+import numpy as np
+
+from speederbikes_sim.core.maps import MapSampler, maps_to_codes
+from speederbikes_sim.core.state import MAX_OBSTACLES, empty_state, as_state, pack_rng, unpack_rng
+from speederbikes_sim.core.collision import band_mask, collision_mask, find_collision
+from speederbikes_sim.core.tape import LevelTape
+
+class Simulation():
+    def __init__(self, window_size:int, n_lanes:int=5, speed:float=200., road_width:int=350,
+                 agt_speed:float=200., agt_size:int=15, rng:np.random.Generator|None=None,
+                 tape:LevelTape|None=None, tape_offset:int=0) -> None:
+        """Headless game logic. Holds the same state as Level, Road, Obstacle and Agent,
+        but in flat NumPy arrays and without any pygame objects.
+        Positions, update order and collision rules are identical to the pygame objects.
+        Args:
+            window_size (int): size of the (square) window in pixels
+            n_lanes (int, optional): number of lanes. Defaults to 5.
+            speed (float, optional): obstacle speed. Defaults to 200..
+            road_width (int, optional): width of the road incl. border lines. Defaults to 350.
+            agt_speed (float, optional): agent speed. Defaults to 200..
+            agt_size (int, optional): radius of the agent. Defaults to 15.
+            rng (np.random.Generator | None, optional): random number generator for obstacle maps. Defaults to None.
+            tape (LevelTape | None, optional): play obstacles back from this tape instead of sampling them,
+                see core.tape. Defaults to None.
+            tape_offset (int, optional): tape position of the first obstacle. Defaults to 0.
+        """
+        self.n_lanes = n_lanes
+        self.speed = speed
+        self.width:int = road_width
+        self.height = window_size
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        # ======= road (see Road)
+        self.line_width = 3
+        self.lane_width = self.width - self.line_width * 2
+
+        # store left and right level limits (see Level)
+        self.left_border = (window_size - self.width) / 2 + self.line_width
+        self.right_border = window_size - (window_size - self.width) / 2 - self.line_width
+
+        # ======= obstacles (see Level and Obstacle)
+        self.tape = tape
+        self.tape_offset = tape_offset
+        if tape is not None and tape.n_lanes != n_lanes:
+            raise ValueError(f"tape of {tape.n_lanes} lanes for a level of {n_lanes} lanes")
+        self.inter_obstacle_distance = 220 if tape is None else tape.inter_obstacle_distance
+        # distance the newest obstacle travels before the next one spawns
+        self.spawn_distance:float = self.inter_obstacle_distance
+        self.obstacle_entry_y = 0
+        self.obstacle_exit_y = self.height
+        self.obstacle_height = 5
+
+        # all obstacles share the same part limits, relative to the road's left border
+        part_width = int(round(self.lane_width / self.n_lanes))
+        self.part_limits = np.array([[part_width * i, part_width * (i+1) - 1] for i in range(self.n_lanes)])
+        self.part_limits[-1][1] = self.lane_width
+
+        # obstacles are stored oldest first. Obstacles are at least inter_obstacle_distance apart,
+        # the capacity grows if ever needed.
+        capacity = int(np.ceil(self.height / self.inter_obstacle_distance)) + 2
+        self.obstacle_y = np.zeros(capacity, dtype=float)
+        self.obstacle_map = np.zeros((capacity, self.n_lanes), dtype=bool)
+        self.n_obstacles = 0
+        # number of obstacles created so far
+        self.n_spawned = 0
+        self.map_sampler = MapSampler(self.n_lanes)
+        # code of the newest obstacle's map, see core.maps
+        self.last_code:int|None = None
+
+        # ======= agent (see Agent)
+        self.agt_speed = agt_speed
+        self.agt_size = agt_size
+        self.agent_x = float(int(round(window_size / 2)))
+        self.agent_y = int(window_size * 0.8)
+
+        self._addObstacle()
+
+    @property
+    def obstacles_y(self) -> np.ndarray:
+        """y positions of all obstacles, oldest first (view)."""
+        return self.obstacle_y[:self.n_obstacles]
+
+    @property
+    def obstacles_map(self) -> np.ndarray:
+        """lane maps of all obstacles, oldest first (view)."""
+        return self.obstacle_map[:self.n_obstacles]
+
+    def reset(self, speed:float, agt_speed:float, rng:np.random.Generator, tape_offset:int=0) -> None:
+        """Start over in place with the same geometry, like a new Simulation.
+        Args:
+            speed (float): obstacle speed
+            agt_speed (float): agent speed
+            rng (np.random.Generator): random number generator for obstacle maps
+            tape_offset (int, optional): tape position of the first obstacle. Defaults to 0.
+        """
+        self.speed = speed
+        self.agt_speed = agt_speed
+        self.rng = rng
+        self.tape_offset = tape_offset
+        self.spawn_distance = self.inter_obstacle_distance
+        self.n_obstacles = 0
+        self.n_spawned = 0
+        self.last_code = None
+        self.agent_x = float(int(round(self.height / 2)))
+        self._addObstacle()
+
+    def _addObstacle(self, y:float|None=None) -> None:
+        if self.tape is None:
+            self.last_code = self.map_sampler.sample(self.last_code, self.rng)
+        else:
+            self.last_code = self.tape.code(self.tape_offset + self.n_spawned)
+            self.spawn_distance = self.tape.spawn_distance(self.tape_offset + self.n_spawned)
+        map = self.map_sampler.to_map(self.last_code)
+
+        if self.n_obstacles == self.obstacle_y.shape[0]:
+            self.obstacle_y = np.resize(self.obstacle_y, self.n_obstacles * 2)
+            self.obstacle_map = np.resize(self.obstacle_map, (self.n_obstacles * 2, self.n_lanes))
+
+        self.obstacle_y[self.n_obstacles] = self.obstacle_entry_y if y is None else y
+        self.obstacle_map[self.n_obstacles] = map
+        self.n_obstacles += 1
+        self.n_spawned += 1
+
+    def _deleteObstacle(self) -> None:
+        # drop the oldest obstacle
+        n = self.n_obstacles
+        self.obstacle_y[:n-1] = self.obstacle_y[1:n]
+        self.obstacle_map[:n-1] = self.obstacle_map[1:n]
+        self.n_obstacles -= 1
+
+    def update_agent(self, action:int, dt:float) -> None:
+        assert( action in [-1, 0, 1] )
+        self.agent_x = self.agent_x + action * self.agt_speed * dt
+
+        # limit movement to stay on the road
+        _left = (self.left_border + self.agt_size)
+        _right = (self.right_border - self.agt_size)
+        self.agent_x = np.clip(self.agent_x, _left, _right, dtype=float)
+
+    def update_level(self, dt:float) -> None:
+        # check if new obstacle should be created
+        if self.obstacle_y[self.n_obstacles - 1] >= self.spawn_distance:
+            self._addObstacle()
+
+        # check if old obstacle should be deleted
+        if self.obstacle_y[0] >= self.obstacle_exit_y:
+            self._deleteObstacle()
+
+        # update all obstacle positions
+        self.obstacles_y[:] += self.speed * dt
+
+    def update(self, action:int, dt:float) -> None:
+        """Same order as in SpeederBikesEnv.step: first the agent, then the level.
+        """
+        self.update_agent(action, dt)
+        self.update_level(dt)
+
+    def band_ids(self) -> frozenset:
+        """Returns:
+            frozenset: numbers (in order of creation) of the obstacles in the agent's band
+        """
+        first = self.n_spawned - self.n_obstacles
+        in_band = band_mask(self.agent_y, self.agt_size, self.obstacles_y, self.obstacle_height)
+        return frozenset((first + np.flatnonzero(in_band)).tolist())
+
+    def _at_border(self, x:float) -> bool:
+        return x == self.left_border + self.agt_size or x == self.right_border - self.agt_size
+
+    def advance(self, action:int, dt:float, max_frames:int) -> tuple[int, bool]:
+        """Repeat update(action, dt) until the next decision point: an obstacle enters or leaves the agent's band,
+        the agent reaches a road border or collides, or max_frames are done.
+        Between obstacles being added or removed all positions change linearly, so these stretches are computed at
+        once: positions of all frames are accumulated with the same floating point additions as frame by frame
+        updates and collisions are checked for all frames in the band. The result is identical to single updates.
+        Args:
+            action (int): -1, 0 or 1, held for all frames
+            dt (float): duration of one frame
+            max_frames (int): maximum number of frames
+        Returns:
+            tuple[int, bool]: number of frames done and whether the agent collided in the last one
+        """
+        assert( action in [-1, 0, 1] ) and max_frames > 0
+        left = self.left_border + self.agt_size
+        right = self.right_border - self.agt_size
+        a_t = self.agent_y - self.agt_size - self.obstacle_height # band limits for the obstacle's top
+        a_b = self.agent_y + self.agt_size
+        dy = self.speed * dt
+        dx = action * self.agt_speed * dt
+
+        n_frames = 0
+        while n_frames < max_frames:
+            n = self.n_obstacles
+            ys = self.obstacle_y[:n]
+            if ys[n-1] >= self.spawn_distance or ys[0] >= self.obstacle_exit_y:
+                # an obstacle is added or removed in this frame, do it the usual way
+                band = self.band_ids()
+                at_border = self._at_border(self.agent_x)
+                self.update(action, dt)
+                n_frames += 1
+                if self.collided():
+                    return n_frames, True
+                if self.band_ids() != band or (self._at_border(self.agent_x) and not at_border):
+                    return n_frames, False
+                continue
+
+            # estimate the frames to the next event, then find it exactly
+            to_border = (right - self.agent_x) if dx > 0 else (self.agent_x - left)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                to_band = np.where(ys < a_t, a_t - ys, np.where(ys <= a_b, a_b - ys + 1, np.inf)) / dy
+                estimate = min(to_band.min(), (self.spawn_distance - ys[n-1]) / dy, (self.obstacle_exit_y - ys[0]) / dy,
+                               to_border / abs(dx) if dx != 0 and to_border > 0 else np.inf)
+            n_chunk = int(min(max(np.ceil(estimate), 1) + 2, max_frames - n_frames))
+
+            # positions after 0..n_chunk frames
+            Y = np.empty((n_chunk + 1, n))
+            Y[0] = ys
+            Y[1:] = dy
+            np.add.accumulate(Y, axis=0, out=Y)
+            X = np.empty(n_chunk + 1)
+            X[0] = self.agent_x
+            X[1:] = dx
+            np.add.accumulate(X, out=X)
+            np.clip(X, left, right, out=X)
+
+            # the chunk has to end before the first frame that adds or removes an obstacle
+            structural = np.flatnonzero((Y[:-1, n-1] >= self.spawn_distance) | (Y[:-1, 0] >= self.obstacle_exit_y))
+            end = structural[0] if structural.shape[0] > 0 else n_chunk
+
+            in_band = band_mask(self.agent_y, self.agt_size, Y[:end+1], self.obstacle_height)
+            at_border = (X[:end+1] == left) | (X[:end+1] == right)
+            events = np.flatnonzero((in_band[1:] != in_band[:-1]).any(axis=1) | (at_border[1:] & ~at_border[:-1])) + 1
+            stop = events[0] if events.shape[0] > 0 else end
+
+            collided = False
+            frames = np.flatnonzero(in_band[1:stop+1].any(axis=1)) + 1
+            if frames.shape[0] > 0:
+                mask = collision_mask(X[frames] - self.left_border, self.agent_y, self.agt_size, Y[frames],
+                                      self.obstacles_map, self.part_limits, self.obstacle_height)
+                hits = np.flatnonzero(mask.any(axis=(1, 2)))
+                if hits.shape[0] > 0:
+                    stop, collided = frames[hits[0]], True
+
+            self.obstacle_y[:n] = Y[stop]
+            self.agent_x = np.float64(X[stop])
+            n_frames += int(stop)
+            if collided or events.shape[0] > 0 and stop == events[0]:
+                return n_frames, collided
+        return n_frames, False
+
+    def collision(self) -> tuple[int, int] | None:
+        """Checks if the agent collides with one of the obstacles, see core.collision.
+        Returns:
+            tuple[int, int] | None: index of the hit obstacle (oldest first) and lane, None if there was no collision
+        """
+        return find_collision(self.agent_x - self.left_border, self.agent_y, self.agt_size,
+                              self.obstacles_y, self.obstacles_map, self.part_limits, self.obstacle_height)
+
+    def collided(self) -> bool:
+        """Returns:
+            bool: whether there was a collision or not.
+        """
+        return self.collision() is not None
+
+    def get_state(self, out:np.ndarray|None=None) -> np.ndarray:
+        """Snapshot of the level, agent and RNG, see core.state.
+        Args:
+            out (np.ndarray | None, optional): record of STATE_DTYPE to write into. Defaults to None.
+        Returns:
+            np.ndarray: 0-d record of STATE_DTYPE
+        """
+        n = self.n_obstacles
+        if n > MAX_OBSTACLES:
+            raise ValueError(f"more than {MAX_OBSTACLES} obstacles can't be stored")
+        state = empty_state() if out is None else out
+        state["n_lanes"] = self.n_lanes
+        state["speed"] = self.speed
+        state["road_width"] = self.width
+        state["agt_speed"] = self.agt_speed
+        state["agent_x"] = self.agent_x
+        state["n_obstacles"] = n
+        state["n_spawned"] = self.n_spawned
+        state["last_code"] = -1 if self.last_code is None else self.last_code
+        state["obstacle_y"][:n] = self.obstacle_y[:n]
+        state["obstacle_y"][n:] = 0
+        state["obstacle_code"][:n] = maps_to_codes(self.obstacle_map[:n])
+        state["obstacle_code"][n:] = 0
+        pack_rng(self.rng, state["rng"])
+        state["tape_offset"] = self.tape_offset
+        return state
+
+    def set_state(self, state:np.ndarray|bytes) -> None:
+        """Restore a snapshot of get_state in place. Number of lanes and road width must be the same.
+        The RNG is restored in place as well.
+        """
+        state = as_state(state)
+        if (int(state["n_lanes"]), int(state["road_width"])) != (self.n_lanes, self.width):
+            raise ValueError("state of a level with another geometry")
+        self.speed = float(state["speed"])
+        self.agt_speed = float(state["agt_speed"])
+        self.agent_x = float(state["agent_x"])
+
+        n = int(state["n_obstacles"])
+        if n > self.obstacle_y.shape[0]:
+            self.obstacle_y = np.resize(self.obstacle_y, n)
+            self.obstacle_map = np.resize(self.obstacle_map, (n, self.n_lanes))
+        self.obstacle_y[:n] = state["obstacle_y"][:n]
+        self.obstacle_map[:n] = self.map_sampler.to_map(state["obstacle_code"][:n])
+        self.n_obstacles = n
+        self.n_spawned = int(state["n_spawned"])
+        self.last_code = None if state["last_code"] < 0 else int(state["last_code"])
+        self.tape_offset = int(state["tape_offset"])
+        if self.tape is not None:
+            self.spawn_distance = self.tape.spawn_distance(self.tape_offset + self.n_spawned - 1)
+        unpack_rng(state["rng"], self.rng)
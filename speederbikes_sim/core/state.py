@@ -0,0 +1,65 @@
+import numpy as np
+
+# Snapshot of one level as a fixed-size record: level parameters, agent x, obstacle y values and map codes
+# (oldest first, see core.maps), the state of the RNG that generates the obstacles and the level tape offset.
+# Obstacles are at least inter_obstacle_distance apart, so a window never holds more than a handful of them.
+
+MAX_OBSTACLES = 8
+
+STATE_DTYPE = np.dtype([
+    ("n_lanes", "<i8"),
+    ("speed", "<f8"),
+    ("road_width", "<i8"),
+    ("agt_speed", "<f8"),
+    ("agent_x", "<f8"),
+    ("n_obstacles", "<i8"),
+    ("n_spawned", "<i8"),
+    ("last_code", "<i8"), # -1 if there is none
+    ("obstacle_y", "<f8", (MAX_OBSTACLES,)),
+    ("obstacle_code", "<i8", (MAX_OBSTACLES,)),
+    ("rng", "<u8", (6,)), # PCG64 state and increment (low and high 64 bits each), has_uint32, uinteger
+    ("tape_offset", "<i8"), # tape position of the episode's first obstacle, 0 without a tape
+])
+
+_MASK64 = (1 << 64) - 1
+
+def empty_state() -> np.ndarray:
+    return np.zeros((), dtype=STATE_DTYPE)
+
+def as_state(state:np.ndarray|bytes) -> np.ndarray:
+    """Args:
+        state (np.ndarray | bytes): record of STATE_DTYPE or its bytes
+    Returns:
+        np.ndarray: 0-d record of STATE_DTYPE
+    """
+    if isinstance(state, (bytes, bytearray, memoryview)):
+        return np.frombuffer(state, dtype=STATE_DTYPE).reshape(())
+    if state.dtype != STATE_DTYPE:
+        raise ValueError("not a speederbikes state")
+    return state.reshape(())
+
+def level_params(state:np.ndarray) -> dict:
+    """Returns:
+        dict: level parameters of a state, as reset options
+    """
+    return {"lvl_n_lanes": int(state["n_lanes"]), "lvl_speed": float(state["speed"]),
+            "lvl_road_width": int(state["road_width"]), "agt_speed": float(state["agt_speed"])}
+
+def pack_rng(rng:np.random.Generator, out:np.ndarray) -> None:
+    """Write the state of a PCG64 generator into 6 uint64."""
+    state = rng.bit_generator.state
+    if state["bit_generator"] != "PCG64":
+        raise ValueError(f"only PCG64 generators can be stored, not {state['bit_generator']}")
+    pcg = state["state"]
+    out[:] = [pcg["state"] & _MASK64, pcg["state"] >> 64, pcg["inc"] & _MASK64, pcg["inc"] >> 64,
+              state["has_uint32"], state["uinteger"]]
+
+def unpack_rng(packed:np.ndarray, rng:np.random.Generator) -> None:
+    """Restore the state of a PCG64 generator in place, everything sharing the generator sees the change."""
+    packed = [int(value) for value in packed]
+    rng.bit_generator.state = {
+        "bit_generator": "PCG64",
+        "state": {"state": packed[0] | (packed[1] << 64), "inc": packed[2] | (packed[3] << 64)},
+        "has_uint32": packed[4],
+        "uinteger": packed[5],
+    }
@@ -0,0 +1,100 @@
+import json
+import numpy as np
+
+from speederbikes_sim.core.maps import MapSampler
+
+# A level tape is a pregenerated obstacle stream: the map code of every obstacle (see core.maps) and the distance
+# the newest obstacle has to travel before the next one spawns. Tapes are stored as one .npy file, which is opened
+# memory-mapped so that all processes playing the same tape share its pages, plus a small .json with the settings.
+# Levels play a tape from an offset on and wrap around at its end.
+
+TAPE_SPACING_DTYPE = np.dtype("<u2")
+
+def _code_dtype(n_lanes:int) -> np.dtype:
+    for dtype in ["<u1", "<u2", "<u4", "<u8"]:
+        if n_lanes <= np.dtype(dtype).itemsize * 8:
+            return np.dtype(dtype)
+    raise ValueError(f"too many lanes: {n_lanes}")
+
+def _paths(path:str) -> tuple[str, str]:
+    base = path[:-4] if path.endswith(".npy") else path
+    return base + ".npy", base + ".json"
+
+class LevelTape():
+    def __init__(self, codes:np.ndarray, spacing:np.ndarray, n_lanes:int, inter_obstacle_distance:int,
+                 seed:int|None=None) -> None:
+        """Obstacle stream for Level and Simulation, usually created with generate_tape and opened with LevelTape.open.
+        Args:
+            codes (np.ndarray): (length,) map codes
+            spacing (np.ndarray): (length,) distance after which the obstacle following each obstacle spawns,
+                at least inter_obstacle_distance
+            n_lanes (int): number of lanes
+            inter_obstacle_distance (int): smallest spacing
+            seed (int | None, optional): seed the tape was generated with. Defaults to None.
+        """
+        assert codes.shape == spacing.shape and codes.shape[0] > 0
+        self.codes = codes
+        self.spacing = spacing
+        self.n_lanes = n_lanes
+        self.inter_obstacle_distance = inter_obstacle_distance
+        self.seed = seed
+        self.maps = MapSampler(n_lanes)
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def code(self, index:int) -> int:
+        return int(self.codes[index % self.codes.shape[0]])
+
+    def spawn_distance(self, index:int) -> float:
+        return float(self.spacing[index % self.spacing.shape[0]])
+
+    @classmethod
+    def open(cls, path:str) -> "LevelTape":
+        """Open a stored tape read-only and memory-mapped."""
+        data_path, meta_path = _paths(path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        data = np.load(data_path, mmap_mode="r")
+        return cls(data["code"], data["spacing"], meta["n_lanes"], meta["inter_obstacle_distance"], meta.get("seed"))
+
+def generate_tape(path:str, length:int, n_lanes:int, inter_obstacle_distance:int=220, seed:int|None=None,
+                  spacing_jitter:int=0, chunk_size:int=1 << 16) -> LevelTape:
+    """Pregenerate a tape with the same rules as online generation and store it.
+    Args:
+        path (str): file name, '.npy' and '.json' files are written
+        length (int): number of obstacles
+        n_lanes (int): number of lanes
+        inter_obstacle_distance (int, optional): spacing of the obstacles. Defaults to 220.
+        seed (int | None, optional): seed for the maps and spacing. Defaults to None.
+        spacing_jitter (int, optional): spacing is drawn uniformly from
+            [inter_obstacle_distance, inter_obstacle_distance + spacing_jitter]. Defaults to 0.
+        chunk_size (int, optional): obstacles generated per write. Defaults to 65536.
+    Returns:
+        LevelTape: the stored tape, opened memory-mapped
+    """
+    assert length > 0 and spacing_jitter >= 0
+    assert inter_obstacle_distance + spacing_jitter <= np.iinfo(TAPE_SPACING_DTYPE).max
+    data_path, meta_path = _paths(path)
+    dtype = np.dtype([("code", _code_dtype(n_lanes)), ("spacing", TAPE_SPACING_DTYPE)])
+    data = np.lib.format.open_memmap(data_path, mode="w+", dtype=dtype, shape=(length,))
+
+    rng = np.random.default_rng(seed)
+    sampler = MapSampler(n_lanes)
+    codes = np.empty(min(chunk_size, length), dtype=np.int64)
+    last_code = None
+    for start in range(0, length, chunk_size):
+        stop = min(start + chunk_size, length)
+        # each map depends on the previous one
+        for i in range(stop - start):
+            last_code = sampler.sample(last_code, rng)
+            codes[i] = last_code
+        data["code"][start:stop] = codes[:stop - start]
+        data["spacing"][start:stop] = inter_obstacle_distance + rng.integers(0, spacing_jitter + 1, size=stop - start)
+    data.flush()
+    del data
+
+    with open(meta_path, "w") as f:
+        json.dump({"n_lanes": n_lanes, "inter_obstacle_distance": inter_obstacle_distance, "seed": seed,
+                   "spacing_jitter": spacing_jitter, "length": length}, f)
+    return LevelTape.open(data_path)
@@ -1,4 +1,6 @@
 from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+from speederbikes_sim.envs.speederbikes_vec_env import SpeederBikesVecEnv
+from speederbikes_sim.envs.speederbikes_sharded_env import SpeederBikesShardedVecEnv
 
 # """
 # If your environment is not registered, you may optionally pass a module to import,
@@ -4,43 +4,130 @@
 import gymnasium as gym
 from gymnasium import spaces
 
-import pygame
 import numpy as np
-from typing import List, Optional, Tuple, Union, Any
-
-from speederbikes_sim.objects.level import Level
-from speederbikes_sim.objects.agent import Agent
+from typing import List, Optional, Tuple, Union, Any, TYPE_CHECKING
+
+# pygame and the sprite objects are imported when they are first needed: by the 'pygame' backend in reset()
+# and by rendering. The 'numpy' backend never loads pygame (and SDL) unless something is drawn with pygame.
+from speederbikes_sim.core.simulation import Simulation
+from speederbikes_sim.core.raster import Rasterizer, pg_round
+from speederbikes_sim.core.profiler import StepProfiler, NullProfiler
+from speederbikes_sim.core.tape import LevelTape
+from speederbikes_sim.core.lidar import Lidar
+from speederbikes_sim.core.occupancy import OccupancyGrid
+from speederbikes_sim.core.npc import NpcTraffic, npc_sprite
+from speederbikes_sim.core.recorder import VideoRecorder
+from speederbikes_sim.core.maps import maps_to_codes
+from speederbikes_sim.core.state import MAX_OBSTACLES, empty_state, as_state, level_params, pack_rng, unpack_rng
+
+if TYPE_CHECKING:
+    import pygame
+    from speederbikes_sim.objects.level import Level
+    from speederbikes_sim.objects.layers import DirtyRectCanvas
+    from speederbikes_sim.objects.viewer import ThreadedViewer
 
 class SpeederBikesEnv(gym.Env):
     metadata = {
         "render_modes": ["human", "rgb_array"], 
         # "control_modes": ["position", "velocity", "acceleration"],
         "render_fps": 60, #[60, 120, 144, 165, 244, 250]
-        "observation_modes": ["dict", "array", "array_flatten", "rgb_array", "rgb_array_flatten"]
+        "observation_modes": ["dict", "array", "flatten", "rgb_array", "rgb_array_flatten", "lidar", "occupancy"],
+        # 'pygame' simulates with pygame sprites, 'numpy' with the headless Simulation (pygame is only used for drawing)
+        "backends": ["pygame", "numpy"],
+        # how 'rgb_array' frames are drawn. 'numpy' paints them with the Rasterizer, pixel-identical to 'pygame'
+        "renderers": ["pygame", "numpy"]
         }
 
     def __init__(self, render_mode=None, control_mode=None,
                  observation_mode:str="flatten",
                  lvl_n_lanes:int=3, lvl_speed:float=200,
-                 lvl_road_width:int=350, agt_speed:float=200
+                 lvl_road_width:int=350, agt_speed:float=200,
+                 backend:str="pygame", reuse_obs_buffer:bool=False,
+                 renderer:str="pygame", frame_export:str="copy",
+                 frame_skip:int=1, profile:bool=False, profile_info:bool=False,
+                 level_tape:"str | LevelTape | None"=None,
+                 event_driven:bool=False, max_event_frames:int=600,
+                 lidar_rays:int=16, grid_rows:int=32, coord_dtype:str="float32",
+                 n_npcs:int=0, npc_k:int=4, human_display:str="sync", frame_stack:int=1
                  ) -> None:
         """_summary_
 
         Args:
             render_mode (_type_, optional): _description_. Defaults to None.
             control_mode (_type_, optional): _description_. Defaults to None.
-            observation_mode (str, optional): one of 'flatten', 'array', 'dict'. Defaults to "flatten".
+            observation_mode (str, optional): one of 'flatten', 'array', 'dict', 'rgb_array', 'rgb_array_flatten', 'lidar',
+                'occupancy'. Defaults to "flatten".
+            backend (str, optional): one of 'pygame', 'numpy'. 'numpy' keeps the game state in flat arrays and
+                only touches pygame when something is rendered. Dynamics are identical. Defaults to "pygame".
+            reuse_obs_buffer (bool, optional): 'array' and 'flatten' observations are returned as views of one
+                persistent buffer instead of copies, so are frame stacks. Copy them if you keep them around.
+                Defaults to False.
+            renderer (str, optional): one of 'pygame', 'numpy'. Draws 'rgb_array' frames with pygame surfaces or straight
+                into a NumPy array. 'human' mode always uses pygame. Defaults to "pygame".
+            frame_export (str, optional): one of 'copy', 'view'. What render() returns in 'rgb_array' mode: a copy of
+                the frame or a read-only view of the persistent frame buffer, which is overwritten by the next frame.
+                Use render_to() to have frames written into an array you own. Defaults to "copy".
+            frame_skip (int, optional): number of physics substeps per step, all with the same action.
+                Stops early on a collision, rewards are summed up and the observation is only built after the
+                last substep. Can be changed with the reset option 'frame_skip'. Defaults to 1.
+            profile (bool, optional): time the phases of every step (agent update, level update, collision,
+                observation, info, rendering), see get_perf_stats(). Defaults to False.
+            profile_info (bool, optional): with profile, also put the step's breakdown in seconds into info["perf"].
+                Defaults to False.
+            level_tape (str | LevelTape | None, optional): play obstacles back from a pregenerated tape (or the path
+                of one, see core.tape) instead of sampling them. Every episode starts at the reset option
+                'tape_offset'. The tape must have lvl_n_lanes lanes. Defaults to None.
+            event_driven (bool, optional): every step holds the action until the next decision point: an obstacle
+                enters or leaves the agent's band, the agent reaches a road border or collides, but at most
+                max_event_frames frames. The reward is summed over all frames, info["elapsed"] holds the time in
+                seconds and info["n_frames"] the number of frames. The numpy backend jumps there at once, the pygame
+                backend goes frame by frame, results are identical. frame_skip is ignored. Defaults to False.
+            max_event_frames (int, optional): maximum number of frames of an event-driven step. Defaults to 600.
+            lidar_rays (int, optional): number of rays of 'lidar' observations. They fan out upward from the agent
+                over 180 degrees and measure the distance to the nearest obstacle part or road border as float32,
+                see core.lidar. Defaults to 16.
+            grid_rows (int, optional): number of rows of 'occupancy' observations. The window is cut into grid_rows
+                bands, a cell is set if a blocked part of its lane overlaps its band, one more row marks the lanes
+                under the agent. The (grid_rows + 1, n_lanes) grid is packed into uint8 bits, see core.occupancy.
+                Defaults to 32.
+            coord_dtype (str, optional): dtype of coordinates and distances in all other observations,
+                'float32' or 'float64'. Pixels are always uint8. Defaults to "float32".
+            n_npcs (int, optional): number of NPC bikes sharing the road, see core.npc. They dodge the obstacles,
+                colliding with one ends the episode like an obstacle. Defaults to 0.
+            npc_k (int, optional): with NPCs, 'array' and 'flatten' observations get npc_k more rows and 'dict'
+                observations an "npcs" entry: y and absolute x of the npc_k NPCs in the window closest to the agent,
+                closest first, zeros if there are fewer. Defaults to 4.
+            human_display (str, optional): one of 'sync', 'thread'. With 'sync' the 'human' render mode draws every
+                frame in step() and waits to keep render_fps. 'thread' only publishes the scene, a display thread
+                draws it at its own pace and drops the frames it can't keep up with (see objects.viewer).
+                Defaults to "sync".
+            frame_stack (int, optional): observations are the last frame_stack observations, oldest first, stacked
+                along a new first axis. Not available in 'dict' mode. Defaults to 1 (no stacking).
         """
         # super().__init__()
         self.control_mode = control_mode
         self.observation_mode = observation_mode
 
         self.window_size = 512
+        assert coord_dtype in ["float32", "float64"]
+        self.coord_dtype = np.dtype(coord_dtype)
+        self._lidar = Lidar(n_rays=lidar_rays, max_range=self.window_size)
+        self._grid = OccupancyGrid(self.window_size, n_rows=grid_rows)
+
+        # NPC bikes, created in reset()
+        assert n_npcs >= 0 and npc_k >= 1
+        self.n_npcs = n_npcs
+        self.npc_k = npc_k
+        self.npcs:NpcTraffic = None
+        self._npc_rows = npc_k if n_npcs > 0 else 0
         self._bg_color = (155, 155, 155)
 
         # observation space depends on level specifications, thus can only be set, when reset() was called.
         # Howevef, it is needed, thus we create a dummy space using the dict mode
         self.observation_space = self._define_observation_space(mode="dict")
+        # observation spaces of reset(), per (mode, n_lanes, inter_obstacle_distance). Building them is expensive,
+        # the 'rgb_array' Box alone holds two arrays of the frame's size.
+        self._observation_spaces:dict = {}
 
         # you can always only go left or right or stay put.
         self.action_space = spaces.Discrete(3)
@@ -59,15 +146,105 @@ class SpeederBikesEnv(gym.Env):
         # will only be set if render_mode is human
         self.window = None
         self.clock = None
+        # display thread of the 'thread' human display, started in reset()
+        assert human_display in ["sync", "thread"]
+        self.human_display = human_display
+        self.viewer:"ThreadedViewer" = None
+        # background video recorder, see start_recording()
+        self.recorder:VideoRecorder = None
+
+        # canvas on top of the prerendered background and road, created once something is rendered.
+        # Only the parts that obstacles and the agent touched are redrawn every frame.
+        self._layers:"DirtyRectCanvas" = None
+        self.canvas:"pygame.Surface" = None
 
         self.lvl_n_lanes = lvl_n_lanes
         self.lvl_speed = lvl_speed
         self.lvl_road_width = lvl_road_width
         self.agt_speed = agt_speed
 
+        assert int(frame_skip) >= 1
+        self.frame_skip = int(frame_skip)
+
+        assert int(max_event_frames) >= 1
+        self.event_driven = event_driven
+        self.max_event_frames = int(max_event_frames)
+
+        # memory-mapped obstacle stream shared by all envs that open the same file
+        self.level_tape:LevelTape = LevelTape.open(level_tape) if isinstance(level_tape, str) else level_tape
+        self.tape_offset = 0
+
+        # None unless profiling is enabled. step() only checks for it once.
+        self._profiler:StepProfiler = StepProfiler() if profile else None
+        # what step() and _substep() time their phases with
+        self._timer:StepProfiler | NullProfiler = NullProfiler() if self._profiler is None else self._profiler
+        self.profile_info = profile_info
+
+        assert backend in self.metadata["backends"]
+        self.backend = backend
+
+        # set in reset(). Depending on the backend either level and agent or sim are used.
+        self.level = None
+        self.agent = None
+        self.sim = None
+        self._sim_view = None
+
+        assert renderer in self.metadata["renderers"]
+        self.renderer = renderer
+        self._rasterizer = None
+
+        # every rgb frame is written once into this persistent, contiguous (H, W, 3) buffer
+        assert frame_export in ["copy", "view"]
+        self.frame_export = frame_export
+        self._frame = None
+        self._frame_view = None
+
+        # preallocated buffer for 'array' and 'flatten' observations, created in reset()
+        self.reuse_obs_buffer = reuse_obs_buffer
+        self._obs_buffer = None
+        self._user_obs_buffer = None
+        # obstacle rows in the buffer are only rewritten when obstacles were added or removed
+        self._obs_rows_key = None
+        self._obs_rows_visible = None
+
+        # ring of the last frame_stack observations, allocated in reset(). Every observation is written into the
+        # slot at _stack_head, frames are rendered straight into it.
+        assert int(frame_stack) >= 1
+        assert frame_stack == 1 or observation_mode != "dict", "dict observations can't be stacked"
+        self.frame_stack = int(frame_stack)
+        self._stack:np.ndarray = None
+        self._stack_out:np.ndarray = None
+        # _stack_out in the shape of the observation space, returned with reuse_obs_buffer
+        self._stack_view:np.ndarray = None
+        self._stack_head = 0
+
+    @property
+    def _world(self) -> "Level | Simulation":
+        """Object holding the level geometry (n_lanes, inter_obstacle_distance, borders) for the current backend."""
+        return self.sim if self.backend == "numpy" else self.level
+
+    def _agent_position(self) -> Tuple[float, int]:
+        if self.backend == "numpy":
+            return self.sim.agent_x, self.sim.agent_y
+        return self.agent.x, self.agent.y
+
+    def _obstacle_states(self) -> list:
+        """y position, map and part limits of all obstacles, oldest first."""
+        if self.backend == "numpy":
+            return [(y, map, self.sim.part_limits) for y, map in zip(self.sim.obstacles_y, self.sim.obstacles_map)]
+        return [(obstacle.y, obstacle.map, obstacle.part_limits) for obstacle in self.level.obstacles]
+
+    def _obstacle_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """y positions and boolean lane maps of all obstacles, oldest first."""
+        if self.backend == "numpy":
+            return self.sim.obstacles_y, self.sim.obstacles_map
+        obstacles = self.level.obstacles
+        return (np.fromiter((obstacle.y for obstacle in obstacles), dtype=float, count=len(obstacles)),
+                np.array([obstacle.map for obstacle in obstacles], dtype=bool))
+
     def _define_observation_space(self, mode:str):
         # assume Level and Player have been initialized in self.reset()
-        scalar_entry = spaces.Box(0, self.window_size - 1, shape=(1,), dtype=float)
+        scalar_entry = spaces.Box(0, self.window_size - 1, shape=(1,), dtype=self.coord_dtype)
 
         if mode == "dict":
             observation_space = spaces.Dict(
@@ -77,117 +254,237 @@ class SpeederBikesEnv(gym.Env):
                     "obstacles": spaces.Sequence( # sequence of all visible obstacles
                         spaces.Sequence( # sequence of obstacle parts limits
                             spaces.Tuple([
-                                spaces.Box(0, self.window_size - 1, shape=(2,), dtype=float),
-                                spaces.Box(0, self.window_size - 1, shape=(2,), dtype=float) # coords of borders of one obstacle part
+                                spaces.Box(0, self.window_size - 1, shape=(2,), dtype=self.coord_dtype),
+                                spaces.Box(0, self.window_size - 1, shape=(2,), dtype=self.coord_dtype) # coords of borders of one obstacle part
                             ])
                         )
                     ),
                     # "npcs": scalar_entry # list of x positions of other agents
                 }
             )
+            if self._npc_rows > 0:
+                # y and x of the closest NPCs
+                observation_space["npcs"] = spaces.Box(0, self.window_size - 1, shape=(self._npc_rows, 2), dtype=self.coord_dtype)
         elif mode == "array":
-            self.max_visible_obstcacles = np.ceil(self.window_size / self.level.inter_obstacle_distance).astype(int)
-            self.n_entries_per_obstacle = (self.level.n_lanes - 1) * 2 + 1
-            observation_space = spaces.Box(low=0, high=self.window_size - 1, shape=(self.max_visible_obstcacles, self.n_entries_per_obstacle), dtype=float)
+            self.max_visible_obstcacles = np.ceil(self.window_size / self._world.inter_obstacle_distance).astype(int)
+            self.n_entries_per_obstacle = (self._world.n_lanes - 1) * 2 + 1
+            observation_space = spaces.Box(low=0, high=self.window_size - 1, shape=(self.max_visible_obstcacles + 1 + self._npc_rows, self.n_entries_per_obstacle), dtype=self.coord_dtype)
         elif mode == "flatten":
-            self.max_visible_obstcacles = np.ceil(self.window_size / self.level.inter_obstacle_distance).astype(int)
-            self.n_entries_per_obstacle = (self.level.n_lanes - 1) * 2 + 1
-            observation_space = spaces.Box(low=0, high=self.window_size - 1, shape=((self.max_visible_obstcacles + 1) * self.n_entries_per_obstacle,), dtype=float)
+            self.max_visible_obstcacles = np.ceil(self.window_size / self._world.inter_obstacle_distance).astype(int)
+            self.n_entries_per_obstacle = (self._world.n_lanes - 1) * 2 + 1
+            observation_space = spaces.Box(low=0, high=self.window_size - 1, shape=((self.max_visible_obstcacles + 1 + self._npc_rows) * self.n_entries_per_obstacle,), dtype=self.coord_dtype)
+        elif mode == "lidar":
+            observation_space = spaces.Box(low=0, high=self._lidar.max_range, shape=(self._lidar.n_rays,), dtype=self.coord_dtype)
+        elif mode == "occupancy":
+            observation_space = spaces.Box(low=0, high=255, shape=(self._grid.n_bytes(self._world.n_lanes),), dtype=np.uint8)
         elif mode == "rgb_array":
-            observation_space = spaces.Box(low=0, high=255, shape=(self.window_size, self.window_size, 3), dtype=int)
+            observation_space = spaces.Box(low=0, high=255, shape=(self.window_size, self.window_size, 3), dtype=np.uint8)
         elif mode == "rgb_array_flatten":
-            observation_space = spaces.Box(low=0, high=255, shape=(self.window_size * self.window_size * 3,), dtype=int)
+            observation_space = spaces.Box(low=0, high=255, shape=(self.window_size * self.window_size * 3,), dtype=np.uint8)
         else:
-            print("ERROR: wrong observation mode. Must be one of 'flatten', 'array', 'dict', 'rgb_array', 'rtb_array_flatten'.")
+            print("ERROR: wrong observation mode. Must be one of 'flatten', 'array', 'dict', 'rgb_array', 'rtb_array_flatten', 'lidar', 'occupancy'.")
             raise ValueError
         
         return observation_space
 
-    def _make_array_observation(self, obs:dict) -> np.array:
-        agent_obs = np.array([self.agent.y, self.agent.x])
-        # fill with zeros
-        # TODO: might add left and right agent boundaries instead of center
-        agent_obs = np.concatenate([
-            agent_obs,
-            np.zeros(self.n_entries_per_obstacle - agent_obs.shape[0])
-        ])
-
-        obst_obs = []
-        for obst in obs["obstacles"]:
-            try:
-                xs = obst[:,:,0]
-                ys = obst[:,:,1]
-            except IndexError:
-                # encountered empty obstacle
-                xs = np.array([0])
-                ys = np.array([0])
-
-            assert len(np.unique(ys)) == 1
-            y = ys.flatten()[0]
-
-            # concatenate y value and x vlaue
-            no = np.concatenate([np.array([y]), xs.flatten()])
-            # fill observation for single obstacle to be of maximum possible size
-            no = np.concatenate([no, np.zeros(self.n_entries_per_obstacle - no.shape[0])])
-
-            obst_obs.append(no)
-        obst_obs = np.array(obst_obs)
-
-        # fill observation of obstacles to have maximum size given the maximum possible number of present obstacles
-        obst_obs = np.concatenate([
-            obst_obs,
-            np.zeros((self.max_visible_obstcacles - obst_obs.shape[0], obst_obs.shape[1]))
-        ])
-
-        # put together agent and obstacle observations
-        new_obs = np.concatenate([
-            agent_obs.reshape(1, obst_obs.shape[1]),
-            obst_obs
-        ])
-
-        return new_obs
+    def set_observation_buffer(self, buffer:np.ndarray|None) -> None:
+        """Let 'array' and 'flatten' observations be written into a caller owned array.
+        Observations are then views of this array. The buffer is checked against the observation space on reset.
+        Args:
+            buffer (np.ndarray | None): C-contiguous array of coord_dtype with
+                (max_visible_obstcacles + 1 + npc rows) * n_entries_per_obstacle entries, None to go back to an internal
+                buffer.
+        """
+        self._user_obs_buffer = buffer
+        if self._obs_buffer is not None:
+            self._obs_buffer = None
+            self._allocate_obs_buffer()
+
+    def _allocate_obs_buffer(self) -> None:
+        shape = (self.max_visible_obstcacles + 1 + self._npc_rows, self.n_entries_per_obstacle)
+        if self._user_obs_buffer is not None:
+            buffer = self._user_obs_buffer
+            if buffer.size != shape[0] * shape[1] or not buffer.flags.c_contiguous or buffer.dtype != self.coord_dtype:
+                raise ValueError(f"observation buffer must be C-contiguous {self.coord_dtype} with {shape[0] * shape[1]} entries for shape {shape}")
+            self._obs_buffer = buffer.reshape(shape)
+        elif self._obs_buffer is None or self._obs_buffer.shape != shape:
+            self._obs_buffer = np.zeros(shape, dtype=self.coord_dtype)
+        self._obs_buffer[:] = 0
+        self._obs_rows_visible = np.zeros(self.max_visible_obstcacles)
+        self._obs_rows_key = None
+
+    def _write_obstacle_rows(self, n:int) -> None:
+        # rewrite limits of the blocked parts of the first n obstacles, zeros elsewhere
+        buffer = self._obs_buffer
+        buffer[1:] = 0
+        self._obs_rows_visible[:] = 0
+        for k, (_, map, part_limits) in enumerate(self._obstacle_states()[:n]):
+            xs = np.asarray(part_limits)[np.asarray(map, dtype=bool)].reshape(-1)
+            buffer[k+1, 1:1+xs.shape[0]] = xs
+            # empty obstacles are all zeros, including y
+            self._obs_rows_visible[k] = xs.shape[0] > 0
+
+    def _make_array_observation(self) -> np.ndarray:
+        """Fill the preallocated buffer with the agent's y and x position in the first row and one row per obstacle,
+        oldest first, with its y position and the limits of its blocked parts, then the closest NPCs' y and x if any.
+        Obstacles all move at the same speed, so only the y column changes unless obstacles were added or removed.
+        Returns:
+            np.ndarray: the buffer, (max_visible_obstcacles + 1 + npc rows, n_entries_per_obstacle)
+        """
+        buffer = self._obs_buffer
+        agent_x, agent_y = self._agent_position()
+        buffer[0, 0] = agent_y
+        buffer[0, 1] = agent_x
+
+        world = self._world
+        n_obstacles = world.n_obstacles if self.backend == "numpy" else len(world.obstacles)
+        n = min(n_obstacles, self.max_visible_obstcacles)
+        key = (world.n_spawned, n_obstacles)
+        if key != self._obs_rows_key:
+            self._write_obstacle_rows(n)
+            self._obs_rows_key = key
+
+        if self.backend == "numpy":
+            np.multiply(world.obstacle_y[:n], self._obs_rows_visible[:n], out=buffer[1:n+1, 0])
+        else:
+            for k in range(n):
+                if self._obs_rows_visible[k]:
+                    buffer[k+1, 0] = world.obstacles[k].y
+
+        if self._npc_rows > 0:
+            rows = buffer[self.max_visible_obstcacles + 1:]
+            rows[:] = 0
+            rows[:, :2] = self._npc_observation()
+
+        return buffer
+
+    def _allocate_stack(self) -> None:
+        # slots are kept in the shape observations are written in, frames as (H, W, 3)
+        if self.observation_mode in ["rgb_array", "rgb_array_flatten"]:
+            slot_shape = (self.window_size, self.window_size, 3)
+        elif self.observation_mode in ["array", "flatten"]:
+            slot_shape = self._obs_buffer.shape
+        else:
+            slot_shape = self.observation_space.shape[1:]
+        shape = (self.frame_stack,) + slot_shape
+        if self._stack is None or self._stack.shape != shape or self._stack.dtype != self.observation_space.dtype:
+            self._stack = np.zeros(shape, dtype=self.observation_space.dtype)
+            self._stack_out = np.empty_like(self._stack)
+            self._stack_view = self._stack_out.reshape(self.observation_space.shape)
+        else:
+            self._stack[:] = 0
+        self._stack_head = 0
+
+    def _stacked_obs(self) -> np.ndarray:
+        """Write the current observation into the oldest slot of the ring.
+        Returns:
+            np.ndarray: the last frame_stack observations, oldest first, in one contiguous copy of the ring
+        """
+        slot = self._stack[self._stack_head]
+        if self.observation_mode in ["rgb_array", "rgb_array_flatten"]:
+            self._render_frame("rgb_array", out=slot)
+        elif self.observation_mode in ["array", "flatten"]:
+            slot[:] = self._make_array_observation()
+        else:
+            slot[:] = self._make_observation()
+        self._stack_head = (self._stack_head + 1) % self.frame_stack
+
+        head = self._stack_head
+        out = self._stack_out if self.reuse_obs_buffer else np.empty_like(self._stack)
+        out[:self.frame_stack - head] = self._stack[head:]
+        out[self.frame_stack - head:] = self._stack[:head]
+        return self._stack_view if self.reuse_obs_buffer else out.reshape(self.observation_space.shape)
 
     def _flatten_observation(self, obs:np.array) -> np.array:
-        return obs.flatten()
+        # the buffer is contiguous, this is a view
+        return obs.reshape(-1)
 
     def _get_obs(self):
+        if self.frame_stack > 1:
+            return self._stacked_obs()
+        return self._make_observation()
+
+    def _make_observation(self):
+        if self.observation_mode in ["array", "flatten"]:
+            obs = self._make_array_observation()
+            if self.observation_mode == "flatten":
+                obs = self._flatten_observation(obs)
+            return obs if self.reuse_obs_buffer or self._user_obs_buffer is not None else obs.copy()
+
+        # visual observeration as rgb array of scene
+        if self.observation_mode in ["rgb_array", "rgb_array_flatten"]:
+            self._render_frame("rgb_array")
+            obs = self._frame_view if self.reuse_obs_buffer else self._frame.copy()
+            if self.observation_mode == "rgb_array_flatten":
+                obs = obs.reshape(-1)
+            return obs
+
+        if self.observation_mode == "lidar":
+            return self._make_lidar_observation()
+
+        if self.observation_mode == "occupancy":
+            world = self._world
+            agent_x, _ = self._agent_position()
+            agent_size = self.sim.agt_size if self.backend == "numpy" else self.agent.size
+            return self._grid.encode(agent_x - world.left_border, agent_size, *self._obstacle_arrays(),
+                                     world.part_limits, self._obstacle_height())
+
+        agent_x, _ = self._agent_position()
         obs = {
-            "agent": np.array([(self.agent.x - self.agent.level.left_border)]),
+            "agent": np.array([(agent_x - self._world.left_border)], dtype=self.coord_dtype),
             "obstacles": [],
         }
-        for obstacle in self.level.obstacles:
+        for y, map, part_limits in self._obstacle_states():
             obstacle_observation = []
-            for i, part in enumerate(obstacle.map):
+            for i, part in enumerate(map):
                 if part:
                     obstacle_observation.append(
                         np.array([
-                            np.array((obstacle.part_limits[i][0], obstacle.y)),
-                            np.array((obstacle.part_limits[i][1], obstacle.y))
+                            np.array((part_limits[i][0], y)),
+                            np.array((part_limits[i][1], y))
                         ])
                     )
-            obs["obstacles"].append(np.array(obstacle_observation))
+            obs["obstacles"].append(np.array(obstacle_observation, dtype=self.coord_dtype))
         # simpler alternative:
         # for obstacle in self._level.obstacles:
         #     obs["obstacles"].append((obstacle.y, obstacle.map))
             
         # # convert to propper numpy array
         # obs["obstacles"] = np.array(obs["obstacles"])
-            
-        if self.observation_mode == "array":
-            obs = self._make_array_observation(obs)
-        if self.observation_mode == "flatten":
-            obs = self._make_array_observation(obs)
-            obs = self._flatten_observation(obs)
-
-        # visual observeration as rgb array of scene
-        if self.observation_mode == "rgb_array":
-            obs = self.render()
-        if self.observation_mode == "rgb_array_flatten":
-            obs = self.render().flatten()
 
+        if self._npc_rows > 0:
+            obs["npcs"] = self._npc_observation()
 
         return obs
 
+    def _npc_observation(self) -> np.ndarray:
+        """Returns:
+            np.ndarray: (npc_k, 2) y and absolute x of the closest NPCs in the window, zeros if there are fewer
+        """
+        npcs, world = self.npcs, self._world
+        agent_x, agent_y = self._agent_position()
+        closest = npcs.nearest(agent_x - world.left_border, agent_y, self.npc_k)
+        obs = np.zeros((self.npc_k, 2), dtype=self.coord_dtype)
+        obs[:closest.shape[0], 0] = npcs.y[closest]
+        obs[:closest.shape[0], 1] = npcs.x[closest] + world.left_border
+        return np.clip(obs, 0, self.window_size - 1, out=obs)
+
+    def _npc_collided(self) -> bool:
+        npcs, world = self.npcs, self._world
+        agent_x, agent_y = self._agent_position()
+        agent_size = self.sim.agt_size if self.backend == "numpy" else self.agent.size
+        return npcs.collision(agent_x - world.left_border, agent_y, agent_size) is not None
+
+    def _obstacle_height(self) -> int:
+        return self.sim.obstacle_height if self.backend == "numpy" else self.level.obstacles[0].obstacle_height
+
+    def _make_lidar_observation(self) -> np.ndarray:
+        world = self._world
+        agent_x, agent_y = self._agent_position()
+        return self._lidar.cast(agent_x - world.left_border, agent_y, world.right_border - world.left_border,
+                                *self._obstacle_arrays(), world.part_limits, self._obstacle_height(),
+                                out=np.empty(self._lidar.n_rays, dtype=self.coord_dtype))
+
     def _get_info(self):
         info = {
             "obs_info": "'agent' returns the x position relative to the current level/ road.\n\
@@ -195,9 +492,11 @@ class SpeederBikesEnv(gym.Env):
             # distance to next obstacle
             "distance": 0
         }
-        info["distance"] = self.agent.y - self.level.obstacles[0].y
+        _, agent_y = self._agent_position()
+        obstacles = self._obstacle_states()
+        info["distance"] = agent_y - obstacles[0][0]
         if info["distance"] < 0:
-            info["distance"] = self.agent.y - self.level.obstacles[1].y
+            info["distance"] = agent_y - obstacles[1][0]
         return info
 
     def reset(self, *, seed:int|None = None, options:dict={}) -> Tuple[Any, dict]:
@@ -206,9 +505,11 @@ class SpeederBikesEnv(gym.Env):
         - lvl_speed
         - lvl_road_width
         - agt_speed
+        - frame_skip
+        - tape_offset: tape position of the first obstacle, if there is a level tape. Defaults to 0.
         Options overwrite the values set at initialization.
         Args:
-            seed (int | None, optional): seed for RNG. currently not used. Defaults to None.
+            seed (int | None, optional): seed for the RNG that generates the obstacles. Defaults to None.
             options (dict | None, optional): sets environment behaviour. Defaults to None.
         Returns:
             Tuple[Any, dict]: observation, information
@@ -216,34 +517,86 @@ class SpeederBikesEnv(gym.Env):
         # need to call this in order to initialise self.np_random RNG properly
         super().reset(seed=seed)
 
-        if self.render_mode == "human":
+        if self.render_mode == "human" and self.human_display == "thread":
+            # the display thread owns the window
+            if self.viewer is None or not self.viewer.alive:
+                from speederbikes_sim.objects.viewer import ThreadedViewer
+                self.viewer = ThreadedViewer(self.window_size, fps=self.metadata["render_fps"], bg_color=self._bg_color)
+        elif self.render_mode == "human":
             # we need a window to show the canvas and a clock
             if self.window is None:
+                import pygame
                 pygame.init()
                 pygame.display.init()
                 self.window = pygame.display.set_mode((self.window_size, self.window_size))
             if self.clock is None:
+                import pygame
                 self.clock = pygame.time.Clock()
 
-        # create background to draw on
-        self.canvas = pygame.Surface((self.window_size, self.window_size))
-        # # make background grey
-        # self.canvas.fill(self._bg_color) 
+        # the canvas is kept across resets, see _render_frame
 
         # create Level (and Road and first pseudo-random obstacles)
         self.lvl_n_lanes = options["lvl_n_lanes"] if "lvl_n_lanes" in options.keys() else self.lvl_n_lanes
         self.lvl_speed = options["lvl_speed"] if "lvl_speed" in options.keys() else self.lvl_speed
         self.lvl_road_width = options["lvl_road_width"] if "lvl_road_width" in options.keys() else self.lvl_road_width
         
-        self.level = Level(window_size=self.window_size, n_lanes=self.lvl_n_lanes, speed=self.lvl_speed, road_width=self.lvl_road_width)
-        
-        # create Agent
         self.agt_speed = options["agt_speed"] if "agt_speed" in options.keys() else self.agt_speed
-        self.agent = Agent(x = int(round(self.window_size/2)), y = int(self.window_size * 0.8), level=self.level, speed=self.agt_speed)
+        if "frame_skip" in options.keys():
+            assert int(options["frame_skip"]) >= 1
+            self.frame_skip = int(options["frame_skip"])
+        self.tape_offset = int(options.get("tape_offset", 0))
+
+        # with unchanged geometry the existing level, agent and their sprites are reset in place
+        world = self._world
+        reuse = world is not None and (world.n_lanes, world.width) == (self.lvl_n_lanes, self.lvl_road_width)
+        if self.backend == "numpy":
+            # headless level and agent
+            if reuse:
+                self.sim.reset(speed=self.lvl_speed, agt_speed=self.agt_speed, rng=self.np_random,
+                               tape_offset=self.tape_offset)
+            else:
+                self.sim = Simulation(window_size=self.window_size, n_lanes=self.lvl_n_lanes, speed=self.lvl_speed,
+                                      road_width=self.lvl_road_width, agt_speed=self.agt_speed, rng=self.np_random,
+                                      tape=self.level_tape, tape_offset=self.tape_offset)
+                self._sim_view = None
+        elif reuse:
+            self.level.reset(speed=self.lvl_speed, np_random=self.np_random, tape_offset=self.tape_offset)
+            self.agent.reset(x=int(round(self.window_size/2)), speed=self.agt_speed)
+        else:
+            from speederbikes_sim.objects.level import Level
+            from speederbikes_sim.objects.agent import Agent
+            self.level = Level(window_size=self.window_size, n_lanes=self.lvl_n_lanes, speed=self.lvl_speed, road_width=self.lvl_road_width,
+                               np_random=self.np_random, tape=self.level_tape, tape_offset=self.tape_offset)
+
+            # create Agent
+            self.agent = Agent(x = int(round(self.window_size/2)), y = int(self.window_size * 0.8), level=self.level, speed=self.agt_speed)
         # self._agent = Agent(canvas=self.canvas, speed=agt_speed, window_size=self.window_size, window=self.window)
 
-        # create observation space
-        self.observation_space = self._define_observation_space(self.observation_mode)
+        if self.n_npcs > 0:
+            world = self._world
+            lane_width = world.right_border - world.left_border
+            if self.npcs is None or self.npcs.lane_width != lane_width or self.npcs.n_lanes != world.n_lanes:
+                self.npcs = NpcTraffic(self.n_npcs, self.window_size, lane_width, world.part_limits, rng=self.np_random,
+                                       lat_speed=self.agt_speed)
+            self.npcs.lat_speed = self.agt_speed
+            self.npcs.reset(self.lvl_speed, rng=self.np_random)
+
+        # create observation space, or take it from the cache
+        key = (self.observation_mode, self._world.n_lanes, self._world.inter_obstacle_distance)
+        if key not in self._observation_spaces:
+            observation_space = self._define_observation_space(self.observation_mode)
+            if self.frame_stack > 1:
+                observation_space = spaces.Box(low=observation_space.low.flat[0], high=observation_space.high.flat[0],
+                                               shape=(self.frame_stack,) + observation_space.shape,
+                                               dtype=observation_space.dtype)
+            self._observation_spaces[key] = observation_space
+        self.observation_space = self._observation_spaces[key]
+        self.max_visible_obstcacles = np.ceil(self.window_size / self._world.inter_obstacle_distance).astype(int)
+        self.n_entries_per_obstacle = (self._world.n_lanes - 1) * 2 + 1
+        if self.observation_mode in ["array", "flatten"]:
+            self._allocate_obs_buffer()
+        if self.frame_stack > 1:
+            self._allocate_stack()
 
         # generate/ complete observation
         observation = self._get_obs()
@@ -255,14 +608,149 @@ class SpeederBikesEnv(gym.Env):
         if self.render_mode == "human":
             self._render_frame()
 
+        if self.recorder is not None:
+            self.recorder.begin_episode()
+            self.recorder.add(self._scene())
+
         return observation, info
 
+    def _record(self, terminated:bool) -> None:
+        self.recorder.add(self._scene())
+        if terminated:
+            self.recorder.end_episode(crashed=True)
+
+    def _substep(self, agent_control:int, dt:float) -> bool:
+        """Advance the physics by dt.
+        Returns:
+            bool: whether the agent collided
+        """
+        timer = self._timer
+        if self.backend == "numpy":
+            self.sim.update_agent(agent_control, dt)
+            timer.lap("agent_update")
+            self.sim.update_level(dt)
+            timer.lap("level_update")
+            collided = self.sim.collided()
+        else:
+            # update agent
+            self.agent.update(agent_control, dt)
+            timer.lap("agent_update")
+
+            # update level
+            self.level.update(dt)
+            timer.lap("level_update")
+
+            # get additional information
+            collided = self.agent.collided()
+        timer.lap("collision")
+
+        # update npcs
+        if self.npcs is not None:
+            self.npcs.update(dt, self._world.speed, *self._obstacle_arrays(), self._obstacle_height())
+            collided = collided or self._npc_collided()
+            timer.lap("npc_update")
+        return collided
+
+    def _advance(self, agent_control:int, dt:float) -> Tuple[int, bool]:
+        """Hold the action until the next decision point, see event_driven.
+        Returns:
+            Tuple[int, bool]: number of frames and whether the agent collided
+        """
+        if self.backend == "numpy" and self.npcs is None:
+            return self.sim.advance(agent_control, dt, self.max_event_frames)
+
+        # frame by frame
+        from speederbikes_sim.core.collision import band_mask
+        world = self._world
+        agent_size = self.sim.agt_size if self.backend == "numpy" else self.agent.size
+        borders = (world.left_border + agent_size, world.right_border - agent_size)
+        def band_ids() -> frozenset:
+            ys, _ = self._obstacle_arrays()
+            in_band = band_mask(self._agent_position()[1], agent_size, ys, self._obstacle_height())
+            return frozenset((world.n_spawned - len(ys) + np.flatnonzero(in_band)).tolist())
+
+        for n_frames in range(1, self.max_event_frames + 1):
+            band, at_border = band_ids(), self._agent_position()[0] in borders
+            if self._substep(agent_control, dt):
+                return n_frames, True
+            if band_ids() != band or (self._agent_position()[0] in borders and not at_border):
+                break
+        return n_frames, False
+
+    def get_perf_stats(self) -> dict | None:
+        """Aggregate timings of all profiled steps, see StepProfiler.stats. 'step' is the whole step,
+        the other phases are parts of it. Rendering for 'rgb_array' observations is part of 'get_obs'.
+        Returns:
+            dict | None: report, None if profiling is disabled
+        """
+        return None if self._profiler is None else self._profiler.stats()
+
+    def get_state(self) -> np.ndarray:
+        """Compact snapshot of the current state: level parameters, agent x, obstacle y values and maps and the
+        RNG state, see core.state. state.tobytes() gives 248 bytes.
+        Returns:
+            np.ndarray: 0-d record of core.state.STATE_DTYPE
+        """
+        if self.npcs is not None:
+            raise ValueError("states with NPCs can't be stored")
+        if self.backend == "numpy":
+            return self.sim.get_state()
+
+        level = self.level
+        n = len(level.obstacles)
+        if n > MAX_OBSTACLES:
+            raise ValueError(f"more than {MAX_OBSTACLES} obstacles can't be stored")
+        state = empty_state()
+        state["n_lanes"] = level.n_lanes
+        state["speed"] = level.speed
+        state["road_width"] = level.width
+        state["agt_speed"] = self.agent.speed
+        state["agent_x"] = self.agent.x
+        state["n_obstacles"] = n
+        state["n_spawned"] = level.n_spawned
+        state["last_code"] = -1 if level.last_code is None else level.last_code
+        state["obstacle_y"][:n] = [obstacle.y for obstacle in level.obstacles]
+        state["obstacle_code"][:n] = maps_to_codes(np.array([obstacle.map for obstacle in level.obstacles], dtype=bool))
+        pack_rng(self.np_random, state["rng"])
+        state["tape_offset"] = level.tape_offset
+        return state
+
+    def set_state(self, state:np.ndarray|bytes) -> None:
+        """Restore a snapshot of get_state. Objects are updated in place, no sprites are created for
+        snapshots of the same level. A snapshot of another level first resets the env with its parameters.
+        Args:
+            state (np.ndarray | bytes): result of get_state or its bytes
+        """
+        state = as_state(state)
+        params = level_params(state)
+        current = {"lvl_n_lanes": self.lvl_n_lanes, "lvl_speed": self.lvl_speed,
+                   "lvl_road_width": self.lvl_road_width, "agt_speed": self.agt_speed}
+        if self._world is None or params != current:
+            self.reset(options=params)
+
+        self.tape_offset = int(state["tape_offset"])
+        if self.backend == "numpy":
+            self.sim.set_state(state)
+        else:
+            self.level.tape_offset = self.tape_offset
+            n = int(state["n_obstacles"])
+            maps = self.level.map_sampler.to_map(state["obstacle_code"][:n]).astype(int)
+            self.level.set_obstacles(state["obstacle_y"][:n], maps, int(state["n_spawned"]),
+                                     None if state["last_code"] < 0 else int(state["last_code"]))
+            self.agent.x = float(state["agent_x"])
+            self.agent.rect.x = self.agent.x - self.agent.size
+            unpack_rng(state["rng"], self.np_random)
+
+        # the cached obstacle rows of the array observation belong to another state
+        self._obs_rows_key = None
+
     def step(self, action:Any) -> Tuple[Any, float, bool, bool, dict]:
         """Step once through the simulation. Takes a single action
         Args:
             action (Any): Requires action to be in action space [0, 1, 2]
         Returns:
-            Tuple[Any, float, bool, bool, dict]: obs, reward, terminated, truncated (stopped because of time limits), info
+            Tuple[Any, float, bool, bool, dict]: obs, reward, terminated, truncated (stopped because of time limits), info.
+                With frame_skip > 1 the reward is the sum over all substeps.
         """
         # return super().step(action)
         if isinstance(action, np.ndarray):
@@ -271,26 +759,44 @@ class SpeederBikesEnv(gym.Env):
         agent_control = self._action_to_direction[action]
         dt = 1 / self.metadata["render_fps"] # 60 fps -> 0.0166 s
 
-        # update agent
-        self.agent.update(agent_control, dt)
-
-        # update level
-        self.level.update(dt)
+        # no-op unless profiling
+        timer = self._timer
+        timer.start()
 
-        # update npcs
-
-        # get additional information
-        terminated = self.agent.collided()
+        if self.event_driven:
+            n_frames, terminated = self._advance(agent_control, dt)
+            # +1 per frame survived, -100 for the collision
+            reward = n_frames - 1 + (-100 if terminated else 1)
+            timer.lap("advance")
+        else:
+            # repeat the action for frame_skip substeps, without building observations in between
+            reward = 0
+            for _ in range(self.frame_skip):
+                terminated = self._substep(agent_control, dt)
 
-        # define reward function
-        reward = -100 if terminated else 1
+                # define reward function
+                reward += -100 if terminated else 1
+                if terminated:
+                    break
 
         observation = self._get_obs()
+        timer.lap("get_obs")
         info = self._get_info()
+        if self.event_driven:
+            info["elapsed"] = n_frames * dt
+            info["n_frames"] = n_frames
+        timer.lap("get_info")
 
         if self.render_mode == "human":
             self._render_frame()
+            timer.lap("render_frame")
+
+        if self.recorder is not None:
+            self._record(terminated)
 
+        breakdown = timer.end_step()
+        if self.profile_info and breakdown is not None:
+            info["perf"] = breakdown
         return observation, reward, terminated, False, info
 
 
@@ -306,43 +812,161 @@ class SpeederBikesEnv(gym.Env):
         Returns:
             _type_: None or np.ndarray
         """
-        if self.render_mode == "rgb_array":
-            return self._render_frame("rgb_array")
-        if self.observation_mode == "rgb_array":
-            return self._render_frame("rgb_array")
+        if self.render_mode == "rgb_array" or self.observation_mode == "rgb_array":
+            self._render_frame("rgb_array")
+            return self._frame_view if self.frame_export == "view" else self._frame.copy()
 
-    def _render_frame(self, mode:str|None=None):
+    def render_to(self, out:np.ndarray) -> np.ndarray:
+        """Render the current frame straight into an array owned by the caller.
+        Args:
+            out (np.ndarray): C-contiguous uint8 array with (H, W, 3) or H * W * 3 entries
+        Returns:
+            np.ndarray: out
+        """
+        if out.size != self.window_size * self.window_size * 3 or not out.flags.c_contiguous:
+            raise ValueError(f"frame buffer must be C-contiguous with {self.window_size * self.window_size * 3} entries")
+        self._render_frame("rgb_array", out=out.reshape(self.window_size, self.window_size, 3))
+        return out
+
+    def _frame_buffer(self) -> np.ndarray:
+        if self._frame is None:
+            self._frame = np.zeros((self.window_size, self.window_size, 3), dtype=np.uint8)
+            self._frame_view = self._frame.view()
+            self._frame_view.flags.writeable = False
+        return self._frame
+
+    def _rasterize(self, out:np.ndarray) -> np.ndarray:
+        world = self._world
+        if self._rasterizer is None or (self._rasterizer.road_width, self._rasterizer.n_lanes) != (world.width, world.n_lanes):
+            self._rasterizer = Rasterizer(self.window_size, world.width, world.n_lanes, bg_color=self._bg_color)
+        agent_x, _ = self._agent_position()
+        self._rasterizer.render(agent_x, *self._obstacle_arrays(), out=out)
+        if self.npcs is not None:
+            left, top, visible = self._npc_rects()
+            sprite = npc_sprite(self.npcs.size)
+            self._rasterizer.paint_sprites(out, sprite, left[visible], top[visible])
+        return out
+
+    def _npc_rects(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # window position of the NPC sprites, rounded like pygame rects
+        npcs = self.npcs
+        left = pg_round(npcs.x + self._world.left_border - npcs.size)
+        top = pg_round(npcs.y - npcs.size)
+        visible = (top + 2 * npcs.size > 0) & (top < self.window_size)
+        return left, top, visible
+
+    def _scene(self) -> tuple:
+        # copies of everything needed to paint the current frame later, see core.raster.SceneRasterizer
+        world = self._world
+        agent_x, _ = self._agent_position()
+        obstacle_y, obstacle_map = self._obstacle_arrays()
+        npcs = None
+        if self.npcs is not None:
+            left, top, visible = self._npc_rects()
+            npcs = (self.npcs.size, left[visible], top[visible])
+        return world.width, world.n_lanes, agent_x, obstacle_y.copy(), obstacle_map.copy(), npcs
+
+    def _export_frame(self, out:np.ndarray) -> np.ndarray:
+        # one copy from the canvas into out, transposed to HWC on the fly.
+        # The pixel view locks the canvas only while it exists, i.e. during the copy.
+        import pygame
+        pixels = pygame.surfarray.pixels3d(self.canvas)
+        np.copyto(out, pixels.transpose(1, 0, 2))
+        del pixels
+        return out
+
+    def _render_frame(self, mode:str|None=None, out:np.ndarray|None=None):
+        """Draw the current frame. In 'rgb_array' mode the frame is written to out, by default the persistent frame buffer.
+        """
         if mode is None:
             mode = self.render_mode
-        ## collect all objects on the canvas
-        # draw background
-        self.canvas.fill(self._bg_color) 
+        if mode == "human" and self.viewer is not None:
+            return self.viewer.publish(self._scene())
+        if mode == "rgb_array":
+            out = self._frame_buffer() if out is None else out
+            if self.renderer == "numpy":
+                return self._rasterize(out)
+
+        import pygame
+        from speederbikes_sim.objects.view import SimulationView
+        from speederbikes_sim.objects.layers import DirtyRectCanvas, static_layer
+
+        if self._layers is None:
+            self._layers = DirtyRectCanvas((self.window_size, self.window_size))
+            self._layers.track_updates = self.render_mode == "human"
+            self.canvas = self._layers.surface
+
+        if self.backend == "numpy" and self._sim_view is None:
+            self._sim_view = SimulationView(self.sim)
+        view = self._sim_view if self.backend == "numpy" else self.level
 
-        # draw level on canvas
-        self.level.render(self.canvas)
+        ## collect all objects on the canvas
+        # background and road are prerendered once per geometry, only the last frame's sprites are wiped
+        self._layers.set_background(static_layer(self.window_size, view.road.width, view.rect.x, self._bg_color, view.road.color))
+        self._layers.restore()
 
-        # draw agent on canvas
-        self.agent.render(self.canvas)
+        # draw obstacles (and agent of the numpy backend)
+        view.draw(self._layers)
+        if self.backend == "pygame":
+            # draw agent on canvas
+            self._layers.blit(self.agent.image, self.agent.rect)
 
         # draw npcs
+        if self.npcs is not None:
+            from speederbikes_sim.objects.npc import npc_image
+            image = npc_image(self.npcs.size)
+            left, top, visible = self._npc_rects()
+            size = 2 * self.npcs.size
+            for x, y in zip(left[visible].tolist(), top[visible].tolist()):
+                self._layers.blit(image, pygame.Rect(x, y, size, size))
 
         if mode == "human":
-            # copy everything that was drawn to the canvas to the window
-            # draws the content of the Surface self.canvas on the surface self.window
-            self.window.blit(self.canvas, self.canvas.get_rect())
+            # copy the parts of the canvas that changed to the window
+            rects = self._layers.take_updates()
+            for rect in rects:
+                self.window.blit(self.canvas, rect, rect)
 
             pygame.event.pump()
-            pygame.display.update()
+            pygame.display.update(rects)
 
             # update according to fps. adds delay, to keep the clock stable
             self.clock.tick(self.metadata["render_fps"])
         elif mode == "rgb_array":
-            return np.transpose(
-                np.array(pygame.surfarray.pixels3d(self.canvas)), axes=(1, 0, 2)
-            )
+            return self._export_frame(out)
+
+    def start_recording(self, directory:str, mode:str="episode", ring_size:int=120, max_queue:int=256) -> VideoRecorder:
+        """Record one frame per step into .npy clips, painted and written on a background thread (see core.recorder).
+        Recording starts with the current episode.
+        Args:
+            directory (str): folder for the clips
+            mode (str, optional): 'episode' writes every episode, 'crash' only the last ring_size frames of episodes
+                that end in a collision. Defaults to "episode".
+            ring_size (int, optional): frames of a crash clip. Defaults to 120.
+            max_queue (int, optional): frames the writer may fall behind before step() waits for it. Defaults to 256.
+        Returns:
+            VideoRecorder: the recorder, its clips attribute lists the written files
+        """
+        self.stop_recording()
+        self.recorder = VideoRecorder(directory, self.window_size, mode=mode, ring_size=ring_size, max_queue=max_queue,
+                                      bg_color=self._bg_color)
+        if self.sim is not None or self.level is not None:
+            self.recorder.begin_episode()
+            self.recorder.add(self._scene())
+        return self.recorder
+
+    def stop_recording(self) -> None:
+        """Write the open clip and stop the recorder."""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def close(self):
+        self.stop_recording()
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
         if self.window is not None:
+            import pygame
             pygame.display.quit()
             pygame.quit()
 
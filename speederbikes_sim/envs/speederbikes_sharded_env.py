@@ -0,0 +1,230 @@
+import gymnasium as gym
+from gymnasium import spaces
+
+import os
+import traceback
+import multiprocessing as mp
+import numpy as np
+from typing import List, Optional, Tuple, Union, Any
+
+from speederbikes_sim.envs.speederbikes_vec_env import SpeederBikesVecEnv
+
+# Every worker process steps one shard of the worlds with a SpeederBikesVecEnv. Actions, observations, rewards and
+# flags live in shared memory, each worker reads and writes only its own rows. The pipes only carry commands,
+# acknowledgements and the final observations of terminated worlds.
+
+def _shared_array(ctx, shape:tuple, dtype) -> tuple:
+    dtype = np.dtype(dtype)
+    raw = ctx.RawArray("b", max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return raw, shape, dtype.str
+
+def _as_array(raw, shape:tuple, dtype:str) -> np.ndarray:
+    return np.frombuffer(raw, dtype=np.dtype(dtype), count=int(np.prod(shape))).reshape(shape)
+
+def _worker(start:int, stop:int, env_kwargs:dict, buffers:dict, pipe, parent_pipe) -> None:
+    if parent_pipe is not None:
+        parent_pipe.close()
+    arrays = {name: _as_array(*buffer)[start:stop] for name, buffer in buffers.items()}
+    observations = arrays["observations"]
+
+    try:
+        env = SpeederBikesVecEnv(num_envs=stop - start, copy=False, **env_kwargs)
+        if env.observation_mode in ["rgb_array", "rgb_array_flatten"]:
+            # frames are painted straight into shared memory
+            env.set_frame_buffer(observations.reshape(stop - start, env.window_size, env.window_size, 3))
+
+        while True:
+            command, data = pipe.recv()
+            if command == "reset":
+                seed, options = data
+                obs, info = env.reset(seed=seed, options=options)
+                if not np.may_share_memory(obs, observations):
+                    np.copyto(observations, obs)
+                arrays["distance"][:] = info["distance"]
+                pipe.send((True, None))
+            elif command == "step":
+                obs, rewards, terminated, truncated, info = env.step(arrays["actions"])
+                if not np.may_share_memory(obs, observations):
+                    np.copyto(observations, obs)
+                arrays["rewards"][:] = rewards
+                arrays["terminated"][:] = terminated
+                arrays["truncated"][:] = truncated
+                arrays["distance"][:] = info["distance"]
+                final = None
+                if terminated.any():
+                    done = np.flatnonzero(terminated)
+                    final = (done, [info["final_observation"][i] for i in done], [info["final_info"][i] for i in done])
+                pipe.send((True, final))
+            elif command == "close":
+                pipe.send((True, None))
+                break
+            else:
+                raise RuntimeError(f"unknown command {command}")
+    except (KeyboardInterrupt, Exception):
+        pipe.send((False, traceback.format_exc()))
+    finally:
+        pipe.close()
+
+class SpeederBikesShardedVecEnv(gym.vector.VectorEnv):
+    metadata = {
+        "render_modes": [],
+        "render_fps": 60,
+        "observation_modes": SpeederBikesVecEnv.metadata["observation_modes"],
+        "autoreset": True
+        }
+
+    def __init__(self, num_envs:int=1, num_workers:int|None=None, render_mode=None,
+                 observation_mode:str="flatten",
+                 lvl_n_lanes:int=3, lvl_speed:float=200,
+                 lvl_road_width:int=350, agt_speed:float=200,
+                 copy:bool=True, context:str|None=None, grid_rows:int=32, coord_dtype:str="float32"
+                 ) -> None:
+        """Splits num_envs speederbike worlds into shards, each stepped by a SpeederBikesVecEnv in its own process.
+        Workers write observations, rewards and termination flags straight into shared memory and read their actions
+        from a shared buffer, nothing but the final observations of terminated worlds is pickled.
+        Same observations, rewards and autoreset behaviour as SpeederBikesVecEnv.
+        Args:
+            num_envs (int, optional): number of worlds. Defaults to 1.
+            num_workers (int | None, optional): number of worker processes. Defaults to None (one per core).
+            render_mode (_type_, optional): rendering is not supported. Defaults to None.
+            observation_mode (str, optional): one of 'flatten', 'array', 'rgb_array', 'rgb_array_flatten', 'occupancy'.
+                Defaults to "flatten".
+            copy (bool, optional): return a copy of the shared observation buffer. If False the shared buffer itself is
+                returned and overwritten by the next step. Defaults to True.
+            context (str | None, optional): multiprocessing start method. Defaults to None (platform default).
+            grid_rows (int, optional): rows of 'occupancy' observations, see SpeederBikesEnv. Defaults to 32.
+            coord_dtype (str, optional): dtype of 'array' and 'flatten' observations. Defaults to "float32".
+        """
+        assert render_mode is None
+        self.render_mode = render_mode
+        assert observation_mode in self.metadata["observation_modes"]
+        self.observation_mode = observation_mode
+        self.copy = copy
+
+        self._env_kwargs = dict(observation_mode=observation_mode, lvl_n_lanes=lvl_n_lanes, lvl_speed=lvl_speed,
+                                lvl_road_width=lvl_road_width, agt_speed=agt_speed, grid_rows=grid_rows,
+                                coord_dtype=coord_dtype)
+        single_observation_space = self._single_observation_space(self._env_kwargs)
+        super().__init__(num_envs, single_observation_space, spaces.Discrete(3))
+
+        num_workers = os.cpu_count() if num_workers is None else num_workers
+        num_workers = max(min(num_workers, num_envs), 1)
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self._shards = list(zip(bounds[:-1], bounds[1:]))
+
+        # ====== shared memory
+        ctx = mp.get_context(context)
+        obs_space = self.single_observation_space
+        self._buffers = {
+            "observations": _shared_array(ctx, (num_envs,) + obs_space.shape, obs_space.dtype),
+            "actions": _shared_array(ctx, (num_envs,), np.int64),
+            "rewards": _shared_array(ctx, (num_envs,), np.float64),
+            "terminated": _shared_array(ctx, (num_envs,), bool),
+            "truncated": _shared_array(ctx, (num_envs,), bool),
+            "distance": _shared_array(ctx, (num_envs,), np.float64),
+        }
+        self._arrays = {name: _as_array(*buffer) for name, buffer in self._buffers.items()}
+
+        # ====== workers
+        self._pipes = []
+        self._processes = []
+        for start, stop in self._shards:
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(target=_worker, name=f"SpeederBikesWorker-{start}-{stop}", daemon=True,
+                                  args=(start, stop, self._env_kwargs, self._buffers, child_pipe, parent_pipe))
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append(process)
+
+    @staticmethod
+    def _single_observation_space(env_kwargs:dict) -> spaces.Space:
+        # a one world SpeederBikesVecEnv is cheap to create and knows the space for the given level
+        return SpeederBikesVecEnv(num_envs=1, **env_kwargs).single_observation_space
+
+    def _receive(self) -> list:
+        results = [pipe.recv() for pipe in self._pipes]
+        errors = [data for success, data in results if not success]
+        if errors:
+            raise RuntimeError("speederbikes worker failed:\n" + errors[0])
+        return [data for _, data in results]
+
+    def _get_obs(self) -> np.ndarray:
+        observations = self._arrays["observations"]
+        return observations.copy() if self.copy else observations
+
+    def _get_info(self) -> dict:
+        return {
+            "distance": self._arrays["distance"].copy(),
+            "_distance": np.ones(self.num_envs, dtype=bool)
+        }
+
+    def reset_async(self, seed:int|List[int]|None = None, options:dict|None = None) -> None:
+        """Resets all worlds. See SpeederBikesVecEnv.reset. Options must not change the shape of the observations.
+        Args:
+            seed (int | List[int] | None, optional): one seed, split into independent seeds per worker,
+                or a list of num_envs seeds. Each shard's slice of the list seeds that shard's shared RNG, so the
+                obstacles of a world depend on all seeds of its shard and on the number of workers. Defaults to None.
+            options (dict | None, optional): sets environment behaviour. Defaults to None.
+        """
+        options = {} if options is None else options
+        env_kwargs = dict(self._env_kwargs, **{k: v for k, v in options.items() if k in self._env_kwargs})
+        if self._single_observation_space(env_kwargs).shape != self.single_observation_space.shape:
+            raise ValueError("options must not change the shape of the observations of a SpeederBikesShardedVecEnv")
+        self._env_kwargs = env_kwargs
+
+        if seed is None:
+            seeds = [None] * len(self._shards)
+        elif isinstance(seed, int):
+            seeds = np.random.SeedSequence(seed).spawn(len(self._shards))
+        else:
+            assert len(seed) == self.num_envs
+            seeds = [list(seed[start:stop]) for start, stop in self._shards]
+
+        for pipe, shard_seed in zip(self._pipes, seeds):
+            pipe.send(("reset", (shard_seed, options)))
+
+    def reset_wait(self, seed:int|List[int]|None = None, options:dict|None = None) -> Tuple[np.ndarray, dict]:
+        self._receive()
+        return self._get_obs(), self._get_info()
+
+    def step_async(self, actions:Any) -> None:
+        self._arrays["actions"][:] = np.asarray(actions).reshape(self.num_envs)
+        for pipe in self._pipes:
+            pipe.send(("step", None))
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]: obs, rewards, terminated, truncated, info
+        """
+        finals = self._receive()
+        terminated = self._arrays["terminated"].copy()
+        info = self._get_info()
+
+        if terminated.any():
+            final_observation = np.full(self.num_envs, None, dtype=object)
+            final_info = np.full(self.num_envs, None, dtype=object)
+            for (start, _), final in zip(self._shards, finals):
+                if final is None:
+                    continue
+                for i, obs, i_info in zip(*final):
+                    final_observation[start + i] = obs
+                    final_info[start + i] = i_info
+            info["final_observation"], info["_final_observation"] = final_observation, terminated.copy()
+            info["final_info"], info["_final_info"] = final_info, terminated.copy()
+
+        return self._get_obs(), self._arrays["rewards"].copy(), terminated, self._arrays["truncated"].copy(), info
+
+    def close_extras(self, **kwargs) -> None:
+        for pipe, process in zip(self._pipes, self._processes):
+            if process.is_alive():
+                try:
+                    pipe.send(("close", None))
+                    pipe.recv()
+                except (BrokenPipeError, EOFError):
+                    pass
+        for pipe, process in zip(self._pipes, self._processes):
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+            pipe.close()
@@ -0,0 +1,262 @@
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector.utils import batch_space
+
+import numpy as np
+from typing import List, Optional, Tuple, Union, Any
+
+from speederbikes_sim.core.batch import BatchSimulation
+from speederbikes_sim.core.raster import Rasterizer
+from speederbikes_sim.core.occupancy import OccupancyGrid
+
+class SpeederBikesVecEnv(gym.vector.VectorEnv):
+    metadata = {
+        "render_modes": [],
+        "render_fps": 60,
+        "observation_modes": ["array", "flatten", "rgb_array", "rgb_array_flatten", "occupancy"],
+        "autoreset": True
+        }
+
+    def __init__(self, num_envs:int=1, render_mode=None,
+                 observation_mode:str="flatten",
+                 lvl_n_lanes:int=3, lvl_speed:float=200,
+                 lvl_road_width:int=350, agt_speed:float=200,
+                 copy:bool=True, grid_rows:int=32, coord_dtype:str="float32"
+                 ) -> None:
+        """Runs num_envs speederbike worlds in batched arrays. Same dynamics, rewards and observations
+        as SpeederBikesEnv, but every step is a handful of NumPy calls over the whole batch.
+        Terminated worlds are reset automatically, their last observation and info are put in
+        info["final_observation"] and info["final_info"].
+        Args:
+            num_envs (int, optional): number of worlds. Defaults to 1.
+            render_mode (_type_, optional): rendering is not supported. Defaults to None.
+            observation_mode (str, optional): one of 'flatten', 'array', 'rgb_array', 'rgb_array_flatten', 'occupancy'.
+                Pixel observations are painted for all worlds at once by the Rasterizer. Defaults to "flatten".
+            copy (bool, optional): return a copy of the pixel observation buffer, like gymnasium's vector envs.
+                If False the same buffer is returned (and overwritten) every step. Defaults to True.
+            grid_rows (int, optional): rows of 'occupancy' observations, see SpeederBikesEnv. Defaults to 32.
+            coord_dtype (str, optional): dtype of 'array' and 'flatten' observations, 'float32' or 'float64'.
+                Defaults to "float32".
+        """
+        assert render_mode is None
+        self.render_mode = render_mode
+        assert observation_mode in self.metadata["observation_modes"]
+        self.observation_mode = observation_mode
+
+        self.window_size = 512
+        self._bg_color = (155, 155, 155)
+        self.copy = copy
+        assert coord_dtype in ["float32", "float64"]
+        self.coord_dtype = np.dtype(coord_dtype)
+        self._grid = OccupancyGrid(self.window_size, n_rows=grid_rows)
+
+        self.lvl_n_lanes = lvl_n_lanes
+        self.lvl_speed = lvl_speed
+        self.lvl_road_width = lvl_road_width
+        self.agt_speed = agt_speed
+
+        # same mapping as SpeederBikesEnv: left, stand still, right
+        self._action_to_direction = np.array([-1, 0, 1])
+
+        self._np_random = np.random.default_rng()
+        self.sim = self._make_simulation(num_envs)
+        self._rasterizer = None
+        self._frames = None
+
+        super().__init__(num_envs, self._define_observation_space(self.observation_mode), spaces.Discrete(3))
+
+    def _make_simulation(self, num_envs:int) -> BatchSimulation:
+        return BatchSimulation(num_envs, window_size=self.window_size, n_lanes=self.lvl_n_lanes, speed=self.lvl_speed,
+                               road_width=self.lvl_road_width, agt_speed=self.agt_speed, rng=self._np_random)
+
+    def _define_observation_space(self, mode:str) -> spaces.Space:
+        if mode == "rgb_array":
+            return spaces.Box(low=0, high=255, shape=(self.window_size, self.window_size, 3), dtype=np.uint8)
+        if mode == "rgb_array_flatten":
+            return spaces.Box(low=0, high=255, shape=(self.window_size * self.window_size * 3,), dtype=np.uint8)
+        if mode == "occupancy":
+            return spaces.Box(low=0, high=255, shape=(self._grid.n_bytes(self.sim.n_lanes),), dtype=np.uint8)
+
+        self.max_visible_obstcacles = np.ceil(self.window_size / self.sim.inter_obstacle_distance).astype(int)
+        self.n_entries_per_obstacle = (self.sim.n_lanes - 1) * 2 + 1
+        shape = (self.max_visible_obstcacles + 1, self.n_entries_per_obstacle)
+        if mode == "flatten":
+            shape = (shape[0] * shape[1],)
+        return spaces.Box(low=0, high=self.window_size - 1, shape=shape, dtype=self.coord_dtype)
+
+    def set_frame_buffer(self, buffer:np.ndarray) -> None:
+        """Paint pixel observations straight into an array owned by the caller, e.g. shared memory.
+        With copy=False the returned observations are views of it.
+        Args:
+            buffer (np.ndarray): C-contiguous (num_envs, H, W, 3) uint8 array
+        """
+        shape = (self.num_envs, self.window_size, self.window_size, 3)
+        if buffer.shape != shape or buffer.dtype != np.uint8 or not buffer.flags.c_contiguous:
+            raise ValueError(f"frame buffer must be a C-contiguous uint8 array of shape {shape}")
+        self._frames = buffer
+
+    def _make_array_observation(self, idx:np.ndarray|None=None) -> np.ndarray:
+        """Batched version of SpeederBikesEnv._make_array_observation.
+        Args:
+            idx (np.ndarray | None, optional): worlds to build the observation for. Defaults to None (all).
+        Returns:
+            np.ndarray: (len(idx), max_visible_obstcacles + 1, n_entries_per_obstacle)
+        """
+        sim = self.sim
+        idx = np.arange(self.num_envs) if idx is None else idx
+        n_rows = min(self.max_visible_obstcacles, sim.capacity)
+        obs = np.zeros((idx.shape[0], self.max_visible_obstcacles + 1, self.n_entries_per_obstacle), dtype=self.coord_dtype)
+
+        # agent: y and absolute x position
+        obs[:, 0, 0] = sim.agent_y
+        obs[:, 0, 1] = sim.agent_x[idx]
+
+        # obstacles, oldest first
+        slots, in_use = sim.ordered_slots()
+        slots, in_use = slots[idx, :n_rows], in_use[idx, :n_rows]
+        ys = sim.obstacle_y[idx[:, None], slots]
+        maps = sim.obstacle_map[idx[:, None], slots] & in_use[:, :, None]
+
+        # limits of the blocked parts, moved to the front in lane order. Empty obstacles are all zeros.
+        order = np.argsort(~maps, axis=-1, kind="stable")
+        present = np.take_along_axis(maps, order, axis=-1)
+        xs = np.where(present[..., None], sim.part_limits[order], 0).reshape(idx.shape[0], n_rows, -1)
+        obs[:, 1:n_rows+1, 0] = np.where(maps.any(axis=-1), ys, 0)
+        obs[:, 1:n_rows+1, 1:] = xs[:, :, :self.n_entries_per_obstacle - 1]
+        return obs
+
+    def _make_rgb_observation(self, idx:np.ndarray|None=None) -> np.ndarray:
+        """Paint the frames of all (or the selected) worlds into the persistent frame buffer.
+        Returns:
+            np.ndarray: (len(idx), H, W, 3) uint8
+        """
+        sim = self.sim
+        if self._rasterizer is None or (self._rasterizer.road_width, self._rasterizer.n_lanes) != (sim.width, sim.n_lanes):
+            self._rasterizer = Rasterizer(self.window_size, sim.width, sim.n_lanes, bg_color=self._bg_color)
+        if self._frames is None:
+            self._frames = np.zeros((self.num_envs, self.window_size, self.window_size, 3), dtype=np.uint8)
+
+        in_use = (np.arange(sim.capacity) - sim.obstacle_head[:, None]) % sim.capacity < sim.n_obstacles[:, None]
+        if idx is None:
+            return self._rasterizer.render_batch(sim.agent_x, sim.obstacle_y, sim.obstacle_map, in_use, out=self._frames)
+        frames = self._rasterizer.render_batch(sim.agent_x[idx], sim.obstacle_y[idx], sim.obstacle_map[idx], in_use[idx])
+        self._frames[idx] = frames
+        return frames
+
+    def _make_occupancy_observation(self, idx:np.ndarray|None=None) -> np.ndarray:
+        """Batched version of SpeederBikesEnv's 'occupancy' observation.
+        Returns:
+            np.ndarray: (len(idx), n_bytes) uint8
+        """
+        sim = self.sim
+        idx = np.arange(self.num_envs) if idx is None else idx
+        in_use = (np.arange(sim.capacity) - sim.obstacle_head[idx, None]) % sim.capacity < sim.n_obstacles[idx, None]
+        return self._grid.encode(sim.agent_x[idx] - sim.left_border, sim.agt_size, sim.obstacle_y[idx],
+                                 sim.obstacle_map[idx], sim.part_limits, sim.obstacle_height, in_use=in_use)
+
+    def _get_obs(self, idx:np.ndarray|None=None) -> np.ndarray:
+        if self.observation_mode == "occupancy":
+            return self._make_occupancy_observation(idx)
+        if self.observation_mode in ["rgb_array", "rgb_array_flatten"]:
+            obs = self._make_rgb_observation(idx)
+            if idx is None and self.copy:
+                obs = obs.copy()
+        else:
+            obs = self._make_array_observation(idx)
+        if self.observation_mode in ["flatten", "rgb_array_flatten"]:
+            obs = obs.reshape(obs.shape[0], -1)
+        return obs
+
+    def _get_distance(self) -> np.ndarray:
+        # distance to the next obstacle, see SpeederBikesEnv._get_info
+        sim = self.sim
+        slots, _ = sim.ordered_slots()
+        env_idx = np.arange(self.num_envs)
+        distance = sim.agent_y - sim.obstacle_y[env_idx, slots[:, 0]]
+        behind = distance < 0
+        distance[behind] = sim.agent_y - sim.obstacle_y[env_idx[behind], slots[behind, 1]]
+        return distance
+
+    def _get_info(self) -> dict:
+        return {
+            "distance": self._get_distance(),
+            "_distance": np.ones(self.num_envs, dtype=bool)
+        }
+
+    def reset(self, *, seed:int|List[int]|None = None, options:dict={}) -> Tuple[np.ndarray, dict]:
+        """Resets all worlds. Possible option keys are the same as for SpeederBikesEnv.reset and apply to all worlds.
+        Args:
+            seed (int | List[int] | None, optional): seed for the shared RNG. Defaults to None.
+            options (dict, optional): sets environment behaviour. Defaults to {}.
+        Returns:
+            Tuple[np.ndarray, dict]: batched observation, information
+        """
+        if seed is not None:
+            self._np_random = np.random.default_rng(seed)
+
+        self.lvl_n_lanes = options["lvl_n_lanes"] if "lvl_n_lanes" in options.keys() else self.lvl_n_lanes
+        self.lvl_speed = options["lvl_speed"] if "lvl_speed" in options.keys() else self.lvl_speed
+        self.lvl_road_width = options["lvl_road_width"] if "lvl_road_width" in options.keys() else self.lvl_road_width
+        self.agt_speed = options["agt_speed"] if "agt_speed" in options.keys() else self.agt_speed
+
+        self.sim = self._make_simulation(self.num_envs)
+
+        self.single_observation_space = self._define_observation_space(self.observation_mode)
+        self.observation_space = batch_space(self.single_observation_space, self.num_envs)
+
+        return self._get_obs(), self._get_info()
+
+    def get_state(self, index:int) -> np.ndarray:
+        """Snapshot of one world, same format as SpeederBikesEnv.get_state.
+        Returns:
+            np.ndarray: 0-d record of core.state.STATE_DTYPE
+        """
+        return self.sim.get_state(index)
+
+    def set_state(self, state:np.ndarray|bytes, mask:np.ndarray|None=None) -> np.ndarray:
+        """Restore one snapshot (of this env or of a SpeederBikesEnv with the same level parameters) into all or the
+        selected worlds at once, e.g. to branch rollouts from a state. The worlds share one RNG, which is not restored,
+        so they continue with different obstacles.
+        Args:
+            state (np.ndarray | bytes): snapshot, see SpeederBikesEnv.get_state
+            mask (np.ndarray | None, optional): (num_envs,) boolean selection. Defaults to None (all).
+        Returns:
+            np.ndarray: batched observation
+        """
+        self.sim.set_state(state, mask)
+        return self._get_obs()
+
+    def step(self, actions:Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Step all worlds once.
+        Args:
+            actions (Any): (num_envs,) actions in [0, 1, 2]
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]: obs, rewards, terminated, truncated, info
+        """
+        directions = self._action_to_direction[np.asarray(actions).reshape(self.num_envs)]
+        dt = 1 / self.metadata["render_fps"]
+
+        self.sim.update(directions, dt)
+        terminated = self.sim.collided()
+        rewards = np.where(terminated, -100., 1.)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+
+        observation = self._get_obs()
+        info = self._get_info()
+
+        if terminated.any():
+            # autoreset like gymnasium's vector envs: keep the final step in the info
+            done = np.flatnonzero(terminated)
+            final_observation = np.full(self.num_envs, None, dtype=object)
+            final_info = np.full(self.num_envs, None, dtype=object)
+            for i in done:
+                final_observation[i] = observation[i].copy()
+                final_info[i] = {"distance": info["distance"][i]}
+            info["final_observation"], info["_final_observation"] = final_observation, terminated.copy()
+            info["final_info"], info["_final_info"] = final_info, terminated.copy()
+
+            self.sim.reset(terminated)
+            observation[done] = self._get_obs(done)
+            info["distance"] = self._get_distance()
+
+        return observation, rewards, terminated, truncated, info
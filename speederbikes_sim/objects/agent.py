@@ -2,6 +2,7 @@ import pygame
 import numpy as np
 
 from speederbikes_sim.objects.level import Level
+from speederbikes_sim.core.collision import find_collision
 
 # inherit from sprite class?
 class Agent(pygame.sprite.Sprite):
@@ -24,15 +25,10 @@ class Agent(pygame.sprite.Sprite):
         self.y = y
 
         # =====
-        self.image = pygame.Surface([self.size*2, self.size*2])
-        self.image.fill((0, 155, 155))
-        self.body = pygame.draw.circle(
-            self.image,
-            self.color,
-            (self.size, self.size),
-            self.size
-        )
-        self.rect = self.image.get_rect()
+        # the image is only drawn once it is needed for rendering
+        self._image:pygame.Surface = None
+        self.body:pygame.Rect = None
+        self.rect = pygame.Rect(0, 0, self.size*2, self.size*2)
 
         # put own sprite in a group
         self.group = pygame.sprite.GroupSingle(self)
@@ -41,23 +37,43 @@ class Agent(pygame.sprite.Sprite):
         self.rect.x = self.x - self.size
         self.rect.y = self.y - self.size
 
+    def reset(self, x:int, speed:float) -> None:
+        """Move the agent back to x, e.g. when the env is reset in place."""
+        self.x = x
+        self.speed = speed
+        self.rect.x = self.x - self.size
+
+    @property
+    def image(self) -> pygame.Surface:
+        if self._image is None:
+            self._image = pygame.Surface([self.size*2, self.size*2])
+            self._image.fill((0, 155, 155))
+            self.body = pygame.draw.circle(
+                self._image,
+                self.color,
+                (self.size, self.size),
+                self.size
+            )
+        return self._image
+
+    def collision(self) -> tuple[int, int] | None:
+        """Checks if this agent collides with one of the level's obstacles. The agent's rectangular surface is used as
+        collider box and tested against all obstacle parts at once, see core.collision.
+        Returns:
+            tuple[int, int] | None: index of the hit obstacle in level.obstacles and lane, None if there was no collision
+        """
+        obstacles = self.level.obstacles
+        ys = np.fromiter((obstacle.y for obstacle in obstacles), dtype=float, count=len(obstacles))
+        maps = np.array([obstacle.map for obstacle in obstacles], dtype=bool)
+        return find_collision(self.x - self.level.left_border, self.y, self.size,
+                              ys, maps, self.level.part_limits, obstacles[0].obstacle_height)
+
     def collided(self):
         """Checks if this agent collides with one of the level's obstacles using custom collision logic.
         Returns:
-            _type_: _description_
+            bool: whether there was a collision or not.
         """
-        colliders = pygame.sprite.spritecollide(self, self.level.obstacles_sprite_group, dokill=False, collided=self.level._checkCollision)
-
-        return len(colliders) > 0
-
-        # if len(colliders) > 0:
-        #     print(f"# of detected collisions: {len(colliders)}")
-        #     for collider in colliders:
-        #         print(collider.map)
-        #     return True	
-        
-        # return False
-
+        return self.collision() is not None
 
     def update(self, action:int, dt):
         assert( action in [-1, 0, 1] )
@@ -0,0 +1,78 @@
+import pygame
+from functools import lru_cache
+
+from speederbikes_sim.objects.road import Road
+
+@lru_cache(maxsize=8)
+def static_layer(window_size:int, road_width:int, road_x:int, bg_color:tuple, road_color:tuple) -> pygame.Surface:
+    """Background and road of a level, prerendered once per geometry. Nothing on it changes between frames.
+    The returned surface is shared and must not be drawn on.
+    Args:
+        window_size (int): size of the (square) window in pixels
+        road_width (int): width of the road incl. border lines
+        road_x (int): x position of the road in the window
+        bg_color (tuple): background color
+        road_color (tuple): road color
+    Returns:
+        pygame.Surface: (window_size, window_size) surface
+    """
+    layer = pygame.Surface((window_size, window_size))
+    layer.fill(bg_color)
+    road = Road(road_width, window_size, color=road_color)
+    layer.blit(road.image, (road_x, 0))
+    return layer
+
+class DirtyRectCanvas():
+    def __init__(self, size:tuple) -> None:
+        """Canvas on top of a static layer of which only the parts that sprites touched are redrawn.
+        Every frame restore() puts the static layer back where sprites were drawn in the last frame,
+        then the sprites are drawn with blit(), which remembers their rects for the next frame.
+        Args:
+            size (tuple): size of the canvas
+        """
+        self.surface = pygame.Surface(size)
+        self.background:pygame.Surface = None
+        # rects drawn in the current frame
+        self._dirty:list = []
+        # rects changed since the last call of take_updates(), only collected if track_updates is set
+        self.track_updates = False
+        self._updates:list = []
+
+    def set_background(self, background:pygame.Surface) -> None:
+        """Use another static layer. Redraws the whole canvas if it changed."""
+        if background is self.background:
+            return
+        self.background = background
+        self.surface.blit(background, (0, 0))
+        self._dirty = []
+        if self.track_updates:
+            self._updates = [self.surface.get_rect()]
+
+    def restore(self) -> None:
+        """Put the static layer back where sprites were drawn in the last frame."""
+        for rect in self._dirty:
+            self.surface.blit(self.background, rect, rect)
+        if self.track_updates:
+            self._updates.extend(self._dirty)
+        self._dirty = []
+
+    def blit(self, image:pygame.Surface, rect:pygame.Rect) -> pygame.Rect:
+        """Draw a sprite image and remember where.
+        Returns:
+            pygame.Rect: the part of the canvas that was drawn on
+        """
+        drawn = self.surface.blit(image, rect)
+        # sprites outside of the canvas don't touch it
+        if drawn.width > 0 and drawn.height > 0:
+            self._dirty.append(drawn)
+            if self.track_updates:
+                self._updates.append(drawn)
+        return drawn
+
+    def take_updates(self) -> list:
+        """Returns:
+            list: rects changed since the last call, e.g. for pygame.display.update(rects)
+        """
+        updates = self._updates
+        self._updates = []
+        return updates
@@ -1,11 +1,16 @@
 import pygame
 from speederbikes_sim.objects.road import Road
-from speederbikes_sim.objects.obstacle import Obstacle
+from speederbikes_sim.objects.layers import DirtyRectCanvas
+from speederbikes_sim.objects.obstacle import Obstacle, ObstacleSpriteCache, obstacle_cache
+from speederbikes_sim.core.maps import MapSampler
+from speederbikes_sim.core.tape import LevelTape
 
 import numpy as np
 
 class Level(pygame.sprite.Sprite):
-    def __init__(self, window_size:int, n_lanes:int=5, speed:float=200., road_width:int=350) -> None:
+    def __init__(self, window_size:int, n_lanes:int=5, speed:float=200., road_width:int=350,
+                 np_random:np.random.Generator|None=None, obstacle_cache:ObstacleSpriteCache|None=obstacle_cache,
+                 tape:LevelTape|None=None, tape_offset:int=0) -> None:
         super().__init__()
         self.n_lanes = n_lanes
         self.speed = speed
@@ -13,16 +18,23 @@ class Level(pygame.sprite.Sprite):
         self.height = window_size
 
         # =======
-        self.inter_obstacle_distance = 220
+        # obstacles are played back from the tape instead of sampled, if there is one (see core.tape)
+        self.tape = tape
+        self.tape_offset = tape_offset
+        if tape is not None and tape.n_lanes != n_lanes:
+            raise ValueError(f"tape of {tape.n_lanes} lanes for a level of {n_lanes} lanes")
+        self.inter_obstacle_distance = 220 if tape is None else tape.inter_obstacle_distance
+        # distance the newest obstacle travels before the next one spawns
+        self.spawn_distance:float = self.inter_obstacle_distance
         self.obstacle_entry_y = 0 # values < 0 lead to obstacles not being rendered
         self.obstacle_exit_y = self.height
 
         # =======
-        # create surface to draw level on
-        self.image = pygame.Surface([road_width, self.height])
+        # surface to draw level on, created once it is needed for rendering
+        self._image:pygame.Surface = None
 
         # center surface
-        self.rect = self.image.get_rect()
+        self.rect = pygame.Rect(0, 0, road_width, self.height)
         window_width:int = window_size
         self.rect.x = (window_width - self.width) / 2
 
@@ -35,11 +47,25 @@ class Level(pygame.sprite.Sprite):
 
 
 
-        # generates a pseudo-random, infinite number of obstacles
+        # generates a pseudo-random, infinite number of obstacles from the given (seeded) generator
+        self.np_random = np.random.default_rng() if np_random is None else np_random
+        self.map_sampler = MapSampler(self.n_lanes)
+        # code of the newest obstacle's map, see core.maps
+        self.last_code:int|None = None
+
+        # obstacles take their images from this cache, None draws a new image for every obstacle
+        self.obstacle_cache = obstacle_cache
+
         # create sprite group to hold all the obstacles
         self.obstacles_sprite_group = pygame.sprite.Group()
         # a list for my own obstacle management
         self.obstacles:list = []
+        # removed obstacles kept for reuse by set_obstacles
+        self._spare_obstacles:list = []
+        # number of obstacles created so far
+        self.n_spawned:int = 0
+        # part limits are the same for all obstacles, set with the first one
+        self.part_limits:np.ndarray = None
 
         # add initially two obstacles.
         # TODO figure out why this isn't working
@@ -50,6 +76,12 @@ class Level(pygame.sprite.Sprite):
         self._addObstacle()
             
 
+    @property
+    def image(self) -> pygame.Surface:
+        if self._image is None:
+            self._image = pygame.Surface([self.width, self.height])
+        return self._image
+
     def _createObstacle(self, map:np.array, y:int|None=None) -> Obstacle:
         """Create new obstacle in the level's road.
         Returns:
@@ -61,7 +93,8 @@ class Level(pygame.sprite.Sprite):
                                 width=self.road.lane_width, 
                                 map=map, 
                                 speed=self.speed, 
-                                background_color=self.road.color)
+                                background_color=self.road.color,
+                                cache=self.obstacle_cache)
         return new_obstacle
 
     def _deleteObstacle(self, obstacle:Obstacle) -> None:
@@ -75,104 +108,86 @@ class Level(pygame.sprite.Sprite):
         del(obstacle)
 
     def _addObstacle(self, y:int|None=None) -> None:
-        """Sample a random map and check if it fits the current rules.
+        """Sample a random map that fits the current rules, given the last map.
         Create new obstacle according to the map.
         Add obstacle to self.obstalces.
         """
         assert (self.obstacles is not None)
-        # get last map if available
-        try:
-            last_map = self.obstacles[-1].map
-        except IndexError:
-            # if there is no last obstacle then this is fine
-            last_map = None
-
-        # define rules the new map has to fulfill
-        def _isViable(map:np.array, last_map:np.array) -> bool:
-            if map.sum() == self.n_lanes:
-                return False
-            
-            # We generally don't want to have a free lane.
-            # only generally though.
-            if map.sum() == 0:
-                if np.random.random() < 0.15:
-                    return True
-                else:
-                    return False
-            
-            if last_map is not None:
-                n_twice_empty_slots = ((map == 0) & (last_map == 0)).sum()
-
-                # if there are holes at the same spot in at least 40 % of the slots or (2 slots in 5 lane case) in at least 2 slots,
-                # let it go through in 5 % of cases
-                if n_twice_empty_slots >= max( int(round(0.4 * self.n_lanes, 0)), 2):
-                    if np.random.random() < 0.05:
-                        return True
-                    else:
-                        return False
-                    
-                # if there are holes at the same spot in at least 20 % of the slots (1 slot in 3 or 5 lane case),
-                # let it go through in 20 % of cases
-                if n_twice_empty_slots >= int(round(0.2 * self.n_lanes, 0)):
-                    if np.random.random() < 0.2:
-                        return True
-                    else:
-                        return False
-
-            # seems fine so far!
-            return True
-
-        # sample random obstacles until one fulfills all the rules
-        map = np.random.randint(0, 2, size=self.n_lanes)
-        i = 0
-        while not _isViable(map, last_map):
-            # print(f"DEBUG: last inviable map: {map}")
-            map = np.random.randint(0, 2, size=self.n_lanes)
-            i += 1
-        # print(f"DEBUG: # of resamples needed: {i}")
-
-        # create and append new obstacle
-        new_obstacle = self._createObstacle(map, y)
+        if self.tape is None:
+            self.last_code = self.map_sampler.sample(self.last_code, self.np_random)
+        else:
+            self.last_code = self.tape.code(self.tape_offset + self.n_spawned)
+            self.spawn_distance = self.tape.spawn_distance(self.tape_offset + self.n_spawned)
+        map = self.map_sampler.to_map(self.last_code).astype(int)
+
+        # create and append new obstacle, reuse a removed one if there is any
+        if self._spare_obstacles:
+            new_obstacle = self._spare_obstacles.pop()
+            new_obstacle.respawn(self.obstacle_entry_y if y is None else y, map, self.speed)
+        else:
+            new_obstacle = self._createObstacle(map, y)
         self.obstacles.append(new_obstacle)
         self.obstacles_sprite_group.add(new_obstacle)
+        self.n_spawned += 1
+        if self.part_limits is None:
+            self.part_limits = np.array(new_obstacle.part_limits)
 
 
-    def _checkCollision(self, agent:pygame.sprite.Sprite, obstacle:pygame.sprite.Sprite) -> bool:
-        """Collision logic. Currently, the agent's rectangular surface is used as coolider box
+    def reset(self, speed:float, np_random:np.random.Generator, tape_offset:int=0) -> None:
+        """Start over in place with the same geometry: removes all obstacles (keeping their sprites for reuse)
+        and spawns the first one, like a new Level.
         Args:
-            agent (pygame.sprite.Sprite): game agent
-            obstacle (pygame.sprite.Sprite): one obstacle
-        Returns:
-            bool: whether there was a collision or not.
+            speed (float): obstacle speed
+            np_random (np.random.Generator): generator for the obstacle maps
+            tape_offset (int, optional): tape position of the first obstacle. Defaults to 0.
         """
-        # use simple logic for now. This could be done better by using sprites all the way.
-        agent_center_x = agent.x - agent.level.left_border
-        a_l = agent_center_x - agent.size # left
-        a_r = agent_center_x + agent.size # right
-        a_t = agent.y - agent.size # top
-        a_b = agent.y + agent.size # bottom
-
-        o_t = obstacle.y # obstacle top bound
-        o_b = obstacle.y + obstacle.obstacle_height # obstacle bottom bound
-
-        # print(f"agent: {(a_l, a_r, a_t, a_b)} | obstacle: {(o_t, o_b)}")
-        # if they overlap in the y dimension:
-        if (a_t <= o_b) and (a_b >= o_t):
-            for i, pos in enumerate(obstacle.map):
-                if pos:
-                    o_l, o_r = obstacle.part_limits[i] # obstacle bounds left and right
-                    # check for overlaps in x dimension and return True if overlapping
-                    if (a_r >= o_l) and (a_l <= o_r):
-                        return True
-        return False
+        for obstacle in self.obstacles:
+            obstacle.kill()
+        self._spare_obstacles.extend(reversed(self.obstacles))
+        self.obstacles.clear()
 
+        self.speed = speed
+        self.np_random = np_random
+        self.tape_offset = tape_offset
+        self.spawn_distance = self.inter_obstacle_distance
+        self.last_code = None
+        self.n_spawned = 0
+        self._addObstacle()
+
+    def set_obstacles(self, ys:np.ndarray, maps:np.ndarray, n_spawned:int, last_code:int|None) -> None:
+        """Replace all obstacles, e.g. to restore a state. Existing obstacle sprites are reused.
+        Args:
+            ys (np.ndarray): (n,) y positions, oldest first
+            maps (np.ndarray): (n, n_lanes) maps
+            n_spawned (int): number of obstacles created so far
+            last_code (int | None): code of the newest obstacle's map, see core.maps
+        """
+        while len(self.obstacles) > len(ys):
+            obstacle = self.obstacles.pop()
+            obstacle.kill()
+            self._spare_obstacles.append(obstacle)
+        while len(self.obstacles) < len(ys):
+            map = maps[len(self.obstacles)]
+            obstacle = self._spare_obstacles.pop() if self._spare_obstacles else self._createObstacle(map)
+            self.obstacles.append(obstacle)
+            self.obstacles_sprite_group.add(obstacle)
+
+        for obstacle, y, map in zip(self.obstacles, ys, maps):
+            obstacle.set_map(map)
+            obstacle.y = float(y)
+            obstacle.rect.y = obstacle.y
+            # spares keep the speed of the level they were removed from
+            obstacle.speed = self.speed
+        self.n_spawned = n_spawned
+        self.last_code = last_code
+        if self.tape is not None:
+            self.spawn_distance = self.tape.spawn_distance(self.tape_offset + n_spawned - 1)
 
     def update(self, dt):
-        # update road
-        self.road.update()
+        # the road is static, it is drawn once when it is created
 
         # check if new obstacle should be created
-        if self.obstacles[-1].y >= self.inter_obstacle_distance:
+        if self.obstacles[-1].y >= self.spawn_distance:
             self._addObstacle()
 
         # check if old obstacle should be deleted
@@ -195,4 +210,11 @@ class Level(pygame.sprite.Sprite):
         #     obstacle.render(self.image)
 
         # render level canvas on given canvas
-        canvas.blit(self.image, self.rect)
\ No newline at end of file
+        canvas.blit(self.image, self.rect)
+
+    def draw(self, canvas:DirtyRectCanvas) -> None:
+        """Draw only the obstacles, onto a canvas that already shows the road (see layers.static_layer).
+        Pixel-identical to render, which redraws the whole road.
+        """
+        for obstacle in self.obstacles:
+            canvas.blit(obstacle.image, obstacle.rect.move(self.rect.topleft))
@@ -0,0 +1,14 @@
+import pygame
+from functools import lru_cache
+
+from speederbikes_sim.core.npc import NPC_COLOR, NPC_BG_COLOR
+
+@lru_cache(maxsize=8)
+def npc_image(size:int, color:tuple=NPC_COLOR, background_color:tuple=NPC_BG_COLOR) -> pygame.Surface:
+    """Image of an NPC of the given radius, drawn like the agent. Shared by all NPCs and not to be drawn on.
+    Pixel-identical to core.npc.npc_sprite.
+    """
+    image = pygame.Surface([size*2, size*2])
+    image.fill(background_color)
+    pygame.draw.circle(image, color, (size, size), size)
+    return image
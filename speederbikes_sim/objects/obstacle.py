@@ -1,7 +1,103 @@
 import pygame
+import numpy as np
+from collections import OrderedDict
+
+def _partLimits(width:int, n_parts:int) -> list:
+    part_width = int(round(width / n_parts))
+    part_limits = [[(part_width) * i, (part_width) * (i+1) - 1] for i in range(n_parts)]
+
+    # because of rounding errors the most right limit may not coincide with the right border of image.
+    part_limits[-1][1] = width
+
+    # # manually add one to the last part's right border (because of pixel-perfect matching road width)
+    # part_limits[-1][1] += 1
+    return part_limits
+
+def _drawObstacle(width:int, map:tuple, color:tuple, background_color:tuple, obstacle_height:int, y:int) -> tuple:
+    """Draw the image of an obstacle.
+    Returns:
+        tuple: image, part limits and rects of the drawn parts
+    """
+    part_limits = _partLimits(width, len(map))
+
+    image = pygame.Surface([width, obstacle_height])
+    image.fill(background_color)
+
+    parts = []
+    for i, entry in enumerate(map):
+        if entry:
+            part = pygame.draw.line(
+                image,
+                color,
+                (part_limits[i][0], y),
+                (part_limits[i][1], y),
+                width=obstacle_height # self.width
+            )
+            parts.append(part)
+    return image, part_limits, parts
+
+class ObstacleSpriteCache():
+    def __init__(self, maxsize:int=256) -> None:
+        """Prerendered obstacle images and part limits, shared by all obstacles with the same look.
+        There are only 2^n_lanes maps per geometry and color, so obstacles don't need their own surface.
+        The least recently used entry is evicted once maxsize entries are stored.
+        Cached images and part limits are shared and must not be modified.
+        Args:
+            maxsize (int, optional): maximum number of stored images. Defaults to 256.
+        """
+        assert maxsize > 0
+        self.maxsize = maxsize
+        self._entries:OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # (width, n_parts) -> part limits. Needed without drawing anything, kept apart from the images.
+        self._part_limits:dict = {}
+
+    def part_limits(self, width:int, n_parts:int) -> tuple:
+        key = (width, n_parts)
+        if key not in self._part_limits:
+            self._part_limits[key] = tuple(tuple(limits) for limits in _partLimits(width, n_parts))
+        return self._part_limits[key]
+
+    def get(self, width:int, map:tuple, color:tuple, background_color:tuple, obstacle_height:int, y:int) -> tuple:
+        """Args:
+            see Obstacle
+        Returns:
+            tuple: image, part limits and rects of the drawn parts
+        """
+        key = (width, len(map), tuple(color), tuple(background_color), obstacle_height, y,
+               np.asarray(map, dtype=bool).tobytes())
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        image, part_limits, parts = _drawObstacle(width, map, color, background_color, obstacle_height, y)
+        entry = (image, tuple(tuple(limits) for limits in part_limits), tuple(parts))
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def info(self) -> dict:
+        """Returns:
+            dict: hits, misses, current and maximum size
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+# shared by all levels (and SimulationView) of the process
+obstacle_cache = ObstacleSpriteCache()
 
 class Obstacle(pygame.sprite.Sprite):
-    def __init__(self, x:int, y:int, width:int, map:tuple, speed:float=300., color:tuple=(222, 222, 222), background_color:tuple=(0,0,0)) -> None:
+    def __init__(self, x:int, y:int, width:int, map:tuple, speed:float=300., color:tuple=(222, 222, 222), background_color:tuple=(0,0,0),
+                 cache:ObstacleSpriteCache|None=None) -> None:
         # contains the obstacle parts arranges such that there is at least one hole.
         super().__init__()
         self.x = x
@@ -15,42 +111,59 @@ class Obstacle(pygame.sprite.Sprite):
 
         # ======
         self.n_parts = len(map)
-        self.part_width = int(round(self.width / self.n_parts))
-        self.part_limits = [[(self.part_width) * i, (self.part_width) * (i+1) - 1] for i in range(self.n_parts)]
-
-        # because of rounding errors the most right limit may not coincide with the right border of image.
-        self.part_limits[-1][1] = self.width
-
-        # # manually add one to the last part's right border (because of pixel-perfect matching road width)
-        # self.part_limits[-1][1] += 1
-
-        # ======
         self.obstacle_height = 5
 
         # # DEBUG
         # if self.y > 0:
         #     self.background_color = (200, 0, 0)
 
-        self.image = pygame.Surface([self.width, self.obstacle_height])
-        self.image.fill(self.background_color)
-        
-        self.rect = self.image.get_rect()
+        # image and part limits only depend on the look, take them from the cache if there is one.
+        # The image is only drawn once it is needed for rendering.
+        self.cache = cache
+        self._image:pygame.Surface = None
+        self.parts:tuple = None
+        # parts are drawn at the y position the obstacle was created at
+        self._draw_y = self.y
+        if cache is None:
+            self.part_limits = _partLimits(self.width, self.n_parts)
+        else:
+            self.part_limits = cache.part_limits(self.width, self.n_parts)
+        self.part_width = int(round(self.width / self.n_parts))
+
+        self.rect = pygame.Rect(0, 0, self.width, self.obstacle_height)
         self.rect.x = self.x
         self.rect.y = self.y
 
-        self.parts = []
-        for i, entry in enumerate(self.map):
-            if entry:
-                # print(f"DEBUG: self.part_limits[{i}]: {self.part_limits[i]}" )
-                part = pygame.draw.line(
-                    self.image, 
-                    self.color,
-                    (self.part_limits[i][0], self.y),
-                    (self.part_limits[i][1], self.y),
-                    width=self.obstacle_height # self.width
-                )
-                self.parts.append(part)
+    @property
+    def image(self) -> pygame.Surface:
+        if self._image is None:
+            if self.cache is None:
+                self._image, _, self.parts = _drawObstacle(
+                    self.width, self.map, self.color, self.background_color, self.obstacle_height, self._draw_y)
+            else:
+                self._image, _, self.parts = self.cache.get(
+                    self.width, self.map, self.color, self.background_color, self.obstacle_height, self._draw_y)
+        return self._image
     
+    def set_map(self, map:tuple) -> None:
+        """Give the obstacle another map, e.g. when it is reused to restore a state. The image is redrawn lazily."""
+        if np.array_equal(self.map, map):
+            return
+        self.map = map
+        self._image = None
+        self.parts = None
+
+    def respawn(self, y:float, map:tuple, speed:float) -> None:
+        """Reuse the obstacle as a new one at y, the image is only redrawn if it looks different."""
+        self.set_map(map)
+        if y != self._draw_y:
+            self._draw_y = y
+            self._image = None
+            self.parts = None
+        self.y = y
+        self.rect.y = y
+        self.speed = speed
+
     def update(self, dt) -> None:
         self.y = self.y + self.speed * dt
         self.rect.y = self.y
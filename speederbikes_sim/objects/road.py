@@ -11,11 +11,17 @@ class Road(pygame.sprite.Sprite):
         self.line_width = 3
         self.lane_width = self.width - self.line_width * 2
 
-        self.image = pygame.Surface([self.width, self.height])
-        self.rect = self.image.get_rect()
+        # the image is only drawn once it is needed for rendering
+        self._image:pygame.Surface = None
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
 
-        # fill with background color and add left and right lines
-        self.update()
+    @property
+    def image(self) -> pygame.Surface:
+        if self._image is None:
+            self._image = pygame.Surface([self.width, self.height])
+            # fill with background color and add left and right lines
+            self.update()
+        return self._image
 
     def _addBorderLines(self):
         self.left_line = pygame.draw.line(
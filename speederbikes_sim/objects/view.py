@@ -0,0 +1,47 @@
+import pygame
+
+from speederbikes_sim.objects.road import Road
+from speederbikes_sim.objects.obstacle import obstacle_cache
+from speederbikes_sim.objects.agent import Agent
+from speederbikes_sim.objects.layers import DirtyRectCanvas
+from speederbikes_sim.core.simulation import Simulation
+
+class SimulationView():
+    def __init__(self, sim:Simulation) -> None:
+        """Draws a headless Simulation with the same sprites the pygame objects use.
+        Only created once something is actually rendered.
+        Args:
+            sim (Simulation): simulation to draw
+        """
+        self.sim = sim
+
+        # area of the level, centered like Level
+        self.rect = pygame.Rect(0, 0, sim.width, sim.height)
+        self.rect.x = (sim.height - sim.width) / 2
+
+        self.road = Road(sim.width, sim.height)
+
+        # obstacle images come from the shared cache, they only differ in position
+        self.obstacle_cache = obstacle_cache
+        self._obstacle_rect = None
+
+        self.agent = Agent(x=sim.agent_x, y=sim.agent_y, level=None, size=sim.agt_size, speed=sim.agt_speed)
+
+    def _getObstacleImage(self, map) -> pygame.Surface:
+        image, _, _ = self.obstacle_cache.get(self.road.lane_width, map, (222, 222, 222), self.road.color,
+                                              self.sim.obstacle_height, self.sim.obstacle_entry_y)
+        return image
+
+    def draw(self, canvas:DirtyRectCanvas) -> None:
+        """Draw only obstacles and agent, onto a canvas that already shows the road (see layers.static_layer).
+        """
+        for y, map in zip(self.sim.obstacles_y, self.sim.obstacles_map):
+            image = self._getObstacleImage(map)
+            if self._obstacle_rect is None:
+                self._obstacle_rect = image.get_rect()
+                self._obstacle_rect.x = self.road.line_width
+            self._obstacle_rect.y = y
+            canvas.blit(image, self._obstacle_rect.move(self.rect.topleft))
+
+        self.agent.rect.x = self.sim.agent_x - self.agent.size
+        canvas.blit(self.agent.image, self.agent.rect)
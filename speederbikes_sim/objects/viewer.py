@@ -0,0 +1,93 @@
+import threading
+import numpy as np
+
+from speederbikes_sim.core.raster import SceneRasterizer
+
+# Human-mode display decoupled from the simulation. step() only publishes the scene, a few small arrays, and returns.
+# A display thread owns the window: it takes the latest scene, paints it with the NumPy rasterizer and paces itself
+# to the frame rate. The scene slot and the scene being drawn form a double buffer. A scene published while the
+# previous one still waits is replaced, i.e. the viewer drops frames instead of blocking the simulation.
+# All pygame calls happen on the display thread, which SDL supports on Linux and Windows but not on macOS.
+
+class ThreadedViewer():
+    def __init__(self, window_size:int, fps:int=60, bg_color:tuple=(155, 155, 155), caption:str="Speederbikes") -> None:
+        """Opens the window on a background thread.
+        Args:
+            window_size (int): size of the (square) window in pixels
+            fps (int, optional): maximum frame rate of the display. Defaults to 60.
+            bg_color (tuple, optional): background color. Defaults to (155, 155, 155).
+            caption (str, optional): window title. Defaults to "Speederbikes".
+        """
+        self.window_size = window_size
+        self.fps = fps
+        self.bg_color = bg_color
+        self.caption = caption
+
+        self._lock = threading.Lock()
+        self._pending:tuple = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+        # counters, read them for monitoring
+        self.n_published = 0
+        self.n_shown = 0
+        self.n_dropped = 0
+
+        self._thread = threading.Thread(target=self._run, name="speederbikes-viewer", daemon=True)
+        self._thread.start()
+
+    def publish(self, scene:tuple) -> None:
+        """Hand the latest scene to the display thread. Never blocks on drawing.
+        Args:
+            scene (tuple): see core.raster.SceneRasterizer. The arrays must not be modified afterwards.
+        """
+        with self._lock:
+            if self._pending is not None:
+                self.n_dropped += 1
+            self._pending = scene
+            self.n_published += 1
+        self._wake.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _take(self) -> tuple | None:
+        with self._lock:
+            scene, self._pending = self._pending, None
+            self._wake.clear()
+        return scene
+
+    def _run(self) -> None:
+        import pygame
+        pygame.display.init()
+        window = pygame.display.set_mode((self.window_size, self.window_size))
+        pygame.display.set_caption(self.caption)
+        clock = pygame.time.Clock()
+
+        rasterizer = SceneRasterizer(self.window_size, self.bg_color)
+        frame = np.zeros((self.window_size, self.window_size, 3), dtype=np.uint8)
+        try:
+            while not self._stop.is_set():
+                # the window has to keep handling events even if nothing is published
+                self._wake.wait(timeout=0.1)
+                pygame.event.pump()
+                scene = self._take()
+                if scene is None:
+                    continue
+
+                rasterizer.render(scene, out=frame)
+                pygame.surfarray.blit_array(window, frame.transpose(1, 0, 2))
+                pygame.display.flip()
+                self.n_shown += 1
+
+                # pacing only delays the display thread
+                clock.tick(self.fps)
+        finally:
+            pygame.display.quit()
+
+    def close(self, timeout:float=1.) -> None:
+        """Stop the display thread and close the window."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
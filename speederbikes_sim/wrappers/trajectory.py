@@ -0,0 +1,208 @@
+import gymnasium as gym
+import json
+import numpy as np
+from typing import Any, Iterator, Tuple
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+# An episode is fully determined by the reset seed, the level options and the actions, since obstacles are drawn from
+# the env's seeded RNG. Actions are in [0, 1, 2] and take 2 bits each, four of them are packed into one byte.
+
+# reset options that define the level, recorded with every episode
+RECORDED_OPTIONS = ["lvl_n_lanes", "lvl_speed", "lvl_road_width", "agt_speed", "frame_skip", "tape_offset"]
+# constructor arguments that change what a step does, the replay env is built with them
+RECORDED_SETTINGS = ["event_driven", "max_event_frames", "n_npcs", "npc_k"]
+
+def pack_actions(actions:np.ndarray) -> np.ndarray:
+    """Args:
+        actions (np.ndarray): (n,) actions in [0, 1, 2]
+    Returns:
+        np.ndarray: (ceil(n / 4),) uint8, 2 bits per action
+    """
+    actions = np.asarray(actions, dtype=np.uint8)
+    padded = np.zeros(-(-actions.shape[0] // 4) * 4, dtype=np.uint8)
+    padded[:actions.shape[0]] = actions
+    return np.bitwise_or.reduce(padded.reshape(-1, 4) << np.array([0, 2, 4, 6], dtype=np.uint8), axis=1)
+
+def unpack_actions(packed:np.ndarray, n_steps:int) -> np.ndarray:
+    """Args:
+        packed (np.ndarray): result of pack_actions
+        n_steps (int): number of actions
+    Returns:
+        np.ndarray: (n_steps,) uint8 actions
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    return ((packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).reshape(-1)[:n_steps]
+
+class Trajectory():
+    def __init__(self, seed:int, options:dict, actions:np.ndarray, n_steps:int, terminated:bool=False,
+                 settings:dict|None=None) -> None:
+        """One recorded episode.
+        Args:
+            seed (int): seed passed to reset
+            options (dict): level options, see RECORDED_OPTIONS
+            actions (np.ndarray): packed actions, see pack_actions
+            n_steps (int): number of steps
+            terminated (bool, optional): whether the episode ended with a collision. Defaults to False.
+            settings (dict | None, optional): env constructor arguments, see RECORDED_SETTINGS. Defaults to None
+                (the env defaults).
+        """
+        self.seed = seed
+        self.options = options
+        self.actions = actions
+        self.n_steps = n_steps
+        self.terminated = terminated
+        self.settings = {} if settings is None else settings
+
+    def unpacked_actions(self) -> np.ndarray:
+        return unpack_actions(self.actions, self.n_steps)
+
+    def save(self, path:str) -> None:
+        """Store the episode in a .npz file, a few bytes plus one byte per four steps."""
+        np.savez(path, seed=np.array(str(self.seed)), options=np.array(json.dumps(self.options)),
+                 actions=self.actions, n_steps=np.array(self.n_steps), terminated=np.array(self.terminated),
+                 settings=np.array(json.dumps(self.settings)))
+
+    @classmethod
+    def load(cls, path:str) -> "Trajectory":
+        with np.load(path) as data:
+            # recordings without settings were made with the env defaults
+            settings = json.loads(str(data["settings"])) if "settings" in data else None
+            return cls(seed=int(str(data["seed"])), options=json.loads(str(data["options"])), actions=data["actions"],
+                       n_steps=int(data["n_steps"]), terminated=bool(data["terminated"]), settings=settings)
+
+class TrajectoryRecorder(gym.Wrapper):
+    def __init__(self, env:gym.Env, seed:int|None=None) -> None:
+        """Records every episode of a SpeederBikesEnv as seed, level options and packed actions.
+        Resets without a seed get a fresh one from the recorder, so that every episode can be replayed.
+        Finished episodes are collected in self.trajectories.
+        Args:
+            env (gym.Env): SpeederBikesEnv, possibly wrapped
+            seed (int | None, optional): seed for the seeds of unseeded resets. Defaults to None.
+        """
+        super().__init__(env)
+        assert isinstance(env.unwrapped, SpeederBikesEnv)
+        self._seed_rng = np.random.default_rng(seed)
+        self.trajectories:list = []
+        self._settings = {key: getattr(env.unwrapped, key) for key in RECORDED_SETTINGS}
+
+        self._seed:int = None
+        self._options:dict = None
+        self._actions = np.zeros(1024, dtype=np.uint8)
+        self._n_steps = 0
+
+    def _finish(self, terminated:bool=False) -> None:
+        # store the running episode
+        if self._seed is None:
+            return
+        self.trajectories.append(Trajectory(self._seed, self._options, pack_actions(self._actions[:self._n_steps]),
+                                            self._n_steps, terminated, settings=dict(self._settings)))
+        self._seed = None
+
+    def reset(self, *, seed:int|None = None, options:dict|None = None) -> Tuple[Any, dict]:
+        self._finish()
+        seed = int(self._seed_rng.integers(0, 2**63)) if seed is None else seed
+        obs, info = self.env.reset(seed=seed, options={} if options is None else options)
+
+        env = self.env.unwrapped
+        self._seed = seed
+        self._options = {key: getattr(env, key) for key in RECORDED_OPTIONS}
+        self._n_steps = 0
+        return obs, info
+
+    def step(self, action:Any) -> Tuple[Any, float, bool, bool, dict]:
+        obs, reward, terminated, truncated, info = self.env.step(action)
+
+        if self._n_steps == self._actions.shape[0]:
+            self._actions = np.resize(self._actions, self._n_steps * 2)
+        self._actions[self._n_steps] = int(np.asarray(action))
+        self._n_steps += 1
+
+        if terminated or truncated:
+            self._finish(terminated)
+        return obs, reward, terminated, truncated, info
+
+    def close(self):
+        self._finish()
+        return super().close()
+
+class TrajectoryReplay():
+    def __init__(self, trajectory:Trajectory, observation_mode:str="flatten", backend:str="numpy",
+                 renderer:str="numpy", level_tape:Any=None) -> None:
+        """Rebuilds observations and frames of a recorded episode on demand by replaying its actions.
+        Replays are deterministic, any observation mode can be produced from the same recording. The env is built
+        with the trajectory's settings, e.g. event-driven stepping.
+        Step t is the state after t actions, step 0 the state after reset.
+        Args:
+            trajectory (Trajectory): recorded episode
+            observation_mode (str, optional): observation mode of the replayed env. Defaults to "flatten".
+            backend (str, optional): backend of the replayed env. Defaults to "numpy".
+            renderer (str, optional): renderer for frames. Defaults to "numpy".
+            level_tape (str | LevelTape | None, optional): tape the episode was recorded with. Defaults to None.
+        """
+        self.trajectory = trajectory
+        self.actions = trajectory.unpacked_actions()
+        self.n_steps = trajectory.n_steps
+        self.env = SpeederBikesEnv(observation_mode=observation_mode, backend=backend, renderer=renderer,
+                                   level_tape=level_tape, **trajectory.settings)
+        self.t = None
+        self._obs = None
+
+    def seek(self, t:int) -> None:
+        """Move the replay to step t. Going backwards replays from the start."""
+        if not 0 <= t <= self.n_steps:
+            raise IndexError(f"step {t} out of range [0, {self.n_steps}]")
+        if self.t is None or t < self.t:
+            self._obs, _ = self.env.reset(seed=self.trajectory.seed, options=self.trajectory.options)
+            self.t = 0
+        while self.t < t:
+            self._obs, _, _, _, _ = self.env.step(self.actions[self.t])
+            self.t += 1
+
+    def observation(self, t:int) -> Any:
+        """Returns:
+            Any: observation at step t
+        """
+        self.seek(t)
+        return self._obs
+
+    def frame(self, t:int, out:np.ndarray|None=None) -> np.ndarray:
+        """Returns:
+            np.ndarray: (H, W, 3) uint8 frame at step t
+        """
+        self.seek(t)
+        out = np.empty((self.env.window_size, self.env.window_size, 3), dtype=np.uint8) if out is None else out
+        return self.env.render_to(out)
+
+    def __iter__(self) -> Iterator:
+        # all observations, from step 0 on
+        for t in range(self.n_steps + 1):
+            yield self.observation(t)
+
+    def export(self, path:str, kind:str="observation") -> np.ndarray:
+        """Write the observations or frames of all steps into a memory-mapped .npy file.
+        Args:
+            path (str): file name
+            kind (str, optional): 'observation' or 'frame'. Defaults to "observation".
+        Returns:
+            np.ndarray: (n_steps + 1, ...) memory map of the file
+        """
+        assert kind in ["observation", "frame"]
+        assert kind == "frame" or self.env.observation_mode != "dict", "dict observations can't be exported"
+        self.seek(0)
+        if kind == "frame":
+            shape, dtype = (self.env.window_size, self.env.window_size, 3), np.uint8
+        else:
+            first = np.asarray(self._obs)
+            shape, dtype = first.shape, first.dtype
+        data = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(self.n_steps + 1,) + shape)
+        for t in range(self.n_steps + 1):
+            if kind == "frame":
+                self.frame(t, out=data[t])
+            else:
+                data[t] = self.observation(t)
+        data.flush()
+        return data
+
+    def close(self) -> None:
+        self.env.close()
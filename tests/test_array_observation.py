@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+def _build(env):
+    # the array observation from scratch: agent y and x, then one row per visible obstacle, oldest first,
+    # with its y and the limits of its blocked parts, all zeros for an obstacle without blocked parts
+    obs = np.zeros(env.observation_space.shape, dtype=env.coord_dtype)
+    agent_x, agent_y = env._agent_position()
+    obs[0, :2] = agent_y, agent_x
+    for k, (y, map, part_limits) in enumerate(env._obstacle_states()[:env.max_visible_obstcacles]):
+        xs = np.asarray(part_limits)[np.asarray(map, dtype=bool)].reshape(-1)
+        if xs.shape[0] > 0:
+            obs[k+1, 0] = y
+            obs[k+1, 1:1+xs.shape[0]] = xs
+    return obs
+
+
+@pytest.mark.parametrize("reuse_obs_buffer", [False, True])
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_incremental_rows_match_full_build(backend, reuse_obs_buffer):
+    env = SpeederBikesEnv(backend=backend, observation_mode="array", reuse_obs_buffer=reuse_obs_buffer)
+    rng = np.random.default_rng(0)
+    n_spawns = n_despawns = 0
+    for episode, n_lanes in enumerate([5, 5, 3, 2, 3] * 4):
+        # free lanes (all zero rows) are likely with few lanes
+        obs, _ = env.reset(seed=episode, options={"lvl_n_lanes": n_lanes, "lvl_speed": 500})
+        np.testing.assert_array_equal(obs, _build(env))
+        for _ in range(400):
+            n_obstacles = len(env._obstacle_states())
+            n_spawned = env.get_state()["n_spawned"]
+            obs, _, terminated, _, _ = env.step(int(rng.integers(3)))
+            np.testing.assert_array_equal(obs, _build(env))
+            n_spawns += env.get_state()["n_spawned"] > n_spawned
+            n_despawns += len(env._obstacle_states()) < n_obstacles + (env.get_state()["n_spawned"] - n_spawned)
+            if terminated:
+                break
+    assert n_spawns > 20 and n_despawns > 5
+
+
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_incremental_rows_after_set_state(backend):
+    source = SpeederBikesEnv(backend="numpy", observation_mode="array")
+    source.reset(seed=3)
+    states = []
+    for _ in range(200):
+        _, _, terminated, _, _ = source.step(1)
+        if terminated:
+            break
+        states.append(source.get_state())
+
+    env = SpeederBikesEnv(backend=backend, observation_mode="array")
+    env.reset(seed=0)
+    rng = np.random.default_rng(1)
+    # jump between states with the same and with other obstacles
+    for i in rng.permutation(len(states))[:50]:
+        env.set_state(states[i])
+        obs, _, _, _, _ = env.step(1)
+        np.testing.assert_array_equal(obs, _build(env))
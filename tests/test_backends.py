@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+LEVELS = [
+    {"lvl_n_lanes": 3, "lvl_speed": 200, "lvl_road_width": 350, "agt_speed": 200},
+    {"lvl_n_lanes": 5, "lvl_speed": 400, "lvl_road_width": 300, "agt_speed": 300},
+    {"lvl_n_lanes": 2, "lvl_speed": 150, "lvl_road_width": 480, "agt_speed": 500},
+]
+
+
+def _assert_same_obs(obs, expected):
+    if isinstance(expected, dict):
+        np.testing.assert_array_equal(obs["agent"], expected["agent"])
+        assert len(obs["obstacles"]) == len(expected["obstacles"])
+        for parts, expected_parts in zip(obs["obstacles"], expected["obstacles"]):
+            np.testing.assert_array_equal(parts, expected_parts)
+    else:
+        np.testing.assert_array_equal(obs, expected)
+
+
+@pytest.mark.parametrize("options", LEVELS)
+@pytest.mark.parametrize("mode", ["array", "flatten", "dict"])
+def test_numpy_backend_matches_pygame_backend(options, mode):
+    envs = [SpeederBikesEnv(backend=backend, observation_mode=mode) for backend in ["pygame", "numpy"]]
+    rng = np.random.default_rng(0)
+    for episode in range(3):
+        obs = [env.reset(seed=episode, options=options)[0] for env in envs]
+        _assert_same_obs(obs[1], obs[0])
+        for _ in range(500):
+            action = int(rng.integers(3))
+            results = [env.step(action) for env in envs]
+            _assert_same_obs(results[1][0], results[0][0])
+            assert results[1][1:3] == results[0][1:3]
+            np.testing.assert_array_equal(envs[1].get_state(), envs[0].get_state())
+            if results[0][2]:
+                break
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.core.collision import collision_mask, find_collision
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+def _old_check_collision(agent_x, agent_y, agent_size, obstacle_y, obstacle_height, obstacle_map, part_limits):
+    # the per obstacle check Level._checkCollision did before collisions were vectorized
+    a_l = agent_x - agent_size
+    a_r = agent_x + agent_size
+    a_t = agent_y - agent_size
+    a_b = agent_y + agent_size
+
+    o_t = obstacle_y
+    o_b = obstacle_y + obstacle_height
+
+    if (a_t <= o_b) and (a_b >= o_t):
+        for i, pos in enumerate(obstacle_map):
+            if pos:
+                o_l, o_r = part_limits[i]
+                if (a_r >= o_l) and (a_l <= o_r):
+                    return True
+    return False
+
+
+def _part_limits(width, n_lanes):
+    # like Obstacle
+    part_width = int(round(width / n_lanes))
+    limits = [[part_width * i, part_width * (i + 1) - 1] for i in range(n_lanes)]
+    limits[-1][1] = width
+    return np.array(limits)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_collision_matches_old_check(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(500):
+        n_lanes = int(rng.integers(2, 9))
+        width = int(rng.integers(100, 500))
+        part_limits = _part_limits(width, n_lanes)
+        agent_size = int(rng.integers(5, 30))
+        agent_x = rng.uniform(-agent_size, width + agent_size)
+        # integer positions hit the borders exactly
+        if rng.random() < 0.5:
+            agent_x = float(rng.integers(0, width + 1))
+        agent_y = float(rng.integers(0, 512))
+        obstacle_height = int(rng.integers(5, 40))
+        n = int(rng.integers(1, 8))
+        obstacle_y = rng.uniform(-100, 600, n) if rng.random() < 0.5 else rng.integers(-100, 600, n).astype(float)
+        maps = rng.random((n, n_lanes)) < 0.5
+
+        expected = [_old_check_collision(agent_x, agent_y, agent_size, y, obstacle_height, map, part_limits)
+                    for y, map in zip(obstacle_y, maps)]
+        mask = collision_mask(agent_x, agent_y, agent_size, obstacle_y, maps, part_limits, obstacle_height)
+        assert mask.any(axis=1).tolist() == expected
+
+        hit = find_collision(agent_x, agent_y, agent_size, obstacle_y, maps, part_limits, obstacle_height)
+        if any(expected):
+            assert hit is not None and hit[0] == expected.index(True) and mask[hit]
+        else:
+            assert hit is None
+
+
+@pytest.mark.parametrize("n_lanes", [2, 3, 5, 8])
+def test_agent_collided_matches_old_check(n_lanes):
+    env = SpeederBikesEnv(backend="pygame", lvl_n_lanes=n_lanes)
+    rng = np.random.default_rng(n_lanes)
+    for episode in range(3):
+        env.reset(seed=episode, options={"lvl_road_width": int(rng.integers(200, 480))})
+        agent, level = env.agent, env.level
+        for _ in range(400):
+            _, _, terminated, _, _ = env.step(int(rng.integers(3)))
+            expected = any(_old_check_collision(agent.x - level.left_border, agent.y, agent.size, obstacle.y,
+                                                obstacle.obstacle_height, obstacle.map, obstacle.part_limits)
+                           for obstacle in level.obstacles)
+            assert agent.collided() == expected == terminated
+            if terminated:
+                break
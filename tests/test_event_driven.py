@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+LEVELS = [
+    {"lvl_n_lanes": 3, "lvl_speed": 200, "lvl_road_width": 350, "agt_speed": 200},
+    {"lvl_n_lanes": 5, "lvl_speed": 437, "lvl_road_width": 300, "agt_speed": 310},
+]
+
+
+@pytest.mark.parametrize("options", LEVELS)
+def test_advance_matches_single_updates(options):
+    env = SpeederBikesEnv(backend="numpy")
+    reference = SpeederBikesEnv(backend="numpy")
+    dt = 1 / env.metadata["render_fps"]
+    rng = np.random.default_rng(0)
+    for episode in range(3):
+        env.reset(seed=episode, options=options)
+        reference.reset(seed=episode, options=options)
+        for _ in range(100):
+            action = int(rng.integers(3)) - 1
+            n_frames, collided = env.sim.advance(action, dt, max_frames=600)
+            for _ in range(n_frames):
+                reference.sim.update(action, dt)
+            # bitwise equal, positions included
+            assert env.get_state().tobytes() == reference.get_state().tobytes()
+            assert collided == reference.sim.collided()
+            if collided:
+                break
+
+
+@pytest.mark.parametrize("options", LEVELS)
+def test_event_steps_match_across_backends(options):
+    envs = [SpeederBikesEnv(backend=backend, observation_mode="array", event_driven=True) for backend in ["pygame", "numpy"]]
+    rng = np.random.default_rng(1)
+    for episode in range(3):
+        obs = [env.reset(seed=episode, options=options)[0] for env in envs]
+        np.testing.assert_array_equal(obs[1], obs[0])
+        for _ in range(100):
+            action = int(rng.integers(3))
+            expected, result = [env.step(action) for env in envs]
+            np.testing.assert_array_equal(result[0], expected[0])
+            assert result[1:3] == expected[1:3]
+            assert result[4]["n_frames"] == expected[4]["n_frames"]
+            if expected[2]:
+                break
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+def _compare(env, reference, k, seed, n_steps=200):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_steps):
+        action = int(rng.integers(3))
+        obs, reward, terminated, _, _ = env.step(action)
+
+        # k single steps, stopping at a collision
+        expected_reward = 0
+        for _ in range(k):
+            expected, single_reward, expected_terminated, _, _ = reference.step(action)
+            expected_reward += single_reward
+            if expected_terminated:
+                break
+        np.testing.assert_array_equal(obs, expected)
+        assert (reward, terminated) == (expected_reward, expected_terminated)
+        assert env.get_state().tobytes() == reference.get_state().tobytes()
+        if terminated:
+            return True
+    return False
+
+
+@pytest.mark.parametrize("k", [2, 5])
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_frame_skip_matches_single_steps(backend, k):
+    env = SpeederBikesEnv(backend=backend, observation_mode="flatten", frame_skip=k)
+    reference = SpeederBikesEnv(backend=backend, observation_mode="flatten")
+    n_terminated = 0
+    for episode in range(3):
+        options = {"lvl_n_lanes": 5, "lvl_speed": 400}
+        np.testing.assert_array_equal(env.reset(seed=episode, options=options)[0],
+                                      reference.reset(seed=episode, options=options)[0])
+        n_terminated += _compare(env, reference, k, seed=episode)
+    assert n_terminated > 0
+
+
+def test_frame_skip_option_persists():
+    env = SpeederBikesEnv(backend="numpy", observation_mode="array")
+    reference = SpeederBikesEnv(backend="numpy", observation_mode="array")
+    env.reset(seed=0, options={"frame_skip": 3})
+    assert env.frame_skip == 3
+
+    # later resets without the option keep it
+    for episode in range(1, 3):
+        env.reset(seed=episode)
+        reference.reset(seed=episode)
+        assert env.frame_skip == 3
+        _compare(env, reference, 3, seed=episode)
+
+    env.reset(seed=0, options={"frame_skip": 1})
+    reference.reset(seed=0)
+    _compare(env, reference, 1, seed=0)
@@ -0,0 +1,43 @@
+import collections
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+@pytest.mark.parametrize("reuse_obs_buffer", [False, True])
+@pytest.mark.parametrize("mode", ["array", "flatten", "lidar", "occupancy", "rgb_array_flatten"])
+def test_stack_matches_last_observations(mode, reuse_obs_buffer):
+    k = 3
+    kwargs = dict(backend="numpy", renderer="numpy", observation_mode=mode, lvl_speed=400)
+    env = SpeederBikesEnv(frame_stack=k, reuse_obs_buffer=reuse_obs_buffer, **kwargs)
+    reference = SpeederBikesEnv(**kwargs)
+    rng = np.random.default_rng(0)
+    n_steps = 60 if mode == "rgb_array_flatten" else 400
+
+    def check(obs, history):
+        # oldest first, slots before the episode's first observation are zeros
+        expected = np.stack([np.zeros_like(history[-1])] * (k - len(history)) + list(history))
+        assert obs.shape == env.observation_space.shape and obs.dtype == env.observation_space.dtype
+        np.testing.assert_array_equal(obs, expected.reshape(obs.shape))
+
+    for episode in range(3):
+        obs, _ = env.reset(seed=episode)
+        history = collections.deque([reference.reset(seed=episode)[0].copy()], maxlen=k)
+        check(obs, history)
+        previous = obs
+        for t in range(n_steps):
+            action = int(rng.integers(3))
+            obs, reward, terminated, _, _ = env.step(action)
+            expected, expected_reward, expected_terminated, _, _ = reference.step(action)
+            history.append(expected.copy())
+            assert (reward, terminated) == (expected_reward, expected_terminated)
+            check(obs, history)
+            if reuse_obs_buffer:
+                assert obs is previous
+            else:
+                assert not np.shares_memory(obs, previous)
+            previous = obs
+            # the last episode is cut short by a reset
+            if terminated or (episode == 2 and t == 20):
+                break
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+# runs in a fresh interpreter, the test process itself has long imported pygame
+_SNIPPET = """
+import sys
+from speederbikes_sim.envs import SpeederBikesEnv, SpeederBikesVecEnv
+for mode in SpeederBikesEnv.metadata["observation_modes"]:
+    env = SpeederBikesEnv(backend="numpy", renderer="numpy", observation_mode=mode)
+    env.reset(seed=0)
+    for _ in range(100):
+        env.step(1)
+for mode in SpeederBikesVecEnv.metadata["observation_modes"]:
+    envs = SpeederBikesVecEnv(num_envs=4, observation_mode=mode)
+    envs.reset(seed=0)
+    envs.step([1, 1, 1, 1])
+print(int("pygame" in sys.modules))
+"""
+
+
+def _run(snippet):
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
+    return subprocess.run([sys.executable, "-c", snippet], env=env, capture_output=True, text=True, check=True).stdout
+
+
+def test_headless_workers_never_import_pygame():
+    assert _run(_SNIPPET).split()[-1] == "0"
+
+
+def test_pygame_backend_imports_pygame_on_reset():
+    # renderer="numpy" alone is not enough
+    snippet = """
+import sys
+from speederbikes_sim.envs import SpeederBikesEnv
+env = SpeederBikesEnv(renderer="numpy")
+print(int("pygame" in sys.modules))
+env.reset(seed=0)
+print(int("pygame" in sys.modules))
+"""
+    assert _run(snippet).split() == ["0", "1"]
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+STEP = 0.01
+
+
+def _ray_march(lidar, agent_x, agent_y, lane_width, obstacle_y, obstacle_map, part_limits, obstacle_height):
+    # walk every ray in small steps until it leaves the road or enters a blocked part
+    t = np.arange(0, lidar.max_range + STEP, STEP)
+    distances = []
+    for dx, dy in zip(lidar.dx, lidar.dy):
+        x, y = agent_x + t * dx, agent_y + t * dy
+        hit = (x <= 0) | (x >= lane_width)
+        for top, map in zip(obstacle_y, obstacle_map):
+            for lane in np.flatnonzero(map):
+                left, right = part_limits[lane]
+                hit |= (x >= left) & (x <= right) & (y >= top) & (y <= top + obstacle_height)
+        distances.append(t[np.argmax(hit)] if hit.any() else lidar.max_range)
+    return np.minimum(distances, lidar.max_range)
+
+
+@pytest.mark.parametrize("n_rays", [1, 16, 33])
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_lidar_matches_ray_march(n_rays, backend):
+    env = SpeederBikesEnv(backend=backend, observation_mode="lidar", lidar_rays=n_rays, lvl_n_lanes=5, lvl_speed=300)
+    rng = np.random.default_rng(n_rays)
+    env.reset(seed=0)
+    world = env._world
+    n_checked = 0
+    for t in range(300):
+        obs, _, terminated, _, _ = env.step(int(rng.integers(3)))
+        if terminated:
+            env.reset()
+            continue
+        if t % 10:
+            continue
+        agent_x, agent_y = env._agent_position()
+        expected = _ray_march(env._lidar, agent_x - world.left_border, agent_y,
+                              world.right_border - world.left_border, *env._obstacle_arrays(), world.part_limits,
+                              env._obstacle_height())
+        # the march overshoots a surface by less than one step
+        np.testing.assert_allclose(obs, expected, atol=STEP + 1e-3)
+        n_checked += 1
+    assert n_checked > 10
@@ -0,0 +1,100 @@
+import itertools
+import numpy as np
+import pytest
+
+from speederbikes_sim.core.maps import MapSampler, acceptance, maps_to_codes
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+def _old_is_viable(map, last_map, n_lanes):
+    # Level._addObstacle's rules before MapSampler, returning the probability they let a map through
+    # instead of drawing against it
+    if map.sum() == n_lanes:
+        return 0.
+    if map.sum() == 0:
+        return 0.15
+    if last_map is not None:
+        n_twice_empty_slots = ((map == 0) & (last_map == 0)).sum()
+        if n_twice_empty_slots >= max(int(round(0.4 * n_lanes, 0)), 2):
+            return 0.05
+        if n_twice_empty_slots >= int(round(0.2 * n_lanes, 0)):
+            return 0.2
+    return 1.
+
+
+def _table_distribution(sampler, row):
+    # probability of each code under the alias table of a row
+    n = sampler.n_maps
+    p = sampler.prob[row].copy()
+    np.add.at(p, sampler.alias[row], 1. - sampler.prob[row])
+    return p / n
+
+
+@pytest.mark.parametrize("n_lanes", range(1, 8))
+def test_alias_tables_match_old_rules(n_lanes):
+    sampler = MapSampler(n_lanes)
+    maps = [np.array(map) for map in itertools.product([0, 1], repeat=n_lanes)]
+    codes = maps_to_codes(np.array(maps, dtype=bool)).astype(np.int64)
+    for last_map in [None] + maps:
+        # resampling until the rules accept picks a map with probability proportional to its acceptance
+        p = np.array([_old_is_viable(map, last_map, n_lanes) for map in maps])
+        if p.sum() == 0:
+            continue
+        row = sampler.n_maps if last_map is None else int(maps_to_codes(last_map.astype(bool)))
+        expected = np.zeros(sampler.n_maps)
+        expected[codes] = p / p.sum()
+        np.testing.assert_allclose(_table_distribution(sampler, row), expected, rtol=1e-12, atol=1e-15)
+
+
+def _obstacle_codes(backend, seed, n_steps=2000):
+    env = SpeederBikesEnv(backend=backend, lvl_n_lanes=5, lvl_speed=600)
+    env.reset(seed=seed)
+    codes = []
+    for _ in range(n_steps):
+        state = env.get_state()
+        if not codes or codes[-1] != (int(state["n_spawned"]), int(state["last_code"])):
+            codes.append((int(state["n_spawned"]), int(state["last_code"])))
+        _, _, terminated, _, _ = env.step(0)
+        if terminated:
+            # later episodes continue with the same RNG
+            env.reset()
+    return codes
+
+
+def test_seeded_reset_repeats_obstacles():
+    for seed in [0, 1]:
+        expected = _obstacle_codes("numpy", seed)
+        assert len(expected) > 20
+        assert _obstacle_codes("numpy", seed) == expected
+        assert _obstacle_codes("pygame", seed) == expected
+    assert _obstacle_codes("numpy", 2) != expected
+
+    sampler = MapSampler(5)
+    draws = [[sampler.sample(None, np.random.default_rng(3)) for _ in range(50)] for _ in range(2)]
+    assert draws[0] == draws[1]
+
+
+@pytest.mark.parametrize("n_lanes", [9, 12, 20])
+def test_bitmask_fallback_yields_viable_maps(n_lanes):
+    sampler = MapSampler(n_lanes)
+    assert not sampler.use_tables
+    rng = np.random.default_rng(n_lanes)
+    last_codes = np.full(500, -1, dtype=np.int64)
+    for _ in range(20):
+        codes = sampler.sample_batch(last_codes, rng)
+        assert ((codes >= 0) & (codes < sampler.n_maps)).all()
+        assert (acceptance(codes, last_codes, n_lanes) > 0).all()
+        assert (codes != sampler.n_maps - 1).all()
+        last_codes = codes
+    assert sampler.to_map(last_codes).shape == (500, n_lanes)
+
+
+def test_bitmask_fallback_matches_tables():
+    n_lanes = 4
+    tables, bitmasks = MapSampler(n_lanes), MapSampler(n_lanes, max_table_lanes=0)
+    rng = np.random.default_rng(0)
+    for last_code in [-1, 0, 5, 9]:
+        codes = bitmasks.sample_batch(np.full(200_000, last_code), rng)
+        frequencies = np.bincount(codes, minlength=bitmasks.n_maps) / codes.shape[0]
+        expected = _table_distribution(tables, tables.n_maps if last_code < 0 else last_code)
+        np.testing.assert_allclose(frequencies, expected, atol=0.005)
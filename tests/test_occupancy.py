@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+from speederbikes_sim.envs.speederbikes_vec_env import SpeederBikesVecEnv
+
+
+def _rasterize(grid_rows, window_size, agent_x, agent_size, obstacle_y, obstacle_map, part_limits, obstacle_height):
+    # one cell at a time: a band is hit if a blocked part overlaps it, the last row holds the agent's lanes
+    n_lanes = part_limits.shape[0]
+    band = window_size / grid_rows
+    grid = np.zeros((grid_rows + 1, n_lanes), dtype=bool)
+    for row in range(grid_rows):
+        for lane in range(n_lanes):
+            for top, map in zip(obstacle_y, obstacle_map):
+                if map[lane] and top < (row + 1) * band and top + obstacle_height >= row * band:
+                    grid[row, lane] = True
+    for lane, (left, right) in enumerate(part_limits):
+        grid[grid_rows, lane] = agent_x + agent_size >= left and agent_x - agent_size <= right
+    return grid
+
+
+@pytest.mark.parametrize("grid_rows", [7, 32])
+@pytest.mark.parametrize("n_lanes", [3, 5])
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_occupancy_matches_rasterized_obstacles(grid_rows, n_lanes, backend):
+    env = SpeederBikesEnv(backend=backend, observation_mode="occupancy", grid_rows=grid_rows, lvl_n_lanes=n_lanes,
+                          lvl_speed=300)
+    rng = np.random.default_rng(n_lanes)
+    obs, _ = env.reset(seed=0)
+    n_occupied = 0
+    for _ in range(300):
+        world = env._world
+        agent_x, _ = env._agent_position()
+        agent_size = env.sim.agt_size if backend == "numpy" else env.agent.size
+        expected = _rasterize(grid_rows, env.window_size, agent_x - world.left_border, agent_size,
+                              *env._obstacle_arrays(), world.part_limits, env._obstacle_height())
+        n_cells = (grid_rows + 1) * n_lanes
+        assert obs.shape == (-(-n_cells // 8),)
+        bits = np.unpackbits(obs, count=n_cells).astype(bool)
+        np.testing.assert_array_equal(bits.reshape(grid_rows + 1, n_lanes), expected)
+        n_occupied += expected[:-1].sum()
+
+        obs, _, terminated, _, _ = env.step(int(rng.integers(3)))
+        if terminated:
+            obs, _ = env.reset()
+    assert n_occupied > 0
+
+
+def _dtypes(obs, space):
+    # (observation dtype, declared dtype) of every array in an observation
+    if isinstance(obs, dict):
+        pairs = [(obs["agent"].dtype, space["agent"].dtype)]
+        parts_dtype = space["obstacles"].feature_space.feature_space[0].dtype
+        pairs += [(parts.dtype, parts_dtype) for parts in obs["obstacles"]]
+        if "npcs" in obs:
+            pairs.append((obs["npcs"].dtype, space["npcs"].dtype))
+        return pairs
+    return [(obs.dtype, space.dtype)]
+
+
+@pytest.mark.parametrize("coord_dtype", ["float32", "float64"])
+@pytest.mark.parametrize("mode", SpeederBikesEnv.metadata["observation_modes"])
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_observation_dtype_matches_space(backend, mode, coord_dtype):
+    env = SpeederBikesEnv(backend=backend, renderer=backend, observation_mode=mode, coord_dtype=coord_dtype, n_npcs=4)
+    obs, _ = env.reset(seed=0)
+    for _ in range(5):
+        for dtype, declared in _dtypes(obs, env.observation_space):
+            assert dtype == declared
+        obs, _, _, _, _ = env.step(1)
+    # pixels and bits stay uint8, coordinates and distances follow coord_dtype
+    expected = np.uint8 if mode in ["rgb_array", "rgb_array_flatten", "occupancy"] else np.dtype(coord_dtype)
+    space = env.observation_space["agent"] if mode == "dict" else env.observation_space
+    assert space.dtype == expected
+
+
+@pytest.mark.parametrize("coord_dtype", ["float32", "float64"])
+@pytest.mark.parametrize("mode", SpeederBikesVecEnv.metadata["observation_modes"])
+def test_vec_observation_dtype_matches_space(mode, coord_dtype):
+    envs = SpeederBikesVecEnv(num_envs=3, observation_mode=mode, coord_dtype=coord_dtype)
+    obs, _ = envs.reset(seed=0)
+    assert obs.dtype == envs.single_observation_space.dtype == envs.observation_space.dtype
+    obs, _, _, _, _ = envs.step([0, 1, 2])
+    assert obs.dtype == envs.single_observation_space.dtype
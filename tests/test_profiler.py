@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+@pytest.mark.parametrize("env_kwargs", [{}, {"frame_skip": 3}, {"event_driven": True}, {"n_npcs": 10}])
+@pytest.mark.parametrize("backend", ["pygame", "numpy"])
+def test_profiling_does_not_change_steps(backend, env_kwargs):
+    envs = [SpeederBikesEnv(backend=backend, profile=profile, profile_info=True, **env_kwargs) for profile in [False, True]]
+    rng = np.random.default_rng(0)
+    for episode in range(2):
+        for env in envs:
+            env.reset(seed=episode)
+        for _ in range(200):
+            action = int(rng.integers(3))
+            expected, result = [env.step(action) for env in envs]
+            np.testing.assert_array_equal(result[0], expected[0])
+            assert result[1:3] == expected[1:3]
+            assert "perf" not in expected[4] and result[4]["perf"]["step"] > 0
+            if expected[2]:
+                break
+
+    phases = envs[1].get_perf_stats()["phases"]
+    assert {"step", "get_obs", "get_info"} <= phases.keys()
+    if not env_kwargs.get("event_driven") or backend == "pygame":
+        assert {"agent_update", "level_update", "collision"} <= phases.keys()
+    assert envs[0].get_perf_stats() is None
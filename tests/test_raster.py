@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.core.raster import Rasterizer
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+LEVELS = [
+    {"lvl_n_lanes": 3, "lvl_speed": 200, "lvl_road_width": 350, "agt_speed": 200},
+    {"lvl_n_lanes": 5, "lvl_speed": 333, "lvl_road_width": 301, "agt_speed": 270},
+    {"lvl_n_lanes": 7, "lvl_speed": 150, "lvl_road_width": 480, "agt_speed": 500},
+]
+
+
+@pytest.mark.parametrize("options", LEVELS)
+@pytest.mark.parametrize("backend", ["pygame", "numpy"])
+def test_numpy_renderer_matches_pygame_frames(options, backend):
+    envs = [SpeederBikesEnv(backend=backend, renderer=renderer, observation_mode="rgb_array")
+            for renderer in ["pygame", "numpy"]]
+    rng = np.random.default_rng(0)
+    for episode in range(2):
+        frames = [env.reset(seed=episode, options=options)[0] for env in envs]
+        np.testing.assert_array_equal(frames[1], frames[0])
+        for _ in range(150):
+            action = int(rng.integers(3))
+            results = [env.step(action) for env in envs]
+            np.testing.assert_array_equal(results[1][0], results[0][0])
+            if results[0][2]:
+                break
+
+
+def test_batch_rendering_matches_single_frames():
+    rng = np.random.default_rng(1)
+    rasterizer = Rasterizer(512, 350, 5)
+    n_envs, n = 6, 4
+    agent_x = rng.uniform(100, 400, n_envs)
+    obstacle_y = rng.uniform(-60, 560, (n_envs, n))
+    obstacle_map = rng.random((n_envs, n, 5)) < 0.5
+    in_use = rng.random((n_envs, n)) < 0.8
+
+    frames = rasterizer.render_batch(agent_x, obstacle_y, obstacle_map, in_use)
+    for k in range(n_envs):
+        expected = rasterizer.render(agent_x[k], obstacle_y[k][in_use[k]], obstacle_map[k][in_use[k]])
+        np.testing.assert_array_equal(frames[k], expected)
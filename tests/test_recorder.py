@@ -0,0 +1,45 @@
+import numpy as np
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+def _frame(env):
+    return env.render_to(np.empty((env.window_size, env.window_size, 3), dtype=np.uint8))
+
+
+def _run(env, n_episodes):
+    # rendered frames of every episode, next to what the recorder gets
+    episodes = [[_frame(env)]]
+    rng = np.random.default_rng(0)
+    while len(episodes) <= n_episodes:
+        _, _, terminated, _, _ = env.step(int(rng.integers(3)))
+        episodes[-1].append(_frame(env))
+        if terminated:
+            env.reset()
+            episodes.append([_frame(env)])
+    return episodes
+
+
+def test_episode_clips_match_rendered_frames(tmp_path):
+    env = SpeederBikesEnv(backend="numpy", renderer="numpy", n_npcs=3)
+    env.reset(seed=0)
+    recorder = env.start_recording(str(tmp_path), max_queue=4)
+    episodes = _run(env, 2)
+    env.stop_recording()
+
+    assert len(recorder.clips) == len(episodes)
+    for path, frames in zip(recorder.clips, episodes):
+        np.testing.assert_array_equal(np.load(path, mmap_mode="r"), np.stack(frames))
+
+
+def test_crash_clips_keep_the_last_frames(tmp_path):
+    env = SpeederBikesEnv(backend="numpy", renderer="numpy")
+    env.reset(seed=0)
+    recorder = env.start_recording(str(tmp_path), mode="crash", ring_size=30)
+    episodes = _run(env, 2)
+    env.stop_recording()
+
+    # the last episode did not crash
+    assert len(recorder.clips) == 2
+    for path, frames in zip(recorder.clips, episodes):
+        np.testing.assert_array_equal(np.load(path), np.stack(frames[-30:]))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+FIRST = {"lvl_n_lanes": 5, "lvl_speed": 300, "lvl_road_width": 350, "agt_speed": 250}
+SAME_GEOMETRY = {"lvl_n_lanes": 5, "lvl_speed": 450, "lvl_road_width": 350, "agt_speed": 400}
+OTHER_GEOMETRY = {"lvl_n_lanes": 3, "lvl_speed": 200, "lvl_road_width": 300, "agt_speed": 200}
+
+
+def _play(env, rng, n_steps=150):
+    for _ in range(n_steps):
+        _, _, terminated, _, _ = env.step(int(rng.integers(3)))
+        if terminated:
+            break
+
+
+@pytest.mark.parametrize("options", [SAME_GEOMETRY, OTHER_GEOMETRY])
+@pytest.mark.parametrize("mode", ["flatten", "rgb_array"])
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_reset_in_place_matches_fresh_env(backend, mode, options):
+    env = SpeederBikesEnv(backend=backend, observation_mode=mode)
+    env.reset(seed=0, options=FIRST)
+    _play(env, np.random.default_rng(0))
+    level = env._world
+
+    obs, info = env.reset(seed=1, options=options)
+    # the level is only rebuilt if its geometry changes
+    assert (env._world is level) == (options is SAME_GEOMETRY)
+
+    fresh = SpeederBikesEnv(backend=backend, observation_mode=mode)
+    expected, expected_info = fresh.reset(seed=1, options=options)
+    np.testing.assert_array_equal(obs, expected)
+    assert info["distance"] == expected_info["distance"]
+
+    rng = np.random.default_rng(1)
+    for _ in range(100 if mode == "rgb_array" else 300):
+        action = int(rng.integers(3))
+        obs, reward, terminated, _, _ = env.step(action)
+        expected, expected_reward, expected_terminated, _, _ = fresh.step(action)
+        np.testing.assert_array_equal(obs, expected)
+        assert (reward, terminated) == (expected_reward, expected_terminated)
+        if terminated:
+            break
+
+
+@pytest.mark.parametrize("mode", ["array", "flatten", "occupancy"])
+def test_observation_space_follows_lanes(mode):
+    env = SpeederBikesEnv(backend="numpy", observation_mode=mode)
+    shapes = {}
+    for n_lanes in [5, 3, 8, 5, 3]:
+        obs, _ = env.reset(seed=0, options={"lvl_n_lanes": n_lanes})
+        expected = SpeederBikesEnv(backend="numpy", observation_mode=mode, lvl_n_lanes=n_lanes)
+        expected.reset(seed=0)
+        # cached spaces are reused when the number of lanes comes back
+        if n_lanes in shapes:
+            assert env.observation_space is shapes[n_lanes]
+        shapes[n_lanes] = env.observation_space
+        assert env.observation_space.shape == expected.observation_space.shape == obs.shape
+        assert obs in env.observation_space
+        for _ in range(30):
+            obs, _, _, _, _ = env.step(1)
+            assert obs.shape == env.observation_space.shape
+    assert len({space.shape for space in shapes.values()}) == 3
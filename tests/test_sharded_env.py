@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_vec_env import SpeederBikesVecEnv
+from speederbikes_sim.envs.speederbikes_sharded_env import SpeederBikesShardedVecEnv
+
+LEVEL = {"lvl_n_lanes": 5, "lvl_speed": 400, "lvl_road_width": 300, "agt_speed": 300}
+
+
+def _run(envs, seed, n_steps=300):
+    rng = np.random.default_rng(0)
+    results = [envs.reset(seed=seed)]
+    for _ in range(n_steps):
+        results.append(envs.step(rng.integers(3, size=envs.num_envs)))
+    return results
+
+
+@pytest.mark.parametrize("mode", ["flatten", "occupancy"])
+def test_sharded_env_is_deterministic(mode):
+    runs = []
+    for _ in range(2):
+        envs = SpeederBikesShardedVecEnv(num_envs=6, num_workers=3, observation_mode=mode, **LEVEL)
+        runs.append(_run(envs, seed=7))
+        envs.close()
+    for result, expected in zip(*runs):
+        np.testing.assert_array_equal(result[0], expected[0])
+        # rewards, terminated and truncated of the steps
+        for value, expected_value in zip(result[1:-1], expected[1:-1]):
+            np.testing.assert_array_equal(value, expected_value)
+
+
+@pytest.mark.parametrize("mode", ["array", "rgb_array_flatten"])
+def test_sharded_env_matches_vec_env(mode):
+    num_envs, seeds = 4, [11, 12, 13, 14]
+    envs = SpeederBikesShardedVecEnv(num_envs=num_envs, num_workers=2, observation_mode=mode, **LEVEL)
+    # each shard's slice of the seeds seeds its shared RNG
+    shards = [SpeederBikesVecEnv(num_envs=2, observation_mode=mode, **LEVEL) for _ in range(2)]
+
+    obs, info = envs.reset(seed=seeds)
+    expected = [shard.reset(seed=seeds[2*k:2*k+2]) for k, shard in enumerate(shards)]
+    np.testing.assert_array_equal(obs, np.concatenate([e[0] for e in expected]))
+    np.testing.assert_array_equal(info["distance"], np.concatenate([e[1]["distance"] for e in expected]))
+
+    rng = np.random.default_rng(0)
+    n_terminated = 0
+    for _ in range(400):
+        actions = rng.integers(3, size=num_envs)
+        obs, rewards, terminated, truncated, info = envs.step(actions)
+        expected = [shard.step(actions[2*k:2*k+2]) for k, shard in enumerate(shards)]
+        np.testing.assert_array_equal(obs, np.concatenate([e[0] for e in expected]))
+        np.testing.assert_array_equal(rewards, np.concatenate([e[1] for e in expected]))
+        np.testing.assert_array_equal(terminated, np.concatenate([e[2] for e in expected]))
+        assert not truncated.any()
+        np.testing.assert_array_equal(info["distance"], np.concatenate([e[4]["distance"] for e in expected]))
+
+        # autoreset: the last observation and info of every terminated world
+        if not terminated.any():
+            assert "final_observation" not in info
+            continue
+        n_terminated += terminated.sum()
+        np.testing.assert_array_equal(info["_final_observation"], terminated)
+        np.testing.assert_array_equal(info["_final_info"], terminated)
+        for i in range(num_envs):
+            expected_info = expected[i // 2][4]
+            if not terminated[i]:
+                assert info["final_observation"][i] is None and info["final_info"][i] is None
+                continue
+            np.testing.assert_array_equal(info["final_observation"][i], expected_info["final_observation"][i % 2])
+            assert info["final_info"][i] == expected_info["final_info"][i % 2]
+    envs.close()
+    assert n_terminated > 0
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.core.tape import generate_tape
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+
+
+def _step_until(env, n_obstacles):
+    while len(env._obstacle_arrays()[0]) != n_obstacles:
+        _, _, terminated, _, _ = env.step(1)
+        assert not terminated
+
+
+def test_set_state_after_reset_with_other_speed():
+    env = SpeederBikesEnv(backend="pygame", observation_mode="flatten")
+    env.reset(seed=0, options={"lvl_speed": 100})
+    _step_until(env, 3)
+    # the level is reused, its obstacles become spares with the old speed
+    env.reset(seed=1, options={"lvl_speed": 400})
+
+    reference = SpeederBikesEnv(backend="numpy", observation_mode="flatten")
+    reference.reset(seed=2, options={"lvl_speed": 400})
+    _step_until(reference, 2)
+    state = reference.get_state()
+
+    env.set_state(state)
+    assert [obstacle.speed for obstacle in env.level.obstacles] == [400, 400]
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        action = int(rng.integers(3))
+        obs, reward, terminated, _, _ = env.step(action)
+        expected, expected_reward, expected_terminated, _, _ = reference.step(action)
+        np.testing.assert_array_equal(obs, expected)
+        assert (reward, terminated) == (expected_reward, expected_terminated)
+        if terminated:
+            break
+
+
+def test_state_roundtrip_across_backends():
+    source = SpeederBikesEnv(backend="numpy", observation_mode="array")
+    source.reset(seed=3)
+    for _ in range(50):
+        source.step(2)
+    state = source.get_state()
+
+    for backend in ["numpy", "pygame"]:
+        env = SpeederBikesEnv(backend=backend, observation_mode="array")
+        env.reset(seed=4)
+        env.set_state(state)
+        np.testing.assert_array_equal(env.get_state(), state)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "pygame"])
+def test_state_restores_tape_offset(backend, tmp_path):
+    generate_tape(str(tmp_path / "tape"), 5000, n_lanes=3, seed=0, spacing_jitter=40)
+    tape = str(tmp_path / "tape.npy")
+
+    source = SpeederBikesEnv(backend=backend, level_tape=tape)
+    source.reset(options={"tape_offset": 1000})
+    for _ in range(40):
+        source.step(1)
+    state = source.get_state()
+
+    env = SpeederBikesEnv(backend=backend, level_tape=tape)
+    env.reset(options={"tape_offset": 0})
+    env.set_state(state)
+    assert env.tape_offset == 1000
+    for _ in range(300):
+        obs, reward, terminated, _, _ = env.step(1)
+        expected, expected_reward, expected_terminated, _, _ = source.step(1)
+        np.testing.assert_array_equal(obs, expected)
+        assert (reward, terminated) == (expected_reward, expected_terminated)
+        if terminated:
+            break
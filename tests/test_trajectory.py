@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+from speederbikes_sim.wrappers.trajectory import Trajectory, TrajectoryRecorder, TrajectoryReplay
+
+
+def _record(env_kwargs, n_steps=120):
+    env = TrajectoryRecorder(SpeederBikesEnv(backend="numpy", observation_mode="flatten", **env_kwargs), seed=0)
+    observations = [env.reset()[0].copy()]
+    rng = np.random.default_rng(1)
+    for _ in range(n_steps):
+        obs, _, terminated, _, _ = env.step(int(rng.integers(3)))
+        observations.append(obs.copy())
+        if terminated:
+            break
+    env.close()
+    return env.trajectories[0], observations
+
+
+@pytest.mark.parametrize("env_kwargs", [{}, {"event_driven": True, "max_event_frames": 40}, {"n_npcs": 20, "npc_k": 2}])
+def test_replay_matches_recording(env_kwargs, tmp_path):
+    trajectory, observations = _record(env_kwargs)
+    trajectory.save(tmp_path / "episode.npz")
+    trajectory = Trajectory.load(tmp_path / "episode.npz")
+
+    replay = TrajectoryReplay(trajectory, observation_mode="flatten")
+    assert replay.n_steps == len(observations) - 1
+    for t, expected in enumerate(observations):
+        np.testing.assert_array_equal(replay.observation(t), expected)
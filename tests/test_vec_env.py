@@ -0,0 +1,95 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+import speederbikes_sim
+from speederbikes_sim.core.state import unpack_rng
+from speederbikes_sim.envs.speederbikes_env import SpeederBikesEnv
+from speederbikes_sim.envs.speederbikes_vec_env import SpeederBikesVecEnv
+
+LEVELS = [
+    {"lvl_n_lanes": 3, "lvl_speed": 200, "lvl_road_width": 350, "agt_speed": 200},
+    {"lvl_n_lanes": 5, "lvl_speed": 400, "lvl_road_width": 300, "agt_speed": 300},
+]
+
+
+@pytest.mark.parametrize("level", LEVELS)
+@pytest.mark.parametrize("mode", ["array", "flatten", "occupancy"])
+def test_vec_env_matches_single_env(level, mode):
+    num_envs = 4
+    vec = SpeederBikesVecEnv(num_envs=num_envs, observation_mode=mode, **level)
+    envs = [SpeederBikesEnv(backend="numpy", observation_mode=mode, **level) for _ in range(num_envs)]
+    for i, env in enumerate(envs):
+        env.reset(seed=i)
+    world = np.arange(num_envs)
+    rng = np.random.default_rng(0)
+
+    for _ in range(1000):
+        # every world starts the step from its env's state. The worlds share one RNG, drawing first from it
+        # world 0 samples the same obstacles as its env.
+        states = [env.get_state() for env in envs]
+        for i, state in enumerate(states):
+            vec.set_state(state, mask=world == i)
+        unpack_rng(states[0]["rng"], vec.sim.rng)
+
+        actions = rng.integers(3, size=num_envs)
+        obs, rewards, terminated, _, info = vec.step(actions)
+        for i, env in enumerate(envs):
+            expected, expected_reward, expected_terminated, _, _ = env.step(int(actions[i]))
+            assert (rewards[i], terminated[i]) == (expected_reward, expected_terminated)
+            if i == 0 or env.get_state()["n_spawned"] == states[i]["n_spawned"]:
+                np.testing.assert_array_equal(info["final_observation"][i] if terminated[i] else obs[i], expected)
+            if expected_terminated:
+                env.reset()
+
+
+def test_autoreset_keeps_final_observation():
+    num_envs = 8
+    vec = SpeederBikesVecEnv(num_envs=num_envs, observation_mode="array", lvl_speed=400)
+    env = SpeederBikesEnv(backend="numpy", observation_mode="array", lvl_speed=400)
+    env.reset(seed=0)
+    vec.reset(seed=0)
+    rng = np.random.default_rng(0)
+
+    n_terminated = 0
+    for _ in range(600):
+        states = [vec.get_state(i) for i in range(num_envs)]
+        actions = rng.integers(3, size=num_envs)
+        obs, rewards, terminated, _, info = vec.step(actions)
+        if not terminated.any():
+            assert "final_observation" not in info
+            continue
+
+        n_terminated += terminated.sum()
+        np.testing.assert_array_equal(info["_final_observation"], terminated)
+        np.testing.assert_array_equal(info["_final_info"], terminated)
+        for i in range(num_envs):
+            if not terminated[i]:
+                assert info["final_observation"][i] is None and info["final_info"][i] is None
+                continue
+            # the final step replayed from the world's state
+            env.set_state(states[i])
+            expected, expected_reward, expected_terminated, _, expected_info = env.step(int(actions[i]))
+            assert expected_terminated and rewards[i] == expected_reward == -100
+            np.testing.assert_array_equal(info["final_observation"][i], expected)
+            assert info["final_info"][i] == {"distance": expected_info["distance"]}
+
+            # the returned observation is the one of the new episode
+            state = vec.get_state(i)
+            assert state["n_spawned"] == 1 and state["agent_x"] == vec.sim.agent_start_x
+            np.testing.assert_array_equal(obs[i], vec._get_obs(np.array([i]))[0])
+    assert n_terminated > 0
+
+
+def test_gym_make_vec_env():
+    envs = gym.make("speederbikes/SpeederBikes-vec-v0", num_envs=5, observation_mode="flatten")
+    assert isinstance(envs, SpeederBikesVecEnv)
+    assert envs.num_envs == 5
+    obs, info = envs.reset(seed=0)
+    assert obs.shape == (5,) + envs.single_observation_space.shape
+    assert obs in envs.observation_space
+    assert info["distance"].shape == (5,)
+    obs, rewards, terminated, truncated, info = envs.step(envs.action_space.sample())
+    assert obs in envs.observation_space
+    assert rewards.shape == terminated.shape == truncated.shape == (5,)
+    envs.close()